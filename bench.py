@@ -0,0 +1,288 @@
+"""
+bench.py
+--------
+
+Banco de pruebas de rendimiento para todas las funciones públicas de imgControl.
+
+Genera imágenes sintéticas de distintos tamaños (256² hasta 8192²) y tipos
+(float64, float32, uint8), mide cada función y escribe un JSON que se puede
+comparar contra una línea base guardada para detectar regresiones.
+
+Métricas por (función, tamaño, tipo)
+------------------------------------
+- tiempo_s / tiempo_mediana_s : mejor tiempo y mediana de las repeticiones.
+- memoria_pico_bytes : memoria extra máxima durante la llamada (tracemalloc;
+  NumPy registra allí sus buffers).
+- copias_imagen : memoria_pico_bytes / tamaño de la imagen de entrada, es decir,
+  cuántas imágenes completas se asignan (temporales + resultado).
+- asignaciones : pasos de Python (opcodes, con sys.settrace) durante los que se
+  asignaron al menos UMBRAL_ASIGNACION bytes, aunque se liberen enseguida: el
+  resultado más los temporales por llamada. Un paso que crea varios arreglos
+  (p. ej. una sola llamada a np.pad) cuenta una vez.
+- bloques_retenidos : bloques de memoria que siguen vivos al terminar la
+  llamada (StatisticDiff.count_diff entre instantáneas de tracemalloc). No es
+  un conteo de asignaciones: solo ve el resultado y lo que la función retenga.
+
+Uso
+---
+    python bench.py --salida base.json
+    python bench.py --tamanos 256 1024 --tipos uint8 --comparar base.json
+    python bench.py --funciones RotarImg Histograma --repeticiones 5
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import imgControl
+
+TAMANOS = (256, 1024, 2048, 4096, 8192)
+TIPOS = ("float64", "float32", "uint8")
+
+# Bytes a partir de los cuales un paso cuenta como asignación (arreglos, no objetos chicos)
+UMBRAL_ASIGNACION = 64 << 10
+
+
+def _argumentos(nombre, img, img2):
+    """Argumentos representativos de cada función (además de la imagen)."""
+    h, w = img.shape[:2]
+    return {
+        "Layer": (img, 0),
+        "Canal": (img, 1),
+        "Negativo": (img,),
+        "CombinarF": (img, img2, 0.4),
+        "Grises": (img,),
+        "SumarBrillo": (img, 0.1),
+        "AjusteCanal": (img, 0, 0.1),
+        "AjusteContraste": (img, 0, 1.2),
+        "Binaria": (img, 0.5),
+        "Desplazar": (img, w // 10, h // 10),
+        "Recortar": (img, h // 4, 3 * h // 4, w // 4, 3 * w // 4),
+        "RotarImg": (img, 30),
+        "ReducirResolucion": (img, 2),
+        "Ampliar": (img, 2),
+        "Histograma": (img,),
+    }[nombre]
+
+
+FUNCIONES = ("Layer", "Canal", "Negativo", "CombinarF", "Grises", "SumarBrillo",
+             "AjusteCanal", "AjusteContraste", "Binaria", "Desplazar", "Recortar",
+             "RotarImg", "ReducirResolucion", "Ampliar", "Histograma")
+
+
+def ImagenSintetica(tamano: int, tipo: str, semilla: int = 0) -> np.ndarray:
+    """
+    Imagen (tamano, tamano, 3) determinista: gradientes suaves más ruido, de modo
+    que los histogramas y umbrales no sean degenerados.
+    """
+    rng = np.random.default_rng(semilla)
+    eje = np.linspace(0, 1, tamano, dtype=np.float32)
+    img = np.empty((tamano, tamano, 3), dtype=np.float32)
+    img[:, :, 0] = eje[None, :]
+    img[:, :, 1] = eje[:, None]
+    img[:, :, 2] = 0.5
+    img += rng.normal(0, 0.1, size=img.shape).astype(np.float32)
+    np.clip(img, 0, 1, out=img)
+    if tipo == "uint8":
+        return (img * 255).astype(np.uint8)
+    return img.astype(tipo)
+
+
+def _contar_asignaciones(funcion, args, umbral: int) -> int:
+    """
+    Pasos (opcodes) de Python que asignaron al menos `umbral` bytes durante
+    funcion(*args), aunque los liberen en el mismo paso. Requiere tracemalloc
+    activo: entre un paso y el siguiente se compara el pico con la memoria al
+    empezar y se reinicia el pico.
+    """
+    conteo = 0
+    inicio = tracemalloc.get_traced_memory()[0]
+
+    def cerrar_paso():
+        nonlocal conteo, inicio
+        actual, pico = tracemalloc.get_traced_memory()
+        if pico - inicio >= umbral:
+            conteo += 1
+        tracemalloc.reset_peak()
+        inicio = actual
+
+    def local(frame, evento, arg):
+        if evento in ("opcode", "return"):
+            cerrar_paso()
+        return local
+
+    def rastrear(frame, evento, arg):
+        frame.f_trace_opcodes = True
+        frame.f_trace_lines = False
+        return local
+
+    tracemalloc.reset_peak()
+    previo = sys.gettrace()
+    sys.settrace(rastrear)
+    try:
+        resultado = funcion(*args)
+    finally:
+        sys.settrace(previo)
+    cerrar_paso()
+    del resultado
+    return conteo
+
+
+def Medir(funcion, args, repeticiones: int, umbral_asignacion: int = UMBRAL_ASIGNACION) -> dict:
+    """
+    Tiempos (mejor y mediana), memoria pico extra, asignaciones y bloques
+    retenidos de funcion(*args).
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(*args)
+        tiempos.append(time.perf_counter() - inicio)
+        del resultado
+
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    base = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    resultado = funcion(*args)
+    pico = tracemalloc.get_traced_memory()[1] - base
+    despues = tracemalloc.take_snapshot()
+    del resultado
+    # Pasada aparte: el rastreo por opcode es lento y no debe contar en los tiempos
+    asignaciones = _contar_asignaciones(funcion, args, umbral_asignacion)
+    tracemalloc.stop()
+    propios = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    bloques = sum(d.count_diff for d in despues.filter_traces(propios).compare_to(
+        antes.filter_traces(propios), "filename"))
+    return {
+        "tiempo_s": min(tiempos),
+        "tiempo_mediana_s": statistics.median(tiempos),
+        "memoria_pico_bytes": int(pico),
+        "asignaciones": asignaciones,
+        "bloques_retenidos": int(bloques),
+    }
+
+
+def Ejecutar(tamanos=TAMANOS, tipos=TIPOS, funciones=FUNCIONES, repeticiones: int = 3,
+             max_segundos: float = 30.0, informar=None) -> dict:
+    """
+    Corre el banco completo y devuelve el documento JSON (dict).
+
+    Si una función tarda más de max_segundos en un tamaño, se omiten los tamaños
+    mayores para esa función y tipo (se registran con "omitido": true).
+    """
+    resultados = []
+    lentas = set()
+    for tamano in sorted(tamanos):
+        for tipo in tipos:
+            img = ImagenSintetica(tamano, tipo, 0)
+            img2 = ImagenSintetica(tamano, tipo, 1)
+            for nombre in funciones:
+                registro = {"funcion": nombre, "tamano": tamano, "tipo": tipo}
+                if (nombre, tipo) in lentas:
+                    registro["omitido"] = True
+                else:
+                    medicion = Medir(getattr(imgControl, nombre),
+                                     _argumentos(nombre, img, img2), repeticiones)
+                    medicion["copias_imagen"] = medicion["memoria_pico_bytes"] / img.nbytes
+                    registro.update(medicion)
+                    if medicion["tiempo_s"] > max_segundos:
+                        lentas.add((nombre, tipo))
+                resultados.append(registro)
+                if informar is not None:
+                    informar(registro)
+            del img, img2
+    return {
+        "meta": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "plataforma": platform.platform(),
+            "nucleos": os.cpu_count(),
+            "repeticiones": repeticiones,
+        },
+        "resultados": resultados,
+    }
+
+
+def Comparar(actual: dict, base: dict, tolerancia: float = 0.2,
+             metricas=("tiempo_s", "memoria_pico_bytes", "asignaciones")) -> list:
+    """
+    Compara dos documentos y devuelve las regresiones.
+
+    Hay regresión cuando una métrica crece más de `tolerancia` (0.2 = 20 %)
+    respecto a la base para la misma (función, tamaño, tipo).
+    """
+    clave = lambda r: (r["funcion"], r["tamano"], r["tipo"])
+    previos = {clave(r): r for r in base["resultados"] if not r.get("omitido")}
+    regresiones = []
+    for r in actual["resultados"]:
+        anterior = previos.get(clave(r))
+        if anterior is None or r.get("omitido"):
+            continue
+        for metrica in metricas:
+            antes, ahora = anterior.get(metrica), r.get(metrica)
+            if antes is None or ahora is None:
+                continue
+            if antes == 0:
+                # p. ej. de 0 a 1 asignación: regresión aunque no haya relación finita
+                relacion = float("inf") if ahora > 0 else 1.0
+            else:
+                relacion = ahora / antes
+            if relacion > 1 + tolerancia:
+                regresiones.append({"funcion": r["funcion"], "tamano": r["tamano"],
+                                    "tipo": r["tipo"], "metrica": metrica,
+                                    "base": antes, "actual": ahora, "relacion": relacion})
+    return regresiones
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Banco de rendimiento de imgControl.")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=list(TAMANOS))
+    parser.add_argument("--tipos", nargs="+", default=list(TIPOS), choices=TIPOS)
+    parser.add_argument("--funciones", nargs="+", default=list(FUNCIONES), choices=FUNCIONES)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--max-segundos", type=float, default=30.0,
+                        help="Omitir tamaños mayores si una función supera este tiempo")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--comparar", help="JSON de línea base contra el que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="Crecimiento relativo permitido antes de marcar regresión")
+    args = parser.parse_args(argv)
+
+    def informar(r):
+        if r.get("omitido"):
+            print(f"{r['funcion']:<18} {r['tamano']:>5}² {r['tipo']:<8} omitido", file=sys.stderr)
+        else:
+            print(f"{r['funcion']:<18} {r['tamano']:>5}² {r['tipo']:<8} "
+                  f"{r['tiempo_s'] * 1000:10.2f} ms  {r['memoria_pico_bytes'] / 2**20:9.1f} MiB  "
+                  f"x{r['copias_imagen']:.2f}  {r['asignaciones']:4d} asignaciones", file=sys.stderr)
+
+    documento = Ejecutar(args.tamanos, args.tipos, args.funciones, args.repeticiones,
+                         args.max_segundos, informar)
+    texto = json.dumps(documento, indent=2)
+    if args.salida:
+        with open(args.salida, "w") as archivo:
+            archivo.write(texto)
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar) as archivo:
+            base = json.load(archivo)
+        regresiones = Comparar(documento, base, args.tolerancia)
+        for r in regresiones:
+            print(f"REGRESIÓN {r['funcion']} {r['tamano']}² {r['tipo']} {r['metrica']}: "
+                  f"{r['base']:.4g} -> {r['actual']:.4g} (x{r['relacion']:.2f})", file=sys.stderr)
+        return 1 if regresiones else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
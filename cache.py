@@ -0,0 +1,247 @@
+"""
+cache.py
+--------
+
+Caché de imágenes decodificadas (memoria LRU + disco opcional).
+
+abrir_imagen y abrir_imagen2 decodificaban el JPEG/PNG desde cero cada vez,
+aunque se alterne entre las mismas imágenes de referencia. CacheImagenes guarda
+los píxeles ya decodificados (uint8 RGB, de solo lectura) con clave
+ruta + fecha de modificación + tamaño, así que un archivo modificado nunca
+devuelve píxeles viejos:
+
+- En memoria: LRU acotada en bytes; reabrir una imagen reciente no copia nada.
+- En disco (opcional): un .npy por imagen que se abre con np.load(mmap_mode="r");
+  reabrir tras reiniciar el programa no decodifica y el sistema operativo lee
+  las páginas a medida que se usan. También acotado en bytes (se borran los
+  archivos usados hace más tiempo).
+
+Los contadores (Estadisticas) dicen cuántas aperturas se sirvieron desde memoria
+o disco, cuántas hubo que decodificar y cuántos bytes decodificados se ahorraron.
+
+Ejemplo
+-------
+    cache = CacheImagenes(presupuesto_bytes=1 << 30, directorio="~/.cache/procesamientoimg")
+    img = cache.Obtener("fondo.jpg")        # uint8 (h, w, 3), de solo lectura
+    img = cache.ObtenerBytes(cuerpo)        # imagen recibida en memoria (clave: sha256)
+    print(cache.Estadisticas())
+"""
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from PIL import Image
+
+# Presupuesto por defecto de la caché en memoria (bytes)
+PRESUPUESTO_DEFECTO = 1 << 30
+
+# Presupuesto por defecto de la caché en disco (bytes)
+PRESUPUESTO_DISCO_DEFECTO = 8 << 30
+
+
+def Decodificar(ruta: str) -> np.ndarray:
+    """Decodifica la imagen como RGB uint8 (sin caché)."""
+    with Image.open(ruta) as imgPIL:
+        return np.asarray(imgPIL.convert("RGB"))
+
+
+def Clave(ruta: str) -> tuple:
+    """(ruta absoluta, mtime_ns, tamaño): cambia si el archivo se modifica."""
+    ruta = os.path.abspath(ruta)
+    estado = os.stat(ruta)
+    return ruta, estado.st_mtime_ns, estado.st_size
+
+
+def DecodificarBytes(datos: bytes) -> np.ndarray:
+    """Decodifica una imagen codificada en memoria como RGB uint8 (sin caché)."""
+    with Image.open(io.BytesIO(datos)) as imgPIL:
+        return np.asarray(imgPIL.convert("RGB"))
+
+
+def ClaveBytes(datos: bytes) -> tuple:
+    """("sha256", hash del contenido, tamaño): la misma imagen da la misma clave."""
+    return "sha256", hashlib.sha256(datos).hexdigest(), len(datos)
+
+
+class CacheImagenes:
+    """
+    Imágenes decodificadas por clave de archivo, en memoria (LRU) y en disco.
+
+    Atributos
+    ---------
+    presupuesto_bytes : int
+        Máximo de bytes de píxeles en memoria.
+    directorio : str | None
+        Directorio de la caché en disco (None la desactiva).
+    presupuesto_disco : int
+        Máximo de bytes de la caché en disco.
+    decodificar : callable
+        decodificar(ruta) -> np.ndarray uint8; por defecto Decodificar.
+
+    Es segura entre hilos; dos aperturas simultáneas del mismo archivo pueden
+    decodificarlo dos veces, pero se guarda una sola copia.
+    """
+
+    def __init__(self, presupuesto_bytes: int = PRESUPUESTO_DEFECTO,
+                 directorio: str | None = None,
+                 presupuesto_disco: int = PRESUPUESTO_DISCO_DEFECTO, decodificar=Decodificar):
+        self.presupuesto_bytes = presupuesto_bytes
+        self.directorio = os.path.expanduser(directorio) if directorio else None
+        self.presupuesto_disco = presupuesto_disco
+        self.decodificar = decodificar
+        self._memoria = OrderedDict()  # clave -> arreglo (LRU)
+        self._lock = threading.Lock()
+        self.aciertos_memoria = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self.bytes_ahorrados = 0
+        if self.directorio:
+            os.makedirs(self.directorio, exist_ok=True)
+
+    # ---- Consulta ----
+
+    def Obtener(self, ruta: str) -> np.ndarray:
+        """
+        Píxeles decodificados de la imagen (uint8, de solo lectura): desde memoria,
+        desde disco (memmap) o decodificando el archivo, en ese orden.
+        """
+        return self._obtener(Clave(ruta), lambda: self.decodificar(ruta))
+
+    def ObtenerBytes(self, datos: bytes) -> np.ndarray:
+        """
+        Como Obtener, para una imagen codificada en memoria (p. ej. el cuerpo
+        de una petición HTTP), con el hash del contenido como clave.
+        """
+        return self._obtener(ClaveBytes(datos), lambda: DecodificarBytes(datos))
+
+    def _obtener(self, clave, decodificar) -> np.ndarray:
+        with self._lock:
+            img = self._memoria.get(clave)
+            if img is not None:
+                self._memoria.move_to_end(clave)
+                self.aciertos_memoria += 1
+                self.bytes_ahorrados += img.nbytes
+                return img
+
+        img = self._leer_disco(clave)
+        if img is not None:
+            with self._lock:
+                self.aciertos_disco += 1
+                self.bytes_ahorrados += img.nbytes
+        else:
+            img = np.asarray(decodificar())
+            img.flags.writeable = False
+            self._escribir_disco(clave, img)
+            with self._lock:
+                self.fallos += 1
+        self._guardar(clave, img)
+        return img
+
+    def Contiene(self, ruta: str) -> bool:
+        """True si la imagen está en memoria o en disco (no cuenta como acceso)."""
+        clave = Clave(ruta)
+        with self._lock:
+            if clave in self._memoria:
+                return True
+        archivo = self._archivo(clave)
+        return archivo is not None and os.path.exists(archivo)
+
+    # ---- Memoria ----
+
+    @property
+    def bytes_usados(self) -> int:
+        return sum(img.nbytes for img in self._memoria.values())
+
+    def _guardar(self, clave, img):
+        if img.nbytes > self.presupuesto_bytes:
+            return
+        with self._lock:
+            self._memoria[clave] = img
+            self._memoria.move_to_end(clave)
+            exceso = self.bytes_usados - self.presupuesto_bytes
+            while exceso > 0:
+                _, viejo = self._memoria.popitem(last=False)
+                exceso -= viejo.nbytes
+
+    def Vaciar(self, disco: bool = False):
+        """Vacía la caché en memoria (y la de disco si disco es True)."""
+        with self._lock:
+            self._memoria.clear()
+        if disco and self.directorio:
+            for nombre in os.listdir(self.directorio):
+                if nombre.endswith(".npy"):
+                    os.remove(os.path.join(self.directorio, nombre))
+
+    # ---- Disco ----
+
+    def _archivo(self, clave):
+        if not self.directorio:
+            return None
+        nombre = hashlib.sha1(repr(clave).encode()).hexdigest()
+        return os.path.join(self.directorio, nombre + ".npy")
+
+    def _leer_disco(self, clave):
+        archivo = self._archivo(clave)
+        if archivo is None:
+            return None
+        try:
+            img = np.load(archivo, mmap_mode="r")
+        except (OSError, ValueError):
+            return None  # no está o quedó a medio escribir
+        os.utime(archivo)  # marca de uso para el LRU del disco
+        return img
+
+    def _escribir_disco(self, clave, img):
+        archivo = self._archivo(clave)
+        if archivo is None or img.nbytes > self.presupuesto_disco:
+            return
+        temporal = f"{archivo}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporal, "wb") as f:
+                np.save(f, img)
+            os.replace(temporal, archivo)  # atómico: nunca se lee un .npy a medias
+        except OSError:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            return
+        self._ajustar_disco()
+
+    def _ajustar_disco(self):
+        """Borra los .npy usados hace más tiempo hasta respetar presupuesto_disco."""
+        archivos = []
+        for nombre in os.listdir(self.directorio):
+            if nombre.endswith(".npy"):
+                ruta = os.path.join(self.directorio, nombre)
+                try:
+                    estado = os.stat(ruta)
+                except OSError:
+                    continue
+                archivos.append((estado.st_mtime, estado.st_size, ruta))
+        exceso = sum(a[1] for a in archivos) - self.presupuesto_disco
+        for _, tam, ruta in sorted(archivos):
+            if exceso <= 0:
+                break
+            try:
+                os.remove(ruta)  # en Linux los memmap abiertos siguen siendo válidos
+            except OSError:
+                continue
+            exceso -= tam
+
+    # ---- Contadores ----
+
+    def Estadisticas(self) -> dict:
+        """Aciertos (memoria/disco), fallos, bytes ahorrados y uso de memoria."""
+        with self._lock:
+            accesos = self.aciertos_memoria + self.aciertos_disco + self.fallos
+            return {
+                "aciertos_memoria": self.aciertos_memoria,
+                "aciertos_disco": self.aciertos_disco,
+                "fallos": self.fallos,
+                "tasa_aciertos": (accesos - self.fallos) / accesos if accesos else 0.0,
+                "bytes_ahorrados": self.bytes_ahorrados,
+                "bytes_memoria": self.bytes_usados,
+                "imagenes_memoria": len(self._memoria),
+            }
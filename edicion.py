@@ -0,0 +1,275 @@
+"""
+edicion.py
+----------
+
+Edición sobre una vista reducida (proxy) con reproducción a resolución completa.
+
+Con imágenes de decenas de megapíxeles, cada "Aplicar" de la interfaz procesaba
+la imagen completa para luego reducirla al mostrarla. Edicion mantiene una
+copia del tamaño de la pantalla (según el zoom), aplica allí cada operación y
+registra la cadena de pasos. La imagen completa solo se calcula al consolidar
+(al guardar o a pedido), reproduciendo la cadena por el camino más rápido:
+
+- Los pasos puntuales consecutivos (brillo, canales, contraste, negativo) se
+  fusionan en un único Pipeline, es decir, una sola pasada por la imagen.
+- Los pasos geométricos consecutivos (rotaciones...) se componen en una sola
+  Geometria: una matriz afín y un único remuestreo, sin intermedios.
+- Cada tramo se reparte entre los núcleos con EjecutorMosaicos.
+
+Así la latencia interactiva depende del tamaño de la pantalla y no del de la
+imagen original.
+
+Ejemplo
+-------
+    edicion = Edicion(img, 1280, 720)
+    paso = Paso("Brillo", cadena=Pipeline().SumarBrillo(0.1).Clip())
+    edicion.Agregar(paso, paso.Aplicar(edicion.proxy, edicion.escala))
+    completa = edicion.Consolidar(ejecutor)
+"""
+
+import math
+import numpy as np
+import imgControl
+from pipeline import Pipeline
+from geometria import Geometria
+
+# Píxeles máximos de la vista reducida (~4K); acota la latencia con zoom alto
+PIXELES_MAX_PROXY = 3840 * 2160
+
+
+class Paso:
+    """
+    Un paso de edición reproducible a cualquier escala.
+
+    Atributos
+    ---------
+    nombre : str
+        Nombre para mostrar.
+    funcion : callable | None
+        funcion(img, progreso, cancelar) -> img, o funcion(img, escala, progreso,
+        cancelar) si escalable es True (pasos que usan medidas en píxeles, como
+        la fusión con una segunda imagen).
+    cadena : Pipeline | None
+        Para pasos puntuales: la cadena equivalente. Se usa en lugar de funcion
+        y permite fusionar pasos consecutivos al reproducir.
+    escalable : bool
+        Si funcion recibe la escala (tamaño del proxy / tamaño completo).
+    geometria : Geometria | None
+        Para pasos geométricos: la cadena equivalente (en píxeles de tamaño
+        completo). Se usa en lugar de funcion y permite componer pasos
+        consecutivos en un solo remuestreo.
+    """
+
+    def __init__(self, nombre: str, funcion=None, cadena: Pipeline | None = None,
+                 escalable: bool = False, geometria: Geometria | None = None):
+        if funcion is None and cadena is None and geometria is None:
+            raise ValueError("Un paso necesita una función, una cadena o una geometría")
+        self.nombre = nombre
+        self.funcion = funcion
+        self.cadena = cadena
+        self.escalable = escalable
+        self.geometria = geometria
+
+    def Aplicar(self, img: np.ndarray, escala: float = 1.0, ejecutor=None,
+                progreso=None, cancelar=None) -> np.ndarray:
+        """Aplica el paso a img (proxy o completa) y devuelve el resultado."""
+        if self.cadena is not None:
+            return _aplicar_cadena(self.cadena, img, ejecutor, progreso, cancelar)
+        if self.geometria is not None:
+            if ejecutor is not None:
+                return ejecutor.Aplicar(self.geometria, img, escala, progreso=progreso,
+                                        cancelar=cancelar)
+            resultado = self.geometria.Evaluar(img, escala)
+            if progreso is not None:
+                progreso(1, 1)
+            return resultado
+        if progreso is None:
+            progreso = _sin_progreso
+        if self.escalable:
+            return self.funcion(img, escala, progreso, cancelar)
+        return self.funcion(img, progreso, cancelar)
+
+    def __repr__(self):
+        return f"Paso({self.nombre})"
+
+
+def _sin_progreso(hechas, total):
+    pass
+
+
+def _aplicar_cadena(cadena, img, ejecutor, progreso, cancelar):
+    if ejecutor is not None:
+        return ejecutor.Aplicar(cadena, img, progreso=progreso, cancelar=cancelar)
+    resultado = cadena.Evaluar(img)
+    if progreso is not None:
+        progreso(1, 1)
+    return resultado
+
+
+def Fusionar(pasos) -> list:
+    """
+    Agrupa los pasos en tramos ejecutables: los pasos puntuales consecutivos se
+    unen en un único Paso con un Pipeline (una sola pasada por la imagen), y los
+    geométricos consecutivos en uno con una Geometria (un solo remuestreo).
+    """
+    tramos = []
+    for paso in pasos:
+        anterior = tramos[-1] if tramos else None
+        nombre = f"{anterior.nombre} + {paso.nombre}" if anterior else paso.nombre
+        if paso.cadena is not None and anterior and anterior.cadena is not None:
+            unida = Pipeline()
+            unida.operaciones = anterior.cadena.operaciones + paso.cadena.operaciones
+            tramos[-1] = Paso(nombre, cadena=unida)
+        elif paso.geometria is not None and anterior and anterior.geometria is not None:
+            tramos[-1] = Paso(nombre, geometria=anterior.geometria.Seguir(paso.geometria))
+        else:
+            tramos.append(paso)
+    return tramos
+
+
+def Reproducir(img: np.ndarray, pasos, escala: float = 1.0, ejecutor=None,
+               progreso=None, cancelar=None) -> np.ndarray:
+    """
+    Aplica la cadena de pasos a img.
+
+    progreso(hechas, total) cubre toda la cadena (cada tramo vale lo mismo).
+    """
+    tramos = Fusionar(pasos)
+    for i, tramo in enumerate(tramos):
+        parcial = None
+        if progreso is not None:
+            def parcial(hechas, total, i=i):
+                progreso(i * total + hechas, len(tramos) * total)
+        img = tramo.Aplicar(img, escala, ejecutor, parcial, cancelar)
+    return img
+
+
+class Edicion:
+    """
+    Imagen completa + vista reducida editable + cadena de pasos pendientes.
+
+    Atributos
+    ---------
+    base : np.ndarray
+        Imagen a resolución completa sobre la que se reproducen los pasos.
+    pasos : list[Paso]
+        Pasos aplicados al proxy que aún no se calcularon a resolución completa.
+    proxy : np.ndarray
+        Vista reducida con todos los pasos aplicados (lo que se muestra).
+    deshechos : list[Paso]
+        Pasos pendientes deshechos que se pueden rehacer.
+    escala : float
+        Tamaño del proxy / tamaño de base (1.0 si la imagen ya cabe en la vista).
+    ampliacion : float
+        Zoom con el que hay que mostrar el proxy para verlo a ajuste * zoom.
+    vista : tuple
+        (ancho, alto, zoom) con que se calculó el proxy.
+
+    Los métodos Calcular*/Anterior/Siguiente solo calculan; AdoptarVista, Agregar,
+    Deshacer, Rehacer y Rebasar modifican la edición (la interfaz los llama en el
+    hilo trabajador al confirmar cada trabajo).
+    """
+
+    def __init__(self, base: np.ndarray, ancho_vista: int, alto_vista: int,
+                 zoom: float = 1.0, pasos=None):
+        self.base = base
+        self.pasos = list(pasos or [])
+        self.deshechos = []
+        self._proxy_base = None
+        self.escala = None
+        self.AdoptarVista(self.CalcularVista(ancho_vista, alto_vista, zoom))
+
+    @staticmethod
+    def EscalaProxy(forma, ancho_vista: int, alto_vista: int, zoom: float = 1.0):
+        """
+        Devuelve (escala, ampliacion) para mostrar una imagen de forma (h, w, ...)
+        ajustada a la vista y multiplicada por zoom.
+        """
+        h, w = forma[:2]
+        ajuste = min(ancho_vista / w, alto_vista / h)
+        escala = min(1.0, ajuste * zoom, math.sqrt(PIXELES_MAX_PROXY / (h * w)))
+        return escala, ajuste * zoom / escala
+
+    def _base_proxy(self) -> np.ndarray:
+        # Base reducida a la escala actual (se recalcula tras Rebasar)
+        if self._proxy_base is None:
+            self._proxy_base = self._reducir(self.base, self.escala)
+        return self._proxy_base
+
+    @staticmethod
+    def _reducir(img, escala):
+        return imgControl.ReducirResolucion(img, 1 / escala) if escala < 1.0 else img
+
+    def CalcularVista(self, ancho_vista: int, alto_vista: int, zoom: float = 1.0,
+                      base: np.ndarray | None = None) -> dict:
+        """
+        Calcula, sin modificar la edición, el proxy para otro tamaño de vista, zoom
+        o imagen base (reproduce los pasos pendientes). Se adopta con AdoptarVista.
+        """
+        base = self.base if base is None else base
+        escala, ampliacion = self.EscalaProxy(base.shape, ancho_vista, alto_vista, zoom)
+        if base is self.base and escala == self.escala:
+            proxy_base = self._base_proxy()
+        else:
+            proxy_base = self._reducir(base, escala)
+        return {"vista": (ancho_vista, alto_vista, zoom), "base": base, "escala": escala,
+                "ampliacion": ampliacion, "proxy_base": proxy_base,
+                "proxy": Reproducir(proxy_base, self.pasos, escala)}
+
+    def AdoptarVista(self, vista: dict):
+        """Adopta una vista calculada con CalcularVista."""
+        self.vista = vista["vista"]
+        self.base = vista["base"]
+        self.escala = vista["escala"]
+        self.ampliacion = vista["ampliacion"]
+        self._proxy_base = vista["proxy_base"]
+        self.proxy = vista["proxy"]
+
+    def Redimensionar(self, ancho_vista: int, alto_vista: int, zoom: float = 1.0):
+        """Recalcula el proxy para un nuevo tamaño de vista o zoom (reproduce los pasos)."""
+        self.AdoptarVista(self.CalcularVista(ancho_vista, alto_vista, zoom))
+
+    def Agregar(self, paso: Paso, proxy: np.ndarray):
+        """Registra un paso ya aplicado al proxy (proxy es el resultado); descarta lo deshecho."""
+        self.pasos.append(paso)
+        self.deshechos.clear()
+        self.proxy = proxy
+
+    # ---- Deshacer/rehacer de pasos pendientes (recalculo desde la base reducida) ----
+
+    def Anterior(self) -> np.ndarray:
+        """Proxy sin el último paso pendiente (no modifica la edición; ver Deshacer)."""
+        return Reproducir(self._base_proxy(), self.pasos[:-1], self.escala)
+
+    def Deshacer(self, proxy: np.ndarray):
+        """Confirma Anterior: el último paso pasa a la lista de deshechos."""
+        self.deshechos.append(self.pasos.pop())
+        self.proxy = proxy
+
+    def Siguiente(self, ejecutor=None) -> np.ndarray:
+        """Proxy con el último paso deshecho vuelto a aplicar (ver Rehacer)."""
+        return self.deshechos[-1].Aplicar(self.proxy, self.escala, ejecutor)
+
+    def Rehacer(self, proxy: np.ndarray):
+        """Confirma Siguiente."""
+        self.pasos.append(self.deshechos.pop())
+        self.proxy = proxy
+
+    def Consolidar(self, ejecutor=None, progreso=None, cancelar=None, pasos=None) -> np.ndarray:
+        """
+        Reproduce los pasos (por defecto todos los pendientes) sobre la imagen
+        completa y devuelve el resultado. No modifica la edición; ver Rebasar.
+        """
+        pasos = self.pasos if pasos is None else pasos
+        return Reproducir(self.base, pasos, 1.0, ejecutor, progreso, cancelar)
+
+    def Rebasar(self, base: np.ndarray, aplicados: int | None = None):
+        """
+        Adopta base como nueva imagen completa tras consolidar los primeros
+        `aplicados` pasos (todos por defecto). Los pasos agregados mientras se
+        consolidaba siguen pendientes; el proxy actual no cambia.
+        """
+        aplicados = len(self.pasos) if aplicados is None else aplicados
+        self.base = base
+        self.pasos = self.pasos[aplicados:]
+        self._proxy_base = None
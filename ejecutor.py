@@ -0,0 +1,269 @@
+"""
+ejecutor.py
+-----------
+
+Ejecutor multinúcleo de operaciones de imgControl.
+
+Divide la imagen de salida en franjas de filas (o mosaicos cuadrados), calcula
+cada parte en un pool de hilos y las escribe directamente en el arreglo de
+salida. NumPy libera el GIL en casi todos sus kernels, así que los hilos
+escalan con los núcleos; para las partes que retienen el GIL se puede usar un
+pool de procesos que comparte la imagen y la salida por memoria compartida
+(multiprocessing.shared_memory), sin copiarlas a cada proceso.
+
+Cada parte se calcula con los descriptores de mosaicos.Describir, de modo que
+la rotación, el remuestreo, los filtros de vecindad (filtros.py) y las
+operaciones puntuales dan el mismo resultado que en serie. El histograma
+(imgControl.Histograma) se reduce sumando los conteos parciales.
+
+Ejemplo
+-------
+    with EjecutorMosaicos(trabajadores=8) as ejecutor:
+        rotada = ejecutor.Aplicar(imgControl.RotarImg, img, 30, interpolacion="bilineal")
+        print(ejecutor.Comparar(imgControl.RotarImg, img, 30))
+"""
+
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait
+from multiprocessing import shared_memory
+import numpy as np
+import imgControl
+import histograma
+import mosaicos
+from mosaicos import Cancelado
+from pipeline import Pipeline
+
+# Franjas por trabajador cuando no se fija tam_mosaico (balancea la carga)
+_FRANJAS_POR_TRABAJADOR = 4
+
+_ids_trabajo = itertools.count()
+
+
+class EjecutorMosaicos:
+    """
+    Pool de trabajadores que aplica una operación por partes y une el resultado.
+
+    Atributos
+    ---------
+    trabajadores : int
+        Número de hilos o procesos.
+    tam_mosaico : int | None
+        Lado de los mosaicos cuadrados; None usa franjas de filas completas.
+    usar_procesos : bool
+        True para usar procesos con memoria compartida en lugar de hilos.
+    ultimo : dict
+        Estadísticas de la última ejecución (partes, segundos, trabajadores).
+    """
+
+    def __init__(self, trabajadores: int | None = None, tam_mosaico: int | None = None,
+                 usar_procesos: bool = False):
+        self.trabajadores = trabajadores or os.cpu_count() or 1
+        self.tam_mosaico = tam_mosaico
+        self.usar_procesos = usar_procesos
+        self.ultimo = {}
+        if usar_procesos:
+            self._pool = ProcessPoolExecutor(max_workers=self.trabajadores)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.trabajadores)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.Cerrar()
+
+    def Cerrar(self):
+        """Libera el pool de trabajadores."""
+        self._pool.shutdown(wait=True)
+
+    def Partes(self, h: int, w: int):
+        """Lista de ventanas (yI, yF, xI, xF) en que se divide una salida h x w."""
+        if self.tam_mosaico is not None:
+            return [v[:4] for v in mosaicos.Recorrido(h, w, self.tam_mosaico)]
+        filas = max(1, math.ceil(h / (self.trabajadores * _FRANJAS_POR_TRABAJADOR)))
+        return [(yI, min(yI + filas, h), 0, w) for yI in range(0, h, filas)]
+
+    def Aplicar(self, operacion, img: np.ndarray, *args, progreso=None, cancelar=None,
+                **kwargs) -> np.ndarray:
+        """
+        Aplica operacion(img, *args, **kwargs) en paralelo.
+
+        Parámetros
+        ----------
+        operacion : callable | Pipeline
+            Función de imgControl o un Pipeline.
+        img : np.ndarray
+            Imagen de entrada (cualquier dtype que acepte la operación).
+        progreso : callable, opcional
+            progreso(hechas, total) después de cada parte terminada.
+        cancelar : threading.Event, opcional
+            Si se activa, las partes pendientes se descartan y se lanza Cancelado.
+
+        Retorna
+        -------
+        np.ndarray
+            El mismo resultado que la llamada en serie.
+        """
+        if operacion is imgControl.Histograma:
+            # No devuelve una imagen: se reduce sumando conteos, como en Comparar
+            hist = self.Histograma(img, *args, **kwargs).astype(np.float64)
+            return hist[0], hist[1], hist[2]
+        inicio = time.perf_counter()
+        descriptor = mosaicos.Describir(operacion, args, kwargs, img)
+        h, w = descriptor.forma[:2]
+        partes = self.Partes(h, w)
+        if self.usar_procesos:
+            salida = self._aplicar_procesos(operacion, args, kwargs, img, descriptor, partes,
+                                            progreso, cancelar)
+        else:
+            salida = np.empty(descriptor.forma, dtype=descriptor.dtype)
+
+            def calcular(parte):
+                if cancelar is not None and cancelar.is_set():
+                    return
+                yI, yF, xI, xF = parte
+                salida[yI:yF, xI:xF] = descriptor.calcular(img, np.arange(yI, yF), np.arange(xI, xF))
+
+            self._esperar([self._pool.submit(calcular, p) for p in partes], progreso, cancelar)
+        self.ultimo = {
+            "operacion": getattr(operacion, "__name__", repr(operacion)),
+            "partes": len(partes),
+            "trabajadores": self.trabajadores,
+            "procesos": self.usar_procesos,
+            "segundos": time.perf_counter() - inicio,
+        }
+        return salida
+
+    def _aplicar_procesos(self, operacion, args, kwargs, img, descriptor, partes, progreso,
+                          cancelar):
+        img = np.ascontiguousarray(img)
+        shm_fuente = shared_memory.SharedMemory(create=True, size=max(1, img.nbytes))
+        tam_salida = max(1, math.prod(descriptor.forma) * np.dtype(descriptor.dtype).itemsize)
+        shm_salida = shared_memory.SharedMemory(create=True, size=tam_salida)
+        fuente = None
+        try:
+            fuente = np.ndarray(img.shape, dtype=img.dtype, buffer=shm_fuente.buf)
+            fuente[...] = img
+            trabajo = (next(_ids_trabajo), os.getpid(),
+                       shm_fuente.name, img.shape, img.dtype.str,
+                       shm_salida.name, descriptor.forma, np.dtype(descriptor.dtype).str,
+                       operacion, args, kwargs)
+            self._esperar([self._pool.submit(_calcular_en_proceso, trabajo, p) for p in partes],
+                          progreso, cancelar)
+            salida = np.ndarray(descriptor.forma, dtype=descriptor.dtype, buffer=shm_salida.buf)
+            return salida.copy()
+        finally:
+            # Soltar la vista antes de cerrar: close() falla si quedan exportaciones
+            fuente = None
+            shm_fuente.close()
+            shm_fuente.unlink()
+            shm_salida.close()
+            shm_salida.unlink()
+
+    @staticmethod
+    def _esperar(futuros, progreso, cancelar=None):
+        for hechas, futuro in enumerate(as_completed(futuros), start=1):
+            futuro.result()  # propaga excepciones de los trabajadores
+            if cancelar is not None and cancelar.is_set():
+                for pendiente in futuros:
+                    pendiente.cancel()
+                wait(futuros)  # las partes en curso aún escriben en la salida
+                raise Cancelado()
+            if progreso is not None:
+                progreso(hechas, len(futuros))
+
+    def Mapear(self, funcion, elementos) -> list:
+        """Aplica funcion a cada elemento en el pool y devuelve los resultados en orden."""
+        return list(self._pool.map(funcion, elementos))
+
+    def Histograma(self, img: np.ndarray, bins: int = 256) -> np.ndarray:
+        """
+        Histograma por canal en paralelo: cada franja cuenta por su lado y los
+        conteos parciales se suman (reducción). Igual a histograma.HistogramaCanales.
+        """
+        inicio = time.perf_counter()
+        partes = self.Partes(img.shape[0], img.shape[1])
+        futuros = [self._pool.submit(histograma.HistogramaCanales, img[yI:yF, xI:xF], bins)
+                   for yI, yF, xI, xF in partes]
+        total = sum(f.result() for f in futuros)
+        self.ultimo = {
+            "operacion": "Histograma",
+            "partes": len(partes),
+            "trabajadores": self.trabajadores,
+            "procesos": self.usar_procesos,
+            "segundos": time.perf_counter() - inicio,
+        }
+        return total
+
+    def Comparar(self, operacion, img: np.ndarray, *args, repeticiones: int = 1, **kwargs) -> dict:
+        """
+        Mide la operación en serie (llamada directa) y en paralelo.
+
+        Retorna
+        -------
+        dict
+            serie_s, paralelo_s (mejor de `repeticiones`), aceleracion y eficiencia
+            (aceleración / trabajadores).
+        """
+        es_histograma = operacion is imgControl.Histograma
+
+        def serie():
+            if isinstance(operacion, Pipeline):
+                return operacion.Evaluar(img)
+            return operacion(img, *args, **kwargs)
+
+        def paralelo():
+            if es_histograma:
+                return self.Histograma(img, *args, **kwargs)
+            return self.Aplicar(operacion, img, *args, **kwargs)
+
+        t_serie = _mejor_tiempo(serie, repeticiones)
+        t_paralelo = _mejor_tiempo(paralelo, repeticiones)
+        aceleracion = t_serie / t_paralelo if t_paralelo > 0 else float("inf")
+        return {
+            "operacion": getattr(operacion, "__name__", repr(operacion)),
+            "trabajadores": self.trabajadores,
+            "procesos": self.usar_procesos,
+            "serie_s": t_serie,
+            "paralelo_s": t_paralelo,
+            "aceleracion": aceleracion,
+            "eficiencia": aceleracion / self.trabajadores,
+        }
+
+
+def _mejor_tiempo(funcion, repeticiones):
+    mejor = float("inf")
+    for _ in range(max(1, repeticiones)):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+# Estado de cada proceso trabajador: el último trabajo al que se conectó
+_ESTADO_PROCESO = {}
+
+
+def _calcular_en_proceso(trabajo, parte):
+    """Calcula una parte dentro de un proceso del pool (memoria compartida)."""
+    (id_trabajo, pid_padre, nombre_fuente, forma_fuente, dtype_fuente,
+     nombre_salida, forma_salida, dtype_salida, operacion, args, kwargs) = trabajo
+    clave = (pid_padre, id_trabajo)
+    if _ESTADO_PROCESO.get("clave") != clave:
+        for shm in _ESTADO_PROCESO.get("memorias", ()):
+            shm.close()
+        _ESTADO_PROCESO.clear()
+        shm_fuente = shared_memory.SharedMemory(name=nombre_fuente)
+        shm_salida = shared_memory.SharedMemory(name=nombre_salida)
+        fuente = np.ndarray(forma_fuente, dtype=dtype_fuente, buffer=shm_fuente.buf)
+        salida = np.ndarray(forma_salida, dtype=dtype_salida, buffer=shm_salida.buf)
+        _ESTADO_PROCESO.update(clave=clave, memorias=(shm_fuente, shm_salida), fuente=fuente,
+                               salida=salida,
+                               descriptor=mosaicos.Describir(operacion, args, kwargs, fuente))
+    yI, yF, xI, xF = parte
+    fuente = _ESTADO_PROCESO["fuente"]
+    _ESTADO_PROCESO["salida"][yI:yF, xI:xF] = _ESTADO_PROCESO["descriptor"].calcular(
+        fuente, np.arange(yI, yF), np.arange(xI, xF))
@@ -0,0 +1,348 @@
+"""
+filtros.py
+----------
+
+Filtros espaciales: caja, gaussiano, enfoque (máscara de desenfoque), Sobel y
+mediana, más la convolución general en la que se apoyan.
+
+- Núcleos separables (caja, gaussiano, Sobel): dos pasadas 1D (filas y
+  columnas) en lugar de una 2D: 2K operaciones por píxel en lugar de K^2.
+- Caja: sumas acumuladas (running sum) a lo largo de cada eje; el costo no
+  depende del radio.
+- Núcleos grandes: cuando un núcleo 1D supera UMBRAL_FFT coeficientes la
+  pasada se hace con FFT (np.fft.rfft), cuyo costo crece como log(n) y no
+  con el tamaño del núcleo. Convolucion hace lo mismo con núcleos 2D (y si el
+  núcleo es separable, rango 1, lo descompone en dos pasadas).
+- Cada pasada recorre la imagen por franjas, así los temporales (borde
+  reflejado, sumas, espectros) quedan acotados.
+
+Convenciones
+------------
+- Entradas (h,w,c) o (h,w), float [0,1] (la representación de la interfaz) o
+  uint8; el resultado tiene el mismo dtype (uint8 se redondea y recorta).
+  Se calcula en float32, o en float64 si la entrada es float64.
+- Bordes: reflexión simétrica (el píxel del borde se repite).
+- Los núcleos se aplican como correlación (no se invierten), como en la
+  mayoría de las librerías de imagen.
+- out=: arreglo de salida (forma y dtype del resultado) para no asignar uno nuevo.
+- Cada filtro tiene un atributo halo(...) con los píxeles de vecindad que
+  necesita; mosaicos.Describir lo usa para calcularlo por partes (en paralelo
+  con EjecutorMosaicos o de disco a disco con ProcesarMosaicos) con el mismo
+  resultado que sobre la imagen completa.
+
+Ejemplo
+-------
+    suave = Gaussiano(img, sigma=2.0)
+    nitida = Enfocar(img, sigma=1.5, cantidad=0.8)
+    bordes = Sobel(img)
+    ejecutor.Aplicar(Gaussiano, img, 8.0)      # por franjas, en paralelo
+"""
+
+import math
+import numpy as np
+
+# Coeficientes a partir de los cuales una pasada 1D usa FFT
+UMBRAL_FFT = 31
+
+# Coeficientes (alto*ancho) a partir de los cuales una convolución 2D usa FFT
+UMBRAL_FFT_2D = 121
+
+# Bytes aproximados de cada franja de trabajo
+_BYTES_FRANJA = 8 << 20
+
+
+# =============== Utilidades ===============
+
+def _tipo(img):
+    return np.float64 if img.dtype == np.float64 else np.float32
+
+
+def _finalizar(resultado, img, out, recortar=False):
+    """Lleva el resultado (float) al dtype de img, en out si se indicó."""
+    if out is None:
+        out = np.empty(resultado.shape, dtype=img.dtype if img.dtype != np.bool_ else np.float64)
+    if out.dtype == np.uint8:
+        np.rint(resultado, out=resultado)
+        np.clip(resultado, 0, 255, out=resultado)
+    elif recortar:
+        np.clip(resultado, 0, 1, out=resultado)
+    out[...] = resultado
+    return out
+
+
+def _maximo(img):
+    return 255.0 if img.dtype == np.uint8 else 1.0
+
+
+def _franjas(n, por_unidad):
+    """Cortes [(i0, i1)] de n unidades (filas o columnas) de ~_BYTES_FRANJA bytes cada uno."""
+    paso = max(1, _BYTES_FRANJA // max(1, por_unidad))
+    return [(i, min(i + paso, n)) for i in range(0, n, paso)]
+
+
+def _corte(eje, ndim, inicio, fin):
+    return tuple(slice(inicio, fin) if i == eje else slice(None) for i in range(ndim))
+
+
+def _longitud_rapida(n):
+    """Menor longitud >= n de la forma 2^a 3^b 5^c (FFT rápida)."""
+    mejor = 1 << max(0, (n - 1).bit_length())
+    p5 = 1
+    while p5 < mejor:
+        p35 = p5
+        while p35 < mejor:
+            p = p35
+            while p < n:
+                p *= 2
+            mejor = min(mejor, p)
+            p35 *= 3
+        p5 *= 5
+    return mejor
+
+
+def _reflejar(datos, eje, antes, despues):
+    pad = [(0, 0)] * datos.ndim
+    pad[eje] = (antes, despues)
+    return np.pad(datos, pad, mode="symmetric")
+
+
+# =============== Pasadas 1D ===============
+
+def _pasada(datos, nucleo, eje, salida):
+    """
+    Correlación 1D de datos (float) con nucleo a lo largo de eje (0 filas, 1
+    columnas), con borde reflejado. Escribe en salida (puede ser datos).
+    """
+    nucleo = np.asarray(nucleo, dtype=datos.dtype)
+    otro = 1 - eje
+    por_unidad = datos.nbytes // max(1, datos.shape[otro]) * 4
+    for i0, i1 in _franjas(datos.shape[otro], por_unidad):
+        corte = _corte(otro, datos.ndim, i0, i1)
+        if nucleo.size > UMBRAL_FFT:
+            salida[corte] = _pasada_fft(datos[corte], nucleo, eje)
+        else:
+            salida[corte] = _pasada_directa(datos[corte], nucleo, eje)
+    return salida
+
+
+def _pasada_directa(bloque, nucleo, eje):
+    k = nucleo.size
+    r = k // 2
+    n = bloque.shape[eje]
+    p = _reflejar(bloque, eje, r, k - 1 - r)
+    resultado = p[_corte(eje, p.ndim, 0, n)] * nucleo[0]
+    temporal = np.empty_like(resultado)
+    for t in range(1, k):
+        if nucleo[t] == 0:
+            continue
+        np.multiply(p[_corte(eje, p.ndim, t, t + n)], nucleo[t], out=temporal)
+        resultado += temporal
+    return resultado
+
+
+def _pasada_fft(bloque, nucleo, eje):
+    k = nucleo.size
+    r = k // 2
+    n = bloque.shape[eje]
+    p = _reflejar(bloque, eje, r, k - 1 - r)
+    m = _longitud_rapida(p.shape[eje] + k - 1)
+    forma = [1] * p.ndim
+    forma[eje] = m // 2 + 1
+    espectro = np.fft.rfft(nucleo[::-1], m).reshape(forma)
+    completa = np.fft.irfft(np.fft.rfft(p, m, axis=eje) * espectro, m, axis=eje)
+    return completa[_corte(eje, p.ndim, k - 1, k - 1 + n)].astype(bloque.dtype, copy=False)
+
+
+def _caja_eje(datos, radio, eje, salida):
+    """Promedio móvil de 2*radio+1 a lo largo de eje con sumas acumuladas (O(1) por píxel)."""
+    k = 2 * radio + 1
+    otro = 1 - eje
+    n = datos.shape[eje]
+    por_unidad = datos.nbytes // max(1, datos.shape[otro]) * 6
+    for i0, i1 in _franjas(datos.shape[otro], por_unidad):
+        corte = _corte(otro, datos.ndim, i0, i1)
+        p = _reflejar(datos[corte], eje, radio + 1, radio)
+        acumulada = np.cumsum(p, axis=eje, dtype=np.float64)
+        ventana = acumulada[_corte(eje, p.ndim, k, k + n)] - acumulada[_corte(eje, p.ndim, 0, n)]
+        ventana /= k
+        salida[corte] = ventana
+    return salida
+
+
+# =============== Núcleos ===============
+
+def RadioGaussiano(sigma: float) -> int:
+    """Radio del núcleo gaussiano truncado a 3 sigma."""
+    return max(1, int(math.ceil(3 * sigma)))
+
+
+def NucleoGaussiano(sigma: float) -> np.ndarray:
+    """Núcleo gaussiano 1D normalizado (suma 1) de 2*RadioGaussiano(sigma)+1 coeficientes."""
+    r = RadioGaussiano(sigma)
+    x = np.arange(-r, r + 1, dtype=np.float64)
+    nucleo = np.exp(-0.5 * (x / sigma) ** 2)
+    return nucleo / nucleo.sum()
+
+
+# =============== Filtros ===============
+
+def ConvolucionSeparable(img: np.ndarray, nucleo_filas, nucleo_columnas, out=None) -> np.ndarray:
+    """
+    Correlación con el núcleo separable nucleo_filas (vertical) x nucleo_columnas
+    (horizontal): dos pasadas 1D, cada una directa o por FFT según su tamaño.
+    """
+    datos = img.astype(_tipo(img))
+    _pasada(datos, nucleo_filas, 0, datos)
+    _pasada(datos, nucleo_columnas, 1, datos)
+    return _finalizar(datos, img, out)
+
+
+ConvolucionSeparable.halo = lambda nucleo_filas, nucleo_columnas, **_: max(
+    len(nucleo_filas), len(nucleo_columnas)) // 2
+
+
+def Convolucion(img: np.ndarray, nucleo: np.ndarray, out=None) -> np.ndarray:
+    """
+    Correlación con un núcleo 2D (alto y ancho impares).
+
+    - Núcleo de rango 1 (separable): dos pasadas 1D.
+    - Núcleo chico: suma directa de desplazamientos.
+    - Núcleo grande (más de UMBRAL_FFT_2D coeficientes): FFT 2D por franjas.
+    """
+    nucleo = np.asarray(nucleo, dtype=np.float64)
+    kh, kw = nucleo.shape
+    u, s, vt = np.linalg.svd(nucleo)
+    if s.size == 1 or s[1] <= 1e-10 * s[0]:
+        escala = math.sqrt(s[0])
+        return ConvolucionSeparable(img, u[:, 0] * escala, vt[0] * escala, out)
+
+    tipo = _tipo(img)
+    datos = img.astype(tipo, copy=False)
+    h, w = datos.shape[:2]
+    rh, rw = kh // 2, kw // 2
+    resultado = np.empty(datos.shape, dtype=tipo)
+    por_fila = datos[0].nbytes * max(4, kw)
+    usar_fft = nucleo.size > UMBRAL_FFT_2D
+    for y0, y1 in _franjas(h, por_fila):
+        # Franja con halo de filas (de la imagen o reflejado en los bordes)
+        a, b = max(0, y0 - rh), min(h, y1 + kh - 1 - rh)
+        bloque = _reflejar(datos[a:b], 0, rh - (y0 - a), (kh - 1 - rh) - (b - y1))
+        bloque = _reflejar(bloque, 1, rw, kw - 1 - rw)
+        if usar_fft:
+            mh = _longitud_rapida(bloque.shape[0] + kh - 1)
+            mw = _longitud_rapida(bloque.shape[1] + kw - 1)
+            espectro = np.fft.rfft2(nucleo[::-1, ::-1], (mh, mw))
+            if bloque.ndim == 3:
+                espectro = espectro[:, :, None]
+            completa = np.fft.irfft2(np.fft.rfft2(bloque, (mh, mw), axes=(0, 1)) * espectro,
+                                     (mh, mw), axes=(0, 1))
+            resultado[y0:y1] = completa[kh - 1:kh - 1 + (y1 - y0), kw - 1:kw - 1 + w]
+        else:
+            suma = np.zeros((y1 - y0,) + datos.shape[1:], dtype=tipo)
+            for i in range(kh):
+                for j in range(kw):
+                    if nucleo[i, j] != 0:
+                        suma += bloque[i:i + y1 - y0, j:j + w] * tipo(nucleo[i, j])
+            resultado[y0:y1] = suma
+    return _finalizar(resultado, img, out)
+
+
+Convolucion.halo = lambda nucleo, **_: max(np.shape(nucleo)) // 2
+
+
+def Caja(img: np.ndarray, radio: int, out=None) -> np.ndarray:
+    """Promedio en una ventana de (2*radio+1)^2 píxeles; el costo no depende del radio."""
+    radio = max(0, int(radio))
+    datos = img.astype(_tipo(img))
+    if radio > 0:
+        _caja_eje(datos, radio, 0, datos)
+        _caja_eje(datos, radio, 1, datos)
+    return _finalizar(datos, img, out)
+
+
+Caja.halo = lambda radio, **_: max(0, int(radio))
+
+
+def Gaussiano(img: np.ndarray, sigma: float, out=None) -> np.ndarray:
+    """Desenfoque gaussiano separable (FFT automática para sigma grande)."""
+    if sigma <= 0:
+        return _finalizar(img.astype(_tipo(img)), img, out)
+    nucleo = NucleoGaussiano(sigma)
+    return ConvolucionSeparable(img, nucleo, nucleo, out)
+
+
+Gaussiano.halo = lambda sigma, **_: RadioGaussiano(sigma) if sigma > 0 else 0
+
+
+def Enfocar(img: np.ndarray, sigma: float = 1.0, cantidad: float = 1.0, out=None) -> np.ndarray:
+    """
+    Máscara de desenfoque (unsharp mask): img + cantidad * (img - Gaussiano(img)),
+    recortada al rango de la imagen.
+    """
+    tipo = _tipo(img)
+    suave = np.empty(img.shape, dtype=tipo)
+    Gaussiano(img.astype(tipo, copy=False), sigma, out=suave)
+    resultado = img.astype(tipo)
+    resultado *= tipo(1 + cantidad)
+    suave *= tipo(cantidad)
+    resultado -= suave
+    if img.dtype != np.uint8:
+        return _finalizar(resultado, img, out, recortar=True)
+    return _finalizar(resultado, img, out)
+
+
+Enfocar.halo = lambda sigma=1.0, **_: RadioGaussiano(sigma) if sigma > 0 else 0
+
+
+def Sobel(img: np.ndarray, out=None, componentes: bool = False):
+    """
+    Magnitud del gradiente de Sobel por canal, escalada para que un escalón
+    completo (de 0 a 1, o de 0 a 255) valga 1 (255); recortada al rango.
+
+    componentes=True devuelve (gx, gy) en float sin escalar ni recortar.
+    """
+    datos = img.astype(_tipo(img))
+    suavizado = np.array([1.0, 2.0, 1.0])
+    derivada = np.array([-1.0, 0.0, 1.0])
+    gx = _pasada(_pasada(datos, suavizado, 0, np.empty_like(datos)), derivada, 1,
+                 np.empty_like(datos))
+    gy = _pasada(_pasada(datos, derivada, 0, datos), suavizado, 1, datos)
+    if componentes:
+        return gx, gy
+    magnitud = np.hypot(gx, gy, out=gx)
+    magnitud *= 0.25
+    if img.dtype != np.uint8:
+        np.clip(magnitud, 0, _maximo(img), out=magnitud)
+    return _finalizar(magnitud, img, out)
+
+
+Sobel.halo = lambda **_: 1
+
+
+def Mediana(img: np.ndarray, radio: int = 1, out=None) -> np.ndarray:
+    """
+    Mediana en una ventana de (2*radio+1)^2 píxeles (quita ruido impulsivo sin
+    borronear bordes). No es separable: el costo crece con radio^2, así que
+    está pensada para radios chicos (1 a 5).
+    """
+    radio = max(0, int(radio))
+    if out is None:
+        out = np.empty(img.shape, dtype=img.dtype)
+    if radio == 0:
+        out[...] = img
+        return out
+    k = 2 * radio + 1
+    h, w = img.shape[:2]
+    por_fila = img[0].nbytes * k * k * 2
+    centro = k * k // 2
+    for y0, y1 in _franjas(h, por_fila):
+        a, b = max(0, y0 - radio), min(h, y1 + radio)
+        bloque = _reflejar(img[a:b], 0, radio - (y0 - a), radio - (b - y1))
+        bloque = _reflejar(bloque, 1, radio, radio)
+        ventanas = np.lib.stride_tricks.sliding_window_view(bloque, (k, k), axis=(0, 1))
+        ventanas = ventanas.reshape(ventanas.shape[:-2] + (k * k,))
+        out[y0:y1] = np.partition(ventanas, centro, axis=-1)[..., centro]
+    return out
+
+
+Mediana.halo = lambda radio=1, **_: max(0, int(radio))
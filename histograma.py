@@ -0,0 +1,141 @@
+"""
+histograma.py
+-------------
+
+Cálculo rápido de histogramas para imágenes RGB o en escala de grises.
+
+Todas las funciones trabajan en O(N) con una sola llamada a np.bincount:
+los tres canales se empaquetan en un único índice (valor + canal * bins),
+de modo que no hay bucles de Python sobre los píxeles.
+
+Entradas aceptadas
+------------------
+- uint8 en [0,255]: se usa directamente, sin pasar por float.
+- float en [0,1]: se cuantiza como int(valor * 255), igual que la versión
+  original de imgControl.Histograma.
+"""
+
+import numpy as np
+
+# Pesos de luminancia (los mismos que imgControl.Grises)
+PESOS_LUMA = (0.299, 0.587, 0.114)
+# Versión entera de los pesos (suman 256) para trabajar directamente en uint8
+_PESOS_LUMA_U8 = (77, 150, 29)
+
+
+def Cuantizar(img: np.ndarray) -> np.ndarray:
+    """
+    Lleva la imagen a niveles enteros 0..255 (uint8).
+
+    - uint8 se devuelve tal cual (sin copia).
+    - float/bool se interpreta en [0,1] y se trunca como int(v * 255).
+    """
+    if img.dtype == np.uint8:
+        return img
+    q = np.multiply(img, 255, dtype=np.float64)
+    np.clip(q, 0, 255, out=q)
+    return q.astype(np.uint8)
+
+
+def _niveles_a_bins(q: np.ndarray, bins: int) -> np.ndarray:
+    """Convierte niveles 0..255 al índice de bin (entero sin signo)."""
+    if bins == 256:
+        return q
+    if not 1 <= bins <= 256:
+        raise ValueError("bins debe estar entre 1 y 256")
+    return ((q.astype(np.uint16) * bins) >> 8).astype(np.uint16)
+
+
+def Luminancia(img: np.ndarray) -> np.ndarray:
+    """
+    Luminancia en niveles 0..255 (uint8).
+
+    Para entradas uint8 se usa aritmética entera (pesos 77/150/29 sobre 256);
+    para float se aplica la combinación 0.299/0.587/0.114 y se cuantiza.
+    """
+    if img.ndim == 2:
+        return Cuantizar(img)
+    if img.dtype == np.uint8:
+        r, g, b = _PESOS_LUMA_U8
+        y = img[:, :, 0].astype(np.uint16) * r
+        y += img[:, :, 1].astype(np.uint16) * g
+        y += img[:, :, 2].astype(np.uint16) * b
+        y += 128
+        y >>= 8
+        return y.astype(np.uint8)
+    r, g, b = PESOS_LUMA
+    y = img[:, :, 0] * r + img[:, :, 1] * g + img[:, :, 2] * b
+    return Cuantizar(y)
+
+
+def HistogramaCanales(img: np.ndarray, bins: int = 256) -> np.ndarray:
+    """
+    Histograma por canal en una sola pasada.
+
+    Parámetros
+    ----------
+    img : np.ndarray
+        Imagen (h,w,c) o (h,w), uint8 o float en [0,1].
+    bins : int
+        Número de bins (1..256). Por defecto un bin por nivel.
+
+    Retorna
+    -------
+    np.ndarray
+        Matriz (c, bins) de conteos int64 (c=1 para imágenes 2D).
+    """
+    idx = _niveles_a_bins(Cuantizar(img), bins)
+    if idx.ndim == 2:
+        return np.bincount(idx.ravel(), minlength=bins)[None, :]
+    canales = idx.shape[2]
+    # Índice empaquetado: nivel + canal * bins -> un único bincount
+    desplazamiento = (np.arange(canales, dtype=np.intp) * bins)
+    empaquetado = idx + desplazamiento
+    conteos = np.bincount(empaquetado.ravel(), minlength=canales * bins)
+    return conteos.reshape(canales, bins)
+
+
+def HistogramaLuminancia(img: np.ndarray, bins: int = 256) -> np.ndarray:
+    """Histograma (bins,) de la luminancia de la imagen."""
+    idx = _niveles_a_bins(Luminancia(img), bins)
+    return np.bincount(idx.ravel(), minlength=bins)
+
+
+def Acumulado(hist: np.ndarray, normalizar: bool = True) -> np.ndarray:
+    """
+    Histograma acumulado (CDF) a lo largo del último eje.
+
+    Si normalizar es True, cada fila termina en 1.0.
+    """
+    cdf = np.cumsum(hist, axis=-1, dtype=np.float64)
+    if normalizar:
+        total = cdf[..., -1:]
+        cdf = np.divide(cdf, total, out=np.zeros_like(cdf), where=total > 0)
+    return cdf
+
+
+def ActualizarRegion(hist: np.ndarray, anterior: np.ndarray, nueva: np.ndarray,
+                     luminancia: bool = False) -> np.ndarray:
+    """
+    Actualiza un histograma in-place cuando solo cambió una región de la imagen.
+
+    Parámetros
+    ----------
+    hist : np.ndarray
+        Histograma previo de la imagen completa (de HistogramaCanales o
+        HistogramaLuminancia). Se modifica in-place.
+    anterior, nueva : np.ndarray
+        Contenido de la región antes y después del cambio (misma forma).
+    luminancia : bool
+        True si hist es un histograma de luminancia.
+
+    Retorna
+    -------
+    np.ndarray
+        El mismo objeto hist, actualizado. El costo es O(tamaño de la región).
+    """
+    bins = hist.shape[-1]
+    calcular = HistogramaLuminancia if luminancia else HistogramaCanales
+    hist -= calcular(anterior, bins)
+    hist += calcular(nueva, bins)
+    return hist
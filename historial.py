@@ -0,0 +1,292 @@
+"""
+historial.py
+------------
+
+Historial de deshacer/rehacer con presupuesto de memoria.
+
+Guardar una copia float64 completa por paso agota la memoria enseguida
+(40 MP = 960 MiB por copia). Cada entrada guarda solo lo necesario para
+moverse entre el estado anterior y el siguiente:
+
+- "parametros": operaciones puntuales invertibles (negativo, brillo o ajuste
+  de canal que no llegaron a saturar). Se guarda la cadena inversa; 0 bytes de
+  imagen.
+- "delta": caja mínima con los píxeles que cambiaron; se guarda esa región
+  de la imagen anterior comprimida con zlib (un retoque local ocupa lo que su
+  caja, no la imagen entera). Si el paso cambia la forma de la imagen se
+  guarda la imagen anterior completa.
+- "recalculo": sin datos; para deshacer se parte del punto de control anterior
+  más cercano (o de la imagen base) y se reproducen los pasos.
+
+Rehacer siempre vuelve a aplicar el paso (`rehacer`), así que no necesita datos.
+
+Los puntos de control (copias completas de estados intermedios) se crean al
+recalcular y se descartan por LRU. Si el historial supera el presupuesto se
+descartan primero los puntos de control y luego los deltas más antiguos pasan
+a "recalculo". La imagen base (estado 0) siempre se conserva y no cuenta en el
+presupuesto.
+
+Uso
+---
+    historial = Historial(img, presupuesto_bytes=256 << 20)
+    entrada = historial.Preparar("Rotación", img, rotada, rehacer=lambda x: imgControl.RotarImg(x, 30))
+    historial.Registrar(entrada)
+    anterior = historial.Anterior(rotada); historial.Mover(-1)
+"""
+
+import zlib
+from collections import OrderedDict
+import numpy as np
+from pipeline import Pipeline
+
+# Presupuesto por defecto (bytes) para deltas y puntos de control
+PRESUPUESTO_DEFECTO = 512 << 20
+
+# Tamaño de cada bloque que se comprime por separado (en paralelo si hay pool)
+_BLOQUE_COMPRESION = 4 << 20
+
+_INVERTIBLES = ("Negativo", "SumarBrillo", "AjusteCanal")
+
+
+def Comprimir(datos: np.ndarray, mapear=map) -> list:
+    """Comprime los bytes de datos con zlib por bloques; mapear permite paralelizar."""
+    planos = np.ascontiguousarray(datos).reshape(-1).view(np.uint8)
+    bloques = [planos[i:i + _BLOQUE_COMPRESION] for i in range(0, planos.size, _BLOQUE_COMPRESION)]
+    return list(mapear(lambda bloque: zlib.compress(bloque, 1), bloques))
+
+
+def Descomprimir(bloques, forma, dtype) -> np.ndarray:
+    """Inverso de Comprimir: devuelve un arreglo nuevo con la forma y el tipo dados."""
+    crudo = b"".join(zlib.decompress(b) for b in bloques)
+    return np.frombuffer(crudo, dtype=dtype).reshape(forma).copy()
+
+
+def CajaCambios(antes: np.ndarray, despues: np.ndarray):
+    """(y0, y1, x0, x1) mínima que contiene todos los píxeles distintos, o None si son iguales."""
+    distintos = antes != despues
+    if distintos.ndim == 3:
+        distintos = distintos.any(axis=2)
+    filas = np.flatnonzero(distintos.any(axis=1))
+    if filas.size == 0:
+        return None
+    columnas = np.flatnonzero(distintos.any(axis=0))
+    return int(filas[0]), int(filas[-1]) + 1, int(columnas[0]), int(columnas[-1]) + 1
+
+
+def InversaPuntual(cadena: Pipeline, antes: np.ndarray):
+    """
+    Cadena inversa de un Pipeline de operaciones afines (Negativo, SumarBrillo,
+    AjusteCanal, con un Clip final opcional), o None si no es invertible para
+    esta imagen.
+
+    - float: es invertible si el Clip final no recorta ningún valor (se mira el
+      rango de cada canal de `antes`). La inversa es exacta salvo redondeo (ulp).
+    - uint8: se comprueba sobre las 256 entradas que ida y vuelta devuelven el
+      mismo nivel en todo el rango usado por cada canal (exacta).
+    """
+    operaciones = cadena.operaciones
+    cuerpo = operaciones[:-1] if operaciones and operaciones[-1][0] == "Clip" else operaciones
+    if not cuerpo or any(op[0] not in _INVERTIBLES for op in cuerpo):
+        return None
+    inversa = Pipeline()
+    for op in reversed(cuerpo):
+        if op[0] == "Negativo":
+            inversa.Negativo()
+        elif op[0] == "SumarBrillo":
+            inversa.SumarBrillo(-op[1])
+        else:
+            inversa.AjusteCanal(op[1], -op[2])
+
+    canales = antes.shape[2] if antes.ndim == 3 else 1
+    minimo = antes.reshape(-1, canales).min(axis=0)
+    maximo = antes.reshape(-1, canales).max(axis=0)
+    forma_prueba = lambda n: (n, 1, canales) if antes.ndim == 3 else (n, 1)
+
+    if antes.dtype == np.uint8:
+        niveles = np.repeat(np.arange(256, dtype=np.uint8)[:, None], canales, axis=1)
+        prueba = niveles.reshape(forma_prueba(256))
+        vuelta = inversa.Evaluar(cadena.Evaluar(prueba)).reshape(256, canales)
+        for c in range(canales):
+            rango = slice(int(minimo[c]), int(maximo[c]) + 1)
+            if not np.array_equal(vuelta[rango, c], niveles[rango, c]):
+                return None
+        return inversa
+
+    if cuerpo is not operaciones:
+        # Las operaciones afines son monótonas: basta con mirar los extremos
+        directa = Pipeline()
+        directa.operaciones = list(cuerpo)
+        extremos = directa.Evaluar(np.stack([minimo, maximo]).astype(np.float64)
+                                   .reshape(forma_prueba(2)))
+        if extremos.min() < operaciones[-1][1] or extremos.max() > operaciones[-1][2]:
+            return None
+    return inversa
+
+
+class Entrada:
+    """
+    Un paso del historial.
+
+    Atributos
+    ---------
+    nombre : str
+    tipo : str
+        "parametros", "delta" o "recalculo".
+    rehacer : callable
+        rehacer(img) -> img: vuelve a aplicar el paso (determinista).
+    inversa : callable | None
+        Para "parametros": inversa(img) -> img.
+    bytes : int
+        Memoria que ocupa la entrada (datos comprimidos).
+    """
+
+    def __init__(self, nombre, tipo, rehacer, inversa=None, datos=None, caja=None,
+                 forma=None, dtype=None):
+        self.nombre = nombre
+        self.tipo = tipo
+        self.rehacer = rehacer
+        self.inversa = inversa
+        self.datos = datos
+        self.caja = caja
+        self.forma = forma
+        self.dtype = dtype
+        self.bytes = sum(len(b) for b in datos) if datos else 0
+
+    def Descartar(self):
+        """Pasa la entrada a "recalculo" liberando sus datos."""
+        self.tipo = "recalculo"
+        self.datos = None
+        self.bytes = 0
+
+    def __repr__(self):
+        return f"Entrada({self.nombre}, {self.tipo}, {self.bytes} B)"
+
+
+class Historial:
+    """
+    Pila de deshacer/rehacer sobre una imagen base.
+
+    El estado k es la imagen después de las k primeras entradas (estado 0 =
+    base); `indice` es el estado actual. Anterior/Siguiente solo calculan; Mover
+    confirma el cambio de estado (así un cálculo cancelado no deja el historial
+    a medias).
+
+    Atributos
+    ---------
+    base : np.ndarray
+    entradas : list[Entrada]
+    indice : int
+    presupuesto_bytes : int
+    """
+
+    def __init__(self, base: np.ndarray, presupuesto_bytes: int = PRESUPUESTO_DEFECTO,
+                 mapear=map):
+        self.base = base
+        self.entradas = []
+        self.indice = 0
+        self.presupuesto_bytes = presupuesto_bytes
+        self.mapear = mapear
+        self._puntos = OrderedDict()  # estado -> copia completa (LRU)
+
+    # ---- Registro ----
+
+    def Preparar(self, nombre: str, antes: np.ndarray, despues: np.ndarray, rehacer,
+                 inversa=None) -> Entrada:
+        """
+        Construye la entrada para el paso antes -> despues (la parte costosa:
+        diferencia y compresión). No modifica el historial; ver Registrar.
+        """
+        if inversa is not None:
+            return Entrada(nombre, "parametros", rehacer, inversa=inversa)
+        if antes.shape != despues.shape or antes.dtype != despues.dtype:
+            region, caja = antes, None
+        else:
+            caja = CajaCambios(antes, despues) or (0, 0, 0, 0)
+            y0, y1, x0, x1 = caja
+            region = antes[y0:y1, x0:x1]
+        return Entrada(nombre, "delta", rehacer, datos=Comprimir(region, self.mapear),
+                       caja=caja, forma=region.shape, dtype=region.dtype)
+
+    def Registrar(self, entrada: Entrada):
+        """Agrega la entrada como siguiente estado (descarta lo que se podía rehacer)."""
+        self.DescartarRehacer()
+        self.entradas.append(entrada)
+        self.indice += 1
+        self._ajustar()
+
+    def DescartarRehacer(self):
+        """Elimina las entradas posteriores al estado actual."""
+        del self.entradas[self.indice:]
+        for estado in [k for k in self._puntos if k > self.indice]:
+            del self._puntos[estado]
+
+    # ---- Navegación ----
+
+    def PuedeDeshacer(self) -> bool:
+        return self.indice > 0
+
+    def PuedeRehacer(self) -> bool:
+        return self.indice < len(self.entradas)
+
+    def Anterior(self, actual: np.ndarray) -> np.ndarray:
+        """Calcula el estado indice - 1 a partir de la imagen actual (estado indice)."""
+        entrada = self.entradas[self.indice - 1]
+        if entrada.tipo == "parametros":
+            return entrada.inversa(actual)
+        if entrada.tipo == "delta":
+            region = Descomprimir(entrada.datos, entrada.forma, entrada.dtype)
+            if entrada.caja is None:
+                return region
+            y0, y1, x0, x1 = entrada.caja
+            resultado = actual.copy()
+            resultado[y0:y1, x0:x1] = region
+            return resultado
+        return self._reconstruir(self.indice - 1)
+
+    def Siguiente(self, actual: np.ndarray) -> np.ndarray:
+        """Calcula el estado indice + 1 a partir de la imagen actual (vuelve a aplicar el paso)."""
+        return self.entradas[self.indice].rehacer(actual)
+
+    def Mover(self, pasos: int):
+        """Confirma el cambio de estado (-1 deshacer, +1 rehacer)."""
+        self.indice = min(max(self.indice + pasos, 0), len(self.entradas))
+
+    def _reconstruir(self, estado: int) -> np.ndarray:
+        """Estado desde el punto de control anterior más cercano, reproduciendo los pasos."""
+        desde = max((k for k in self._puntos if k <= estado), default=0)
+        img = self._puntos[desde] if desde else self.base
+        if desde:
+            self._puntos.move_to_end(desde)
+        for entrada in self.entradas[desde:estado]:
+            img = entrada.rehacer(img)
+        if estado and estado != desde and img.nbytes <= self.presupuesto_bytes:
+            self._puntos[estado] = img
+            self._ajustar()
+        return img
+
+    # ---- Memoria ----
+
+    @property
+    def bytes_usados(self) -> int:
+        return sum(e.bytes for e in self.entradas) + sum(p.nbytes for p in self._puntos.values())
+
+    def _ajustar(self):
+        """Respeta el presupuesto: primero puntos de control (LRU), luego deltas antiguos."""
+        exceso = self.bytes_usados - self.presupuesto_bytes
+        while exceso > 0 and self._puntos:
+            _, punto = self._puntos.popitem(last=False)
+            exceso -= punto.nbytes
+        for entrada in self.entradas:
+            if exceso <= 0:
+                break
+            if entrada.tipo == "delta" and entrada.bytes:
+                exceso -= entrada.bytes
+                entrada.Descartar()
+
+    def Memoria(self) -> list:
+        """Memoria por entrada y por punto de control (lista de dicts para mostrar)."""
+        filas = [{"nombre": e.nombre, "tipo": e.tipo, "bytes": e.bytes,
+                  "aplicada": i < self.indice} for i, e in enumerate(self.entradas)]
+        filas += [{"nombre": f"Punto de control {k}", "tipo": "punto", "bytes": p.nbytes,
+                   "aplicada": k <= self.indice} for k, p in self._puntos.items()]
+        return filas
@@ -1,51 +1,163 @@
+from functools import lru_cache
 import numpy as np
-import matplotlib.pyplot as plt
+import histograma
 
-def Layer(img, capa): #0-Rojo, 1-Verde, 2-Azul
-    img_capa = np.zeros_like(img)
-    img_capa[:,:,capa] = img[:,:,capa]
-    return img_capa
+#Modo uint8: las operaciones puntuales se resuelven con tablas de búsqueda (LUT)
+#de 256 entradas aplicadas con np.take, sin pasar la imagen a float.
+def ConvertirUint8(img):
+    """Imagen float [0,1] -> uint8 (trunca como (img * 255).astype(np.uint8)); uint8 pasa igual."""
+    if img.dtype == np.uint8:
+        return img
+    if img.dtype == np.bool_:
+        return img.astype(np.uint8) * np.uint8(255)
+    return (np.clip(img, 0, 1) * 255).astype(np.uint8)
 
-def Canal(img, canal): #0-Rojo, 1-Verde, 2-Azul
-    imgN = np.copy(img)
-    if canal == 0:
-        imgN[:,:,1] = 1
-        imgN[:,:,2] = 1
-    elif canal == 1:
-        imgN[:,:,0] = 1
-        imgN[:,:,2] = 1
-    elif canal == 2:
-        imgN[:,:,0] = 1
-        imgN[:,:,1] = 1
-    return imgN
+def ConvertirFloat(img):
+    """Imagen uint8 -> float64 [0,1]; las imágenes float pasan igual."""
+    if img.dtype == np.uint8:
+        return img / 255.0
+    if img.dtype == np.bool_:
+        return img.astype(np.float64)
+    return img
+
+def _tabla(funcion):
+    # Evalúa funcion sobre los 256 niveles (en [0,1]) y la cuantiza a uint8
+    niveles = np.arange(256) / 255.0
+    lut = np.clip(np.rint(funcion(niveles) * 255), 0, 255).astype(np.uint8)
+    lut.flags.writeable = False
+    return lut
+
+# Bytes de índices intp temporales por franja de filas en AplicarLUT
+_BYTES_FRANJA_LUT = 1 << 20
+
+@lru_cache(maxsize=256)
+def LUT(operacion, *parametros):
+    """
+    Tabla de búsqueda (256,) uint8 cacheada para una operación puntual.
+
+    operacion : "Negativo", "SumarBrillo" (brillo), "AjusteContraste" (zonas, contraste).
+    """
+    if operacion == "Negativo":
+        return _tabla(lambda x: 1 - x)
+    if operacion == "SumarBrillo":
+        brillo, = parametros
+        return _tabla(lambda x: x + brillo)
+    if operacion == "AjusteContraste":
+        zonas, contraste = parametros
+        if zonas == 0:
+            return _tabla(lambda x: contraste * np.log10(1 + x))
+        return _tabla(lambda x: contraste * np.exp(x - 1))
+    raise ValueError(f"Operación sin LUT: {operacion}")
+
+def AplicarLUT(img, lut, out=None):
+    """
+    Aplica una LUT a una imagen uint8.
+
+    lut puede ser (256,) (misma tabla para todos los canales) o (256, c)
+    (una tabla por canal). out (uint8, misma forma que img) permite escribir
+    el resultado en un arreglo existente.
+    """
+    if img.ndim == 2 and lut.ndim == 2:
+        lut = lut[:, 0]
+    if out is None:
+        out = np.empty(img.shape, dtype=np.uint8)
+    # Por franjas de filas: np.take convierte los índices uint8 a intp (8 bytes
+    # por elemento), así que ese temporal queda acotado a la franja (y en caché)
+    filas = max(1, _BYTES_FRANJA_LUT // max(1, img[0].size * np.dtype(np.intp).itemsize))
+    if lut.ndim == 1:
+        for yI in range(0, img.shape[0], filas):
+            np.take(lut, img[yI:yI + filas], out=out[yI:yI + filas], mode="clip")
+        return out
+    # Una tabla contigua por canal
+    tablas = np.ascontiguousarray(lut.T)
+    for yI in range(0, img.shape[0], filas):
+        for c in range(img.shape[2]):
+            np.take(tablas[c], img[yI:yI + filas, :, c], out=out[yI:yI + filas, :, c], mode="clip")
+    return out
+
+def _maximo(img):
+    return 255 if img.dtype == np.uint8 else 1
+
+def Layer(img, capa, out=None): #0-Rojo, 1-Verde, 2-Azul
+    """Deja solo el canal `capa` (los otros en 0). out: buffer de salida (forma de img)."""
+    if out is None:
+        out = np.empty_like(img)
+    for c in range(img.shape[2]):
+        if c == capa:
+            out[:, :, c] = img[:, :, c]
+        else:
+            out[:, :, c] = 0
+    return out
+
+def Canal(img, canal, out=None): #0-Rojo, 1-Verde, 2-Azul
+    """Deja el canal `canal` y satura los otros al máximo. out: buffer de salida (forma de img)."""
+    if out is None:
+        out = np.empty_like(img)
+    maximo = _maximo(img)
+    for c in range(img.shape[2]):
+        if c == canal:
+            out[:, :, c] = img[:, :, c]
+        else:
+            out[:, :, c] = maximo
+    return out
+
+def ExtraerCanal(img, canal, copiar=False):
+    """
+    Un canal como arreglo (h, w): vista con saltos sobre img (sin copiar nada)
+    o, con copiar=True, un arreglo contiguo de un solo canal.
+    """
+    vista = img[:, :, canal]
+    return np.ascontiguousarray(vista) if copiar else vista
 
 def Negativo(img):
+    if img.dtype == np.uint8:
+        return AplicarLUT(img, LUT("Negativo"))
     imgN = np.copy(img)
     imgN = 1 - imgN
     return imgN
 
 def CombinarF(img1, img2, factor):
-    imgN1 = np.copy(img1)
-    imgN2 = np.copy(img2)
-    imgN = factor * imgN1 + (1 - factor) * imgN2
+    if img1.dtype == np.uint8 and img2.dtype == np.uint8:
+        imgN = img1 * np.float32(factor)
+        imgN += img2 * np.float32(1 - factor)
+        np.rint(imgN, out=imgN)
+        np.clip(imgN, 0, 255, out=imgN)
+        return imgN.astype(np.uint8)
+    # Sin copias de las entradas: dos temporales en lugar de cinco
+    # (para N imágenes o máscaras alfa ver mezcla.Mezclador)
+    imgN = factor * img1
+    otra = (1 - factor) * img2
+    if np.result_type(imgN, otra) == imgN.dtype:
+        imgN += otra
+    else:
+        imgN = imgN + otra
     return imgN
 
 def Grises(img):
+    if img.dtype == np.uint8:
+        return histograma.Luminancia(img)
     imgN = np.copy(img)
     imgN = imgN[:,:,0] * 0.299 + imgN[:,:,1] * 0.587 + imgN[:,:,2] * 0.114
     return imgN
 
 def SumarBrillo(img, brillo):
+    if img.dtype == np.uint8:
+        return AplicarLUT(img, LUT("SumarBrillo", float(brillo)))
     imgN = np.copy(img)
     imgN = imgN + brillo
     return imgN
 
 def AjusteCanal(img, canal, ajuste):
     imgN = np.copy(img)
+    if img.dtype == np.uint8:
+        imgN[:,:,canal] = AplicarLUT(img[:,:,canal], LUT("SumarBrillo", float(ajuste)))
+        return imgN
     imgN[:,:,canal] = imgN[:,:,canal] + ajuste
     return imgN
 
 def AjusteContraste(img, zonas, contraste):
+    if img.dtype == np.uint8:
+        return AplicarLUT(img, LUT("AjusteContraste", int(zonas), float(contraste)))
     imgN = np.copy(img)
     if zonas == 0:
         imgN = contraste * np.log10(1 + imgN)
@@ -54,81 +166,326 @@ def AjusteContraste(img, zonas, contraste):
     return imgN
 
 def Binaria(img, umbral):
+    if img.dtype == np.uint8:
+        # gris/255 > umbral  <=>  gris > floor(umbral * 255)
+        return Grises(img) > int(np.floor(umbral * 255))
     imgN = np.copy(img)
     Gris = Grises(imgN)
     imgN = (Gris > umbral)
     return imgN
 
-def Desplazar(img, dx, dy):
-    imgN = np.copy(img)
-    h, w = imgN.shape[:2]
-    xI = 0
-    xF = w - dx
-    yI = 0
-    yF = h - dy
-    trasladada = np.zeros_like(imgN)
-    trasladada[dy:h, dx:w] = imgN[yI:yF, xI:xF]
-    return trasladada
-
-def Recortar(img, xI, xF, yI, yF):
-    imgN = np.copy(img)
-    recortada = imgN[xI:xF, yI:yF]
-    return recortada
+def Desplazar(img, dx, dy, out=None):
+    """
+    Traslada img (dx columnas, dy filas; negativos hacia arriba/izquierda) y
+    rellena con 0 lo descubierto. out: buffer de salida (forma de img) que no
+    puede ser la misma memoria que img.
+    """
+    h, w = img.shape[:2]
+    if out is None:
+        out = np.empty_like(img)
+    # Región de destino que cubre la imagen trasladada (vacía si sale del todo)
+    yI, yF = min(max(dy, 0), h), max(min(h + dy, h), 0)
+    xI, xF = min(max(dx, 0), w), max(min(w + dx, w), 0)
+    if yI >= yF or xI >= xF:
+        out[...] = 0
+        return out
+    out[yI:yF, xI:xF] = img[yI - dy:yF - dy, xI - dx:xF - dx]
+    # Solo se ponen en 0 las franjas descubiertas
+    out[:yI] = 0
+    out[yF:] = 0
+    out[yI:yF, :xI] = 0
+    out[yI:yF, xF:] = 0
+    return out
+
+def Recortar(img, xI, xF, yI, yF, copiar=True):
+    """
+    Filas xI:xF y columnas yI:yF de img. copiar=False devuelve una vista (no
+    asigna memoria y no depende del tamaño de la imagen; comparte los datos de
+    img); por defecto se copia solo la región recortada.
+    """
+    recortada = img[xI:xF, yI:yF]
+    return recortada.copy() if copiar else recortada
 
 #Rotar
-def RotarImg(img, angulo):
-    imgN = np.copy(img)
-    h, w = imgN.shape[:2]
-    centro = (w // 2, h // 2)
+def _pesos_cubicos(t, a=-0.5):
+    # Pesos de Keys para los vecinos -1, 0, 1, 2 dada la parte fraccionaria t
+    t2 = t * t
+    t3 = t2 * t
+    w0 = a * (t3 - 2 * t2 + t)
+    w1 = (a + 2) * t3 - (a + 3) * t2 + 1
+    w2 = -(a + 2) * t3 + (2 * a + 3) * t2 - a * t
+    w3 = a * (t2 - t3)
+    return (w0, w1, w2, w3)
+
+def _tipo_muestreo(img):
+    return np.float64 if img.dtype == np.float64 else np.float32
+
+def PrepararMuestreo(img, interpolacion):
+    """
+    Deja la imagen lista para Muestrear: aplanada a (h*w, canales) y, para
+    bilineal/bicúbica, en float con un marco de ceros alrededor (float64 si la
+    imagen ya es float64, float32 en otro caso: alcanza para uint8 y ahorra
+    la mitad de memoria y de ancho de banda).
+    """
+    if interpolacion == "vecino":
+        borde = 0
+        fuente = img
+    elif interpolacion in ("bilineal", "bicubica"):
+        borde = 1 if interpolacion == "bilineal" else 2
+        pad = [(borde, borde), (borde, borde)] + [(0, 0)] * (img.ndim - 2)
+        fuente = np.pad(img.astype(_tipo_muestreo(img)), pad)
+    else:
+        raise ValueError(f"Interpolación desconocida: {interpolacion}")
+    hP, wP = fuente.shape[:2]
+    return fuente.reshape((hP * wP,) + img.shape[2:]), borde
+
+def Muestrear(img, xs, ys, interpolacion="vecino", preparada=None, rango=None):
+    """
+    Muestrea img en las coordenadas (xs, ys) de la imagen fuente.
+    Los puntos que caen fuera de la imagen quedan en 0, igual que en RotarImg.
+    `preparada` permite reutilizar el resultado de PrepararMuestreo entre bloques.
+    `rango` = (mínimo, máximo) al que se recorta la bicúbica en float; por
+    defecto el de img (quien muestrea una ventana pasa el de la imagen entera).
+    """
+    if preparada is None:
+        preparada = PrepararMuestreo(img, interpolacion)
+    plana, borde = preparada
+    h, w = img.shape[:2]
+    extra = (1,) * (img.ndim - 2)
+
+    if interpolacion == "vecino":
+        xi = np.rint(xs).astype(np.intp)
+        yi = np.rint(ys).astype(np.intp)
+        valido = (xi >= 0) & (xi < w) & (yi >= 0) & (yi < h)
+        idx = yi * w + xi
+        idx[~valido] = 0
+        salida = np.take(plana, idx, axis=0)
+        salida[~valido] = 0
+        return salida
+
+    desde, hasta = (0, 2) if interpolacion == "bilineal" else (-1, 3)
+    wP = w + 2 * borde
+    x0 = np.floor(xs)
+    y0 = np.floor(ys)
+    tx = (xs - x0).astype(_tipo_muestreo(img))
+    ty = (ys - y0).astype(_tipo_muestreo(img))
+    valido = (xs > -1) & (xs < w) & (ys > -1) & (ys < h)
+    xi = np.clip(x0.astype(np.intp) + borde, -desde, w + 2 * borde - hasta)
+    yi = np.clip(y0.astype(np.intp) + borde, -desde, h + 2 * borde - hasta)
+    base = yi * wP + xi
+
+    if interpolacion == "bilineal":
+        wx = (1 - tx, tx)
+        wy = (1 - ty, ty)
+    else:
+        wx = _pesos_cubicos(tx)
+        wy = _pesos_cubicos(ty)
+    wx = [p.reshape(p.shape + extra) for p in wx]
+    wy = [p.reshape(p.shape + extra) for p in wy]
+
+    salida = None
+    for j, dy in enumerate(range(desde, hasta)):
+        fila = None
+        for i, dx in enumerate(range(desde, hasta)):
+            termino = np.take(plana, base + (dy * wP + dx), axis=0)
+            termino *= wx[i]
+            if fila is None:
+                fila = termino
+            else:
+                fila += termino
+        fila *= wy[j]
+        if salida is None:
+            salida = fila
+        else:
+            salida += fila
+
+    if np.issubdtype(img.dtype, np.integer):
+        info = np.iinfo(img.dtype)
+        salida = np.clip(np.rint(salida), info.min, info.max)
+    elif interpolacion == "bicubica" and img.dtype != np.bool_:
+        # La bicúbica puede salirse del rango de la fuente
+        if rango is None:
+            rango = (img.min(), img.max())
+        salida = np.clip(salida, *rango)
+    # Después del recorte: el fondo queda en 0 aunque el mínimo de la fuente no lo sea
+    salida[~valido] = 0
+    return salida.astype(img.dtype, copy=False)
+
+def MapaRotacion(h, w, angulo, expandir=False):
+    """
+    Geometría de RotarImg para una imagen h x w.
+
+    Retorna ((h_new, w_new), mapa), donde mapa(filas, columnas) recibe índices
+    1D de salida y da las coordenadas fuente (xr, yr) de esa grilla.
+    """
     theta = np.deg2rad(angulo)
-    rotated = np.zeros_like(imgN)
-    for y in range(h):
-        for x in range(w):
-            x0 = x - centro[0]
-            y0 = y - centro[1]
-            xr = int(np.round(x0 * np.cos(theta) - y0 * np.sin(theta) + centro[0]))
-            yr = int(np.round(x0 * np.sin(theta) + y0 * np.cos(theta) + centro[1]))
-            if 0 <= xr < w and 0 <= yr < h:
-                rotated[y, x] = imgN[yr, xr]
+    cos = np.cos(theta)
+    sin = np.sin(theta)
+    if expandir:
+        w_new = int(np.ceil(abs(w * cos) + abs(h * sin) - 1e-9))
+        h_new = int(np.ceil(abs(w * sin) + abs(h * cos) - 1e-9))
+    else:
+        w_new, h_new = w, h
+    centro = (w // 2, h // 2)
+    centro_new = (w_new // 2, h_new // 2)
+
+    def mapa(filas, columnas):
+        x0 = columnas - centro_new[0]
+        y0 = (filas - centro_new[1])[:, None]
+        xr = x0 * cos - y0 * sin + centro[0]
+        yr = x0 * sin + y0 * cos + centro[1]
+        return xr, yr
+
+    return (h_new, w_new), mapa
+
+def RotarImg(img, angulo, interpolacion="vecino", expandir=False, bloque=256):
+    """
+    Rota la imagen `angulo` grados alrededor de su centro por mapeo inverso.
+
+    interpolacion : "vecino" (igual al resultado original), "bilineal" o "bicubica".
+    expandir : si es True el lienzo crece para que no se recorten las esquinas.
+    bloque : filas de salida que se calculan por pasada (acota la memoria temporal).
+    """
+    h, w = img.shape[:2]
+    (h_new, w_new), mapa = MapaRotacion(h, w, angulo, expandir)
+    rotated = np.empty((h_new, w_new) + img.shape[2:], dtype=img.dtype)
+    preparada = PrepararMuestreo(img, interpolacion)
+    columnas = np.arange(w_new)
+    for yI in range(0, h_new, bloque):
+        yF = min(yI + bloque, h_new)
+        xr, yr = mapa(np.arange(yI, yF), columnas)
+        rotated[yI:yF] = Muestrear(img, xr, yr, interpolacion, preparada)
     return rotated
-    
+
+#Remuestreo por ejes (usado por ReducirResolucion y Ampliar)
+def _es_entero(factor):
+    return float(factor).is_integer()
+
+def IndicesEje(n, salidas, escala, metodo):
+    """
+    Muestras fuente de las posiciones `salidas` de un remuestreo por ejes de n
+    muestras: (i0, i1, t) con i1 y t en None para "vecino".
+    """
+    if metodo == "vecino":
+        idx = np.floor((salidas + 0.5) * escala).astype(np.intp)
+        np.clip(idx, 0, n - 1, out=idx)
+        return idx, None, None
+    pos = (salidas + 0.5) * escala - 0.5
+    np.clip(pos, 0, n - 1, out=pos)
+    i0 = np.floor(pos).astype(np.intp)
+    i1 = np.minimum(i0 + 1, n - 1)
+    return i0, i1, pos - i0
+
+def InterpolarEje(img, eje, i0, i1=None, t=None):
+    """Aplica a lo largo de `eje` las muestras de IndicesEje (float64 si interpola)."""
+    if i1 is None:
+        return np.take(img, i0, axis=eje)
+    forma = [1] * img.ndim
+    forma[eje] = len(i0)
+    t = t.reshape(forma)
+    a = np.take(img, i0, axis=eje).astype(np.float64)
+    b = np.take(img, i1, axis=eje)
+    a *= 1 - t
+    a += t * b
+    return a
+
+def _remuestrear_eje(img, eje, n_new, escala, metodo):
+    """
+    Remuestrea img a lo largo de `eje` hasta n_new muestras.
+    escala = píxeles fuente por píxel de salida (>1 reduce, <1 amplía).
+    """
+    n = img.shape[eje]
+    forma = [1] * img.ndim
+    forma[eje] = n_new
+
+    if metodo in ("vecino", "bilineal"):
+        return InterpolarEje(img, eje, *IndicesEje(n, np.arange(n_new), escala, metodo))
+
+    if metodo == "area":
+        # Integral acumulada: la media sobre [a, b) es (S(b) - S(a)) / (b - a)
+        acum = np.cumsum(img, axis=eje, dtype=np.float64)
+        cero = np.zeros_like(np.take(acum, [0], axis=eje))
+        acum = np.concatenate((cero, acum), axis=eje)
+
+        def integral(t):
+            k = np.minimum(np.floor(t).astype(np.intp), n - 1)
+            frac = (t - k).reshape(forma)
+            return np.take(acum, k, axis=eje) + frac * np.take(img, k, axis=eje)
+
+        a = np.arange(n_new) * escala
+        b = np.minimum((np.arange(n_new) + 1) * escala, n)
+        salida = integral(b)
+        salida -= integral(a)
+        salida /= (b - a).reshape(forma)
+        return salida
+
+    raise ValueError(f"Método de remuestreo desconocido: {metodo}")
+
+def _a_tipo(resultado, dtype):
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        resultado = np.clip(np.rint(resultado), info.min, info.max)
+    return resultado.astype(dtype, copy=False)
+
 #Reducir Resolucion
-def ReducirResolucion(img, factor):
-    imgN = np.copy(img)
-    h, w = imgN.shape[:2]
-    h_new = h // factor
-    w_new = w // factor
-    reduced = np.zeros((h_new, w_new, imgN.shape[2]), dtype=imgN.dtype)
-    for i in range(h_new):
-        for j in range(w_new):
-            reduced[i, j] = imgN[i*factor:(i+1)*factor, j*factor:(j+1)*factor].mean(axis=(0, 1))
-    return reduced
+def ReducirResolucion(img, factor, metodo="area", borde="recortar"):
+    """
+    Reduce la resolución dividiendo alto y ancho por `factor` (admite no enteros).
+
+    metodo : "area" (promedio por bloque), "vecino" o "bilineal".
+    borde : "recortar" descarta el sobrante que no llena un bloque completo;
+            "rellenar" conserva ese sobrante como un bloque parcial.
+    """
+    h, w = img.shape[:2]
+    if borde == "recortar":
+        h_new = max(1, int(h // factor))
+        w_new = max(1, int(w // factor))
+    elif borde == "rellenar":
+        h_new = int(np.ceil(h / factor))
+        w_new = int(np.ceil(w / factor))
+    else:
+        raise ValueError(f"Borde desconocido: {borde}")
+
+    if metodo == "area" and _es_entero(factor) and factor <= min(h, w):
+        f = int(factor)
+        if borde == "recortar":
+            bloques = img[:h_new * f, :w_new * f]
+        else:
+            # Bloques parciales del borde: relleno con ceros y se divide por lo que cubren
+            bloques = np.zeros((h_new * f, w_new * f) + img.shape[2:], dtype=img.dtype)
+            bloques[:h, :w] = img
+        bloques = bloques.reshape((h_new, f, w_new, f) + img.shape[2:])
+        reduced = bloques.sum(axis=1, dtype=np.float64).sum(axis=2)
+        cuenta_y = np.minimum(f, h - np.arange(h_new) * f)
+        cuenta_x = np.minimum(f, w - np.arange(w_new) * f)
+        reduced /= np.multiply.outer(cuenta_y, cuenta_x).reshape((h_new, w_new) + (1,) * (img.ndim - 2))
+        return _a_tipo(reduced, img.dtype)
+
+    reduced = _remuestrear_eje(img, 0, h_new, factor, metodo)
+    reduced = _remuestrear_eje(reduced, 1, w_new, factor, metodo)
+    return _a_tipo(reduced, img.dtype)
 
 #Ampliar
-def Ampliar(img, factor):
-    imgN = np.copy(img)
-    h, w = imgN.shape[:2]
-    h_new = h * factor
-    w_new = w * factor
-    enlarged = np.zeros((h_new, w_new, imgN.shape[2]), dtype=imgN.dtype)
-    for i in range(h):
-        for j in range(w):
-            enlarged[i*factor:(i+1)*factor, j*factor:(j+1)*factor] = imgN[i, j]
-    return enlarged
+def Ampliar(img, factor, metodo="vecino"):
+    """
+    Amplía la imagen multiplicando alto y ancho por `factor` (admite no enteros).
+
+    metodo : "vecino" (réplica de píxeles), "bilineal" o "area".
+    """
+    h, w = img.shape[:2]
+    if metodo == "vecino" and _es_entero(factor):
+        f = int(factor)
+        # Una sola copia: cada píxel se difunde a un bloque f x f
+        bloques = np.broadcast_to(img[:, None, :, None], (h, f, w, f) + img.shape[2:])
+        return bloques.reshape((h * f, w * f) + img.shape[2:])
+
+    h_new = max(1, int(round(h * factor)))
+    w_new = max(1, int(round(w * factor)))
+    enlarged = _remuestrear_eje(img, 0, h_new, h / h_new, metodo)
+    enlarged = _remuestrear_eje(enlarged, 1, w_new, w / w_new, metodo)
+    return _a_tipo(enlarged, img.dtype)
 
 #Histograma
-def Histograma(img):
-    imgN = np.copy(img)
-    h, w = imgN.shape[:2]
-    histR = np.zeros(256)
-    histG = np.zeros(256)
-    histB = np.zeros(256)
-    for i in range(h):
-        for j in range(w):
-            r = int(imgN[i, j, 0] * 255)
-            g = int(imgN[i, j, 1] * 255)
-            b = int(imgN[i, j, 2] * 255)
-            histR[r] += 1
-            histG[g] += 1
-            histB[b] += 1
-    return histR, histG, histB
+def Histograma(img, bins=256):
+    hist = histograma.HistogramaCanales(img, bins).astype(np.float64)
+    return hist[0], hist[1], hist[2]
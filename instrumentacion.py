@@ -0,0 +1,402 @@
+"""
+instrumentacion.py
+------------------
+
+Instrumentación opcional (opt-in) de imgControl y de las etapas de la interfaz.
+
+Cuando la aplicación "se cuelga" hay que saber si el tiempo se va en decodificar,
+en la transformación, en la conversión float -> uint8, en dibujar o en Tk.
+Instrumentos registra intervalos con nombre:
+
+- Temporizadores: cada intervalo (Medir) guarda inicio, duración e hilo.
+- Memoria (opcional, tracemalloc): bytes netos asignados y pico de cada intervalo.
+  NumPy registra sus buffers en tracemalloc; con intervalos anidados el pico se
+  propaga al padre, pero con varios hilos a la vez es aproximado (el pico de
+  tracemalloc es global).
+- Histogramas móviles: por operación, las últimas `ventana` latencias, con
+  percentiles y conteos en intervalos logarítmicos (1 µs a 100 s).
+- Envolver(modulo): reemplaza las funciones públicas del módulo (imgControl,
+  filtros...) por envolturas que miden cada llamada; Desenvolver las restaura.
+  Desactivado no se envuelve nada, así que no cuesta nada.
+- Perfil (cProfile + tracemalloc): IniciarPerfil / DetenerPerfil perfilan los
+  intervalos más externos de cualquier hilo (de a uno por vez) y comparan dos
+  instantáneas de memoria.
+- Exportar: ExportarJSON (resumen por operación) y ExportarChrome (formato
+  Trace Event, se abre en chrome://tracing o ui.perfetto.dev).
+
+No importa tkinter: se puede usar desde lote.py o un servidor.
+
+Ejemplo
+-------
+    INSTRUMENTOS.Activar(memoria=True)
+    INSTRUMENTOS.Envolver(imgControl)
+    with Medir("decodificar", "app"):
+        img = cache.Obtener(ruta)
+    imgControl.RotarImg(img, 30)                # medido por la envoltura
+    print(INSTRUMENTOS.Resumen())
+    INSTRUMENTOS.ExportarChrome("traza.json")
+"""
+
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+import numpy as np
+
+# Latencias que guarda cada histograma móvil
+VENTANA_DEFECTO = 1024
+
+# Eventos de traza que se guardan (los más viejos se descartan)
+MAX_EVENTOS = 200_000
+
+# Bordes (segundos) de los intervalos de los histogramas: 4 por década, 1 µs a 100 s
+BORDES_LATENCIA = 10.0 ** np.arange(-6, 2.01, 0.25)
+
+
+class Latencias:
+    """
+    Histograma móvil de latencias de una operación.
+
+    Atributos
+    ---------
+    llamadas : int
+        Llamadas totales (no solo las de la ventana).
+    total_s : float
+        Tiempo total de todas las llamadas.
+    maximo_s : float
+        Latencia máxima de todas las llamadas.
+    pico_bytes : int
+        Mayor pico de memoria medido (0 sin seguimiento de memoria).
+    """
+
+    def __init__(self, ventana: int = VENTANA_DEFECTO):
+        self._ultimas = deque(maxlen=ventana)
+        self.llamadas = 0
+        self.total_s = 0.0
+        self.maximo_s = 0.0
+        self.pico_bytes = 0
+        self.netos_bytes = 0
+
+    def Registrar(self, segundos: float, pico: int = 0, netos: int = 0):
+        self._ultimas.append(segundos)
+        self.llamadas += 1
+        self.total_s += segundos
+        self.maximo_s = max(self.maximo_s, segundos)
+        self.pico_bytes = max(self.pico_bytes, pico)
+        self.netos_bytes += netos
+
+    def Percentiles(self, ps=(50, 90, 99)) -> dict:
+        """Percentiles (segundos) de las latencias de la ventana."""
+        if not self._ultimas:
+            return {f"p{p}": 0.0 for p in ps}
+        valores = np.percentile(np.fromiter(self._ultimas, dtype=np.float64), ps)
+        return {f"p{p}": float(v) for p, v in zip(ps, valores)}
+
+    def Histograma(self) -> np.ndarray:
+        """Conteos de la ventana en los intervalos de BORDES_LATENCIA."""
+        ultimas = np.fromiter(self._ultimas, dtype=np.float64)
+        return np.histogram(np.clip(ultimas, BORDES_LATENCIA[0], BORDES_LATENCIA[-1]),
+                            BORDES_LATENCIA)[0]
+
+
+class _Nulo:
+    """Contexto que no mide nada (instrumentación desactivada)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULO = _Nulo()
+
+
+class _Intervalo:
+    """Un intervalo en curso (ver Instrumentos.Medir)."""
+
+    __slots__ = ("instrumentos", "nombre", "categoria", "inicio", "actual0", "pico_hijos",
+                 "perfil")
+
+    def __init__(self, instrumentos, nombre, categoria):
+        self.instrumentos = instrumentos
+        self.nombre = nombre
+        self.categoria = categoria
+        self.perfil = None
+
+    def __enter__(self):
+        self.instrumentos._abrir(self)
+        return self
+
+    def __exit__(self, *exc):
+        self.instrumentos._cerrar(self)
+        return False
+
+
+class Instrumentos:
+    """
+    Registro de intervalos, histogramas por operación y eventos de traza.
+
+    Atributos
+    ---------
+    activo : bool
+        Si es False, Medir no hace nada.
+    memoria : bool
+        Seguimiento de asignaciones con tracemalloc.
+    ventana : int
+        Latencias por histograma móvil.
+    """
+
+    def __init__(self, ventana: int = VENTANA_DEFECTO, max_eventos: int = MAX_EVENTOS):
+        self.activo = False
+        self.memoria = False
+        self.ventana = ventana
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._operaciones = {}                     # (categoria, nombre) -> Latencias
+        self._eventos = deque(maxlen=max_eventos)  # (nombre, cat, inicio_ns, dur_ns, tid, pico)
+        self._origen_ns = time.perf_counter_ns()
+        self._envueltos = {}                       # (modulo, nombre) -> original
+        self._perfiles = None                      # lista de cProfile.Profile durante un perfil
+        self._perfilando = threading.Lock()
+        self._instantanea = None
+        self._tracemalloc_propio = False
+
+    # ---- Activación ----
+
+    def Activar(self, memoria: bool = False):
+        """Empieza a medir (con memoria=True también las asignaciones)."""
+        if memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracemalloc_propio = True
+        self.memoria = memoria
+        self.activo = True
+
+    def Desactivar(self):
+        """Deja de medir y restaura las funciones envueltas (los datos se conservan)."""
+        self.activo = False
+        self.Desenvolver()
+        if self._tracemalloc_propio and self._perfiles is None:
+            tracemalloc.stop()
+            self._tracemalloc_propio = False
+        self.memoria = False
+
+    def Limpiar(self):
+        """Borra histogramas y eventos."""
+        with self._lock:
+            self._operaciones.clear()
+            self._eventos.clear()
+            self._origen_ns = time.perf_counter_ns()
+
+    # ---- Intervalos ----
+
+    def Medir(self, nombre: str, categoria: str = "app"):
+        """Context manager que mide el bloque como la operación (categoria, nombre)."""
+        if not self.activo:
+            return _NULO
+        return _Intervalo(self, nombre, categoria)
+
+    def _pila(self):
+        pila = getattr(self._local, "pila", None)
+        if pila is None:
+            pila = self._local.pila = []
+        return pila
+
+    def _abrir(self, intervalo):
+        pila = self._pila()
+        intervalo.pico_hijos = 0
+        if self.memoria and tracemalloc.is_tracing():
+            actual, pico = tracemalloc.get_traced_memory()
+            if pila:
+                # El pico anterior pertenece al padre: se guarda antes de reiniciarlo
+                pila[-1].pico_hijos = max(pila[-1].pico_hijos, pico)
+            tracemalloc.reset_peak()
+            intervalo.actual0 = actual
+        else:
+            intervalo.actual0 = None
+        if not pila and self._perfiles is not None and self._perfilando.acquire(blocking=False):
+            intervalo.perfil = cProfile.Profile()
+            intervalo.perfil.enable()
+        pila.append(intervalo)
+        intervalo.inicio = time.perf_counter_ns()
+
+    def _cerrar(self, intervalo):
+        fin = time.perf_counter_ns()
+        pila = self._pila()
+        pila.pop()
+        if intervalo.perfil is not None:
+            intervalo.perfil.disable()
+            if self._perfiles is not None:
+                self._perfiles.append(intervalo.perfil)
+            self._perfilando.release()
+        pico = netos = 0
+        if intervalo.actual0 is not None and tracemalloc.is_tracing():
+            actual, pico_global = tracemalloc.get_traced_memory()
+            pico_global = max(pico_global, intervalo.pico_hijos)
+            pico = max(0, pico_global - intervalo.actual0)
+            netos = actual - intervalo.actual0
+            if pila:
+                pila[-1].pico_hijos = max(pila[-1].pico_hijos, pico_global)
+        duracion = fin - intervalo.inicio
+        clave = (intervalo.categoria, intervalo.nombre)
+        with self._lock:
+            latencias = self._operaciones.get(clave)
+            if latencias is None:
+                latencias = self._operaciones[clave] = Latencias(self.ventana)
+            latencias.Registrar(duracion / 1e9, pico, netos)
+            self._eventos.append((intervalo.nombre, intervalo.categoria, intervalo.inicio,
+                                  duracion, threading.get_ident(), pico))
+
+    def Registrar(self, nombre: str, segundos: float, categoria: str = "app"):
+        """Registra una latencia medida por fuera (p. ej. el retraso del bucle de Tk)."""
+        if not self.activo:
+            return
+        fin = time.perf_counter_ns()
+        duracion = int(segundos * 1e9)
+        with self._lock:
+            latencias = self._operaciones.get((categoria, nombre))
+            if latencias is None:
+                latencias = self._operaciones[(categoria, nombre)] = Latencias(self.ventana)
+            latencias.Registrar(segundos)
+            self._eventos.append((nombre, categoria, fin - duracion, duracion,
+                                  threading.get_ident(), 0))
+
+    # ---- Envolturas ----
+
+    def Envolver(self, *modulos):
+        """
+        Mide cada llamada a las funciones públicas (nombre en mayúscula) de los
+        módulos. Las envolturas conservan nombre, atributos y __wrapped__.
+        """
+        for modulo in modulos:
+            for nombre, funcion in list(vars(modulo).items()):
+                if ((modulo, nombre) in self._envueltos or not nombre[:1].isupper()
+                        or isinstance(funcion, type) or not callable(funcion)
+                        or getattr(funcion, "__module__", None) != modulo.__name__):
+                    continue
+                self._envueltos[(modulo, nombre)] = funcion
+                setattr(modulo, nombre, self._envoltura(funcion, modulo.__name__))
+
+    def _envoltura(self, funcion, categoria):
+        nombre = funcion.__name__
+
+        @functools.wraps(funcion)
+        def medida(*args, **kwargs):
+            if not self.activo:
+                return funcion(*args, **kwargs)
+            with _Intervalo(self, nombre, categoria):
+                return funcion(*args, **kwargs)
+        return medida
+
+    def Desenvolver(self):
+        """Restaura las funciones originales de los módulos envueltos."""
+        for (modulo, nombre), funcion in self._envueltos.items():
+            setattr(modulo, nombre, funcion)
+        self._envueltos.clear()
+
+    # ---- Perfil ----
+
+    def IniciarPerfil(self):
+        """Empieza una captura con cProfile y una instantánea de tracemalloc."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._tracemalloc_propio = True
+        self._instantanea = tracemalloc.take_snapshot()
+        self._perfiles = []
+
+    @property
+    def perfilando(self) -> bool:
+        return self._perfiles is not None
+
+    def DetenerPerfil(self, lineas: int = 25, ruta: str | None = None) -> dict:
+        """
+        Termina la captura. Retorna {"perfil": texto de pstats (por tiempo
+        acumulado), "memoria": las líneas que más memoria asignaron durante la
+        captura}. Con ruta también guarda el .prof (snakeviz, pstats).
+        """
+        perfiles, self._perfiles = self._perfiles or [], None
+        memoria = []
+        if self._instantanea is not None and tracemalloc.is_tracing():
+            # Sin las asignaciones de la propia captura (cProfile, pstats, este módulo)
+            propios = [tracemalloc.Filter(False, m.__file__)
+                       for m in (cProfile, pstats, tracemalloc)] + [tracemalloc.Filter(False, __file__)]
+            final = tracemalloc.take_snapshot().filter_traces(propios)
+            diferencias = final.compare_to(self._instantanea.filter_traces(propios), "lineno")
+            memoria = [str(d) for d in diferencias[:lineas]]
+        self._instantanea = None
+        if self._tracemalloc_propio and not self.memoria:
+            tracemalloc.stop()
+            self._tracemalloc_propio = False
+        texto = io.StringIO()
+        if perfiles:
+            estadisticas = pstats.Stats(perfiles[0], stream=texto)
+            for perfil in perfiles[1:]:
+                estadisticas.add(perfil)
+            estadisticas.sort_stats("cumulative").print_stats(lineas)
+            if ruta:
+                estadisticas.dump_stats(ruta)
+        else:
+            texto.write("Sin intervalos medidos durante la captura.\n")
+        return {"perfil": texto.getvalue(), "memoria": "\n".join(memoria)}
+
+    # ---- Consulta y exportación ----
+
+    def Resumen(self) -> list:
+        """Una fila por operación, ordenadas por tiempo total (segundos y bytes)."""
+        with self._lock:
+            operaciones = list(self._operaciones.items())
+        filas = []
+        for (categoria, nombre), latencias in operaciones:
+            fila = {
+                "categoria": categoria,
+                "nombre": nombre,
+                "llamadas": latencias.llamadas,
+                "total_s": latencias.total_s,
+                "media_s": latencias.total_s / latencias.llamadas,
+                "maximo_s": latencias.maximo_s,
+                "pico_bytes": latencias.pico_bytes,
+                "netos_bytes": latencias.netos_bytes,
+            }
+            fila.update({k + "_s": v for k, v in latencias.Percentiles().items()})
+            fila["histograma"] = latencias.Histograma().tolist()
+            filas.append(fila)
+        return sorted(filas, key=lambda f: f["total_s"], reverse=True)
+
+    def ExportarJSON(self, ruta: str):
+        """Resumen por operación (con los histogramas y sus bordes) en JSON."""
+        datos = {
+            "memoria": self.memoria,
+            "bordes_histograma_s": BORDES_LATENCIA.tolist(),
+            "operaciones": self.Resumen(),
+        }
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(datos, f, indent=2, ensure_ascii=False)
+
+    def ExportarChrome(self, ruta: str):
+        """Eventos en formato Chrome Trace Event (chrome://tracing, Perfetto)."""
+        with self._lock:
+            eventos = list(self._eventos)
+            origen = self._origen_ns
+        pid = os.getpid()
+        traza = [{
+            "name": nombre, "cat": categoria, "ph": "X", "pid": pid, "tid": tid,
+            "ts": (inicio - origen) / 1e3, "dur": duracion / 1e3,
+            "args": {"pico_bytes": pico} if pico else {},
+        } for nombre, categoria, inicio, duracion, tid, pico in eventos]
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": traza, "displayTimeUnit": "ms"}, f)
+
+
+# Instancia global que usan la interfaz y los módulos
+INSTRUMENTOS = Instrumentos()
+
+
+def Medir(nombre: str, categoria: str = "app"):
+    """Atajo de INSTRUMENTOS.Medir."""
+    return INSTRUMENTOS.Medir(nombre, categoria)
@@ -13,7 +13,7 @@ Autores:
 Esta aplicación:
  - Permite abrir y visualizar imágenes RGB.
  - Aplica transformaciones (negativo, grises, binarizar, brillo, contraste, rotación).
- - Muestra histograma RGB mediante matplotlib.
+ - Muestra un histograma RGB en vivo (panel que se actualiza con cada cambio).
  - Realiza fusión ponderada entre dos imágenes.
  - Tiene un panel de controles con scroll para acomodar muchos widgets.
  - Implementa un zoom visual (no destructivo) y restauración de la imagen original.
@@ -21,18 +21,61 @@ Esta aplicación:
 Dependencias:
  - Python (con tkinter)
  - Pillow (PIL)
- - matplotlib
  - numpy
  - imgControl (librería propia con funciones de procesamiento)
+ - histograma (histogramas rápidos con np.bincount)
+ - pipeline (cadena perezosa que fusiona operaciones puntuales + clip)
+ - ejecutor / trabajos (cálculo en segundo plano, por mosaicos, con progreso y cancelación)
+ - edicion (edición sobre una vista reducida; la imagen completa se calcula al guardar)
+ - historial (deshacer/rehacer con presupuesto de memoria)
+ - previa (vista previa en vivo de los sliders, solo de la región visible)
+ - cache (imágenes ya decodificadas: LRU en memoria y .npy en disco opcional)
+ - mezcla (promedio de N imágenes en streaming, memoria constante)
+ - umbral (binarización automática: Otsu y adaptativa con imágenes integrales)
+ - filtros (caja, gaussiano, enfoque, Sobel y mediana; separables, con FFT para núcleos grandes)
+ - instrumentacion (diagnóstico opcional: tiempos, memoria, perfiles y trazas por etapa)
+ - geometria (pasos geométricos compuestos en una matriz afín y un solo remuestreo)
 """
 
+import os
+import time
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from tkinter import ttk
 from PIL import Image, ImageTk
-import matplotlib.pyplot as plt
 import numpy as np
 import imgControl
+import histograma
+from pipeline import Pipeline
+from ejecutor import EjecutorMosaicos
+from trabajos import GestorTrabajos
+from edicion import Edicion, Paso, Reproducir
+from piramide import Piramide
+from historial import Historial, InversaPuntual, PRESUPUESTO_DEFECTO as PRESUPUESTO_HISTORIAL
+from previa import VistaPrevia, TablasSlider
+from cache import CacheImagenes
+from mezcla import Mezclador
+from mosaicos import Cancelado
+from umbral import Otsu, Adaptativo
+import filtros
+from instrumentacion import INSTRUMENTOS, Medir
+from geometria import Geometria
+
+
+# Píxeles del nivel de la pirámide que se usa para el histograma en vivo
+PIXELES_HISTOGRAMA = 1 << 20
+
+# Directorio de la caché en disco de imágenes decodificadas (desactivada si no se define)
+DIRECTORIO_CACHE = os.environ.get("PROCESAMIENTOIMG_CACHE")
+
+# Tiempo mínimo entre dos cuadros de la vista previa de los sliders (~30 fps)
+PRESUPUESTO_CUADRO_MS = 33
+
+# Diagnóstico desde el inicio: "1" mide tiempos, "memoria" también asignaciones
+DIAGNOSTICO = os.environ.get("PROCESAMIENTOIMG_DIAGNOSTICO")
+
+# Intervalo de la sonda que mide el retraso del bucle de eventos de Tk
+INTERVALO_SONDA_TK_MS = 100
 
 
 class App:
@@ -44,15 +87,43 @@ class App:
     root : tk.Tk
         Ventana raíz de Tkinter.
     img : np.ndarray | None
-        Imagen actual en memoria (float en rango [0,1], forma (h,w,3)).
+        Imagen actual en memoria (float en rango [0,1], forma (h,w,3)),
+        o uint8 [0,255] si está activo el modo uint8.
+    modo_uint8 : tk.BooleanVar
+        Si es True las imágenes se mantienen en uint8 y las operaciones puntuales
+        de imgControl usan tablas de búsqueda (LUT) cacheadas.
     img_original : np.ndarray | None
-        Copia de la imagen original cargada (permite restaurar).
+        Imagen original cargada (permite restaurar). Ninguna operación modifica
+        las imágenes en sitio, así que no hace falta copiarla.
     img2 : np.ndarray | None
         Segunda imagen para operaciones de fusión.
     imgTk : ImageTk.PhotoImage | None
         Referencia al objeto PhotoImage mostrado (se guarda para evitar garbage collection).
+        Tiene el tamaño de la región visible y se actualiza en sitio.
+    piramide : Piramide | None
+        Pirámide uint8 de la imagen mostrada; zoom y desplazamiento la reutilizan.
     zoom_factor : float
         Factor de zoom visual actual (1.0 = 100%).
+    ventana_hist : tk.Toplevel | None
+        Ventana del histograma en vivo (None si está cerrada).
+    trabajos : GestorTrabajos
+        Ejecuta las transformaciones en un hilo trabajador (la ventana no se congela).
+    ejecutor : EjecutorMosaicos
+        Pool de hilos que reparte cada transformación en franjas y reporta el progreso.
+    modo_proxy : tk.BooleanVar
+        Si es True se edita una vista del tamaño de la pantalla (self.edicion) y
+        la imagen completa se recalcula solo al guardar o al consolidar.
+    edicion : Edicion | None
+        Proxy + cadena de pasos pendientes (None fuera del modo proxy). En modo
+        proxy self.img es la última versión consolidada a resolución completa.
+    historial : Historial | None
+        Deshacer/rehacer a resolución completa, acotado por presupuesto_historial (bytes).
+    previa : VistaPrevia | None
+        Región visible sin transformar que reutiliza la vista previa de los sliders.
+    cache_imagenes : CacheImagenes
+        Imágenes ya decodificadas (reabrir una imagen reciente no la decodifica).
+    ventana_diagnostico : tk.Toplevel | None
+        Panel de diagnóstico (None si está cerrado); ver instrumentacion.INSTRUMENTOS.
     panel_controles : tk.Frame
         Frame interno que contiene los controles (dentro de un Canvas para scroll).
     panel_imagen : tk.Label
@@ -79,6 +150,33 @@ class App:
         self.img2 = None         # Segunda imagen para fusión
         self.imgTk = None        # Referencia al PhotoImage en uso
         self.zoom_factor = 1.0   # Factor de zoom visual actual
+        self.piramide = None     # Pirámide uint8 de la imagen mostrada (se reutiliza al hacer zoom)
+        self.zoom_vista = 1.0    # Zoom con que se dibuja self.piramide
+        self.centro_vista = (0.5, 0.5)  # Centro de la región visible (fracción de ancho y alto)
+        self.arrastre = None     # Última posición del ratón al desplazar la vista
+        self.ventana_hist = None # Panel de histograma en vivo (si está abierto)
+        self.canvas_hist = None
+        self.modo_uint8 = tk.BooleanVar(value=False)
+        self.ejecutor = EjecutorMosaicos()
+        self.trabajos = GestorTrabajos(root, al_progreso=self.mostrar_progreso)
+        self.modo_proxy = tk.BooleanVar(value=False)
+        self.edicion = None
+        self.historial = None
+        self.presupuesto_historial = PRESUPUESTO_HISTORIAL
+        self.previa = None       # Vista previa de los sliders (región visible sin transformar)
+        self.piramide2 = None    # Pirámide de self.img2 (para previsualizar la fusión)
+        self.tipo_previa = None  # Slider que se está previsualizando
+        self.id_previa = None    # Cuadro de vista previa agendado (root.after)
+        self.ultima_previa = 0.0 # Instante del último cuadro dibujado
+        self.costo_previa_ms = 0.0
+        self.canal_previa = tk.IntVar(value=0)
+        self.cache_imagenes = CacheImagenes(directorio=DIRECTORIO_CACHE)
+        self.ventana_diagnostico = None
+        self.tabla_diagnostico = None
+        self.texto_perfil = None
+        self.id_sonda = None     # Sonda del bucle de Tk agendada (root.after)
+        self.medir = tk.BooleanVar(value=bool(DIAGNOSTICO))
+        self.medir_memoria = tk.BooleanVar(value=DIAGNOSTICO == "memoria")
 
         # === PANEL IZQUIERDO CON SCROLL ===
         frame_scroll = tk.Frame(root, width=300, bg="#2b2b2b")
@@ -115,6 +213,8 @@ class App:
         # PANEL DERECHO - IMAGEN (área de visualización)
         self.panel_imagen = tk.Label(root, bg="#111")
         self.panel_imagen.pack(side="right", expand=True)
+        self.panel_imagen.bind("<ButtonPress-1>", self.iniciar_arrastre)
+        self.panel_imagen.bind("<B1-Motion>", self.arrastrar)
 
         # === SECCIÓN: CARGA DE IMÁGENES ===
         tk.Label(
@@ -129,6 +229,35 @@ class App:
         ttk.Button(self.panel_controles, text="Abrir Imagen 2 (Fusión)", command=self.abrir_imagen2).pack(pady=5)
         ttk.Button(self.panel_controles, text="Guardar Imagen", command=self.guardar_imagen).pack(pady=5)
         ttk.Button(self.panel_controles, text="Restaurar Imagen Original", command=self.restaurar_original).pack(pady=5)
+        ttk.Button(self.panel_controles, text="Caché de imágenes",
+                   command=self.mostrar_cache_imagenes).pack(pady=3)
+        ttk.Button(self.panel_controles, text="Diagnóstico",
+                   command=self.mostrar_diagnostico).pack(pady=3)
+        ttk.Checkbutton(self.panel_controles, text="Procesar en uint8 (LUT)", variable=self.modo_uint8,
+                        command=self.cambiar_modo).pack(pady=5)
+        ttk.Checkbutton(self.panel_controles, text="Edición rápida (vista reducida)",
+                        variable=self.modo_proxy, command=self.cambiar_proxy).pack(pady=5)
+        ttk.Button(self.panel_controles, text="Aplicar a resolución completa",
+                   command=self.consolidar).pack(pady=3)
+
+        # Historial (Ctrl+Z / Ctrl+Y)
+        marco_historial = tk.Frame(self.panel_controles, bg="#2b2b2b")
+        marco_historial.pack(pady=3)
+        ttk.Button(marco_historial, text="Deshacer", command=self.deshacer).pack(side="left", padx=2)
+        ttk.Button(marco_historial, text="Rehacer", command=self.rehacer).pack(side="left", padx=2)
+        self.etiqueta_historial = tk.Label(self.panel_controles, text="", fg="white", bg="#2b2b2b")
+        self.etiqueta_historial.pack()
+        ttk.Button(self.panel_controles, text="Memoria del historial",
+                   command=self.mostrar_memoria_historial).pack(pady=3)
+        self.root.bind("<Control-z>", lambda evento: self.deshacer())
+        self.root.bind("<Control-y>", lambda evento: self.rehacer())
+
+        # Progreso del trabajo en segundo plano (se alimenta desde self.trabajos)
+        self.etiqueta_progreso = tk.Label(self.panel_controles, text="", fg="white", bg="#2b2b2b")
+        self.etiqueta_progreso.pack()
+        self.barra_progreso = ttk.Progressbar(self.panel_controles, length=200, maximum=1.0)
+        self.barra_progreso.pack(pady=3)
+        ttk.Button(self.panel_controles, text="Cancelar", command=self.cancelar_trabajo).pack(pady=3)
         ttk.Separator(self.panel_controles, orient='horizontal').pack(fill='x', pady=10)
 
         # === SECCIÓN: TRANSFORMACIONES ===
@@ -137,6 +266,10 @@ class App:
         ttk.Button(self.panel_controles, text="Negativo", command=self.aplicar_negativo).pack(pady=3)
         ttk.Button(self.panel_controles, text="Escala de Grises", command=self.aplicar_grises).pack(pady=3)
         ttk.Button(self.panel_controles, text="Binarizar", command=self.binarizar).pack(pady=3)
+        ttk.Button(self.panel_controles, text="Binarizar (Otsu)",
+                   command=lambda: self.binarizar("otsu")).pack(pady=3)
+        ttk.Button(self.panel_controles, text="Binarizar adaptativo (Sauvola)",
+                   command=lambda: self.binarizar("sauvola")).pack(pady=3)
         ttk.Button(self.panel_controles, text="Contraste Logarítmico", command=lambda: self.aplicar_contraste(0)).pack(pady=3)
         ttk.Button(self.panel_controles, text="Contraste Exponencial", command=lambda: self.aplicar_contraste(1)).pack(pady=3)
         ttk.Button(self.panel_controles, text="Mostrar Histograma", command=self.mostrar_histograma).pack(pady=3)
@@ -148,17 +281,25 @@ class App:
         self.slider_brillo = tk.Scale(
             self.panel_controles, from_=-0.5, to=0.5, resolution=0.05,
             orient="horizontal", length=200, label="Ajustar brillo",
-            bg="#2b2b2b", fg="white"
+            bg="#2b2b2b", fg="white", command=lambda _: self.previsualizar("brillo")
         )
         self.slider_brillo.pack(pady=5)
+        self.slider_brillo.bind("<ButtonRelease-1>", lambda _: self.confirmar_previa("brillo"))
         ttk.Button(self.panel_controles, text="Aplicar Brillo", command=self.aplicar_brillo).pack(pady=5)
 
         self.slider_canal = tk.Scale(
             self.panel_controles, from_=-0.5, to=0.5, resolution=0.05,
-            orient="horizontal", length=200, label="Ajustar Canal R",
-            bg="#2b2b2b", fg="white"
+            orient="horizontal", length=200, label="Ajustar canal",
+            bg="#2b2b2b", fg="white", command=lambda _: self.previsualizar("canal")
         )
         self.slider_canal.pack(pady=5)
+        self.slider_canal.bind("<ButtonRelease-1>", lambda _: self.confirmar_previa("canal"))
+        # Canal que se previsualiza y se aplica al soltar el slider
+        frame_canal = tk.Frame(self.panel_controles, bg="#2b2b2b")
+        frame_canal.pack()
+        for i, nombre in enumerate("RGB"):
+            tk.Radiobutton(frame_canal, text=nombre, variable=self.canal_previa, value=i,
+                           fg="white", bg="#2b2b2b", selectcolor="#444").pack(side="left")
         ttk.Button(self.panel_controles, text="Aplicar a Canal R", command=lambda: self.ajustar_canal(0)).pack(pady=3)
         ttk.Button(self.panel_controles, text="Aplicar a Canal G", command=lambda: self.ajustar_canal(1)).pack(pady=3)
         ttk.Button(self.panel_controles, text="Aplicar a Canal B", command=lambda: self.ajustar_canal(2)).pack(pady=3)
@@ -169,9 +310,11 @@ class App:
                  font=("Arial", 12, "bold")).pack(pady=5)
         self.slider_angulo = tk.Scale(
             self.panel_controles, from_=-180, to=180, orient="horizontal",
-            length=200, label="Rotar (°)", bg="#2b2b2b", fg="white"
+            length=200, label="Rotar (°)", bg="#2b2b2b", fg="white",
+            command=lambda _: self.previsualizar("rotar")
         )
         self.slider_angulo.pack(pady=5)
+        self.slider_angulo.bind("<ButtonRelease-1>", lambda _: self.confirmar_previa("rotar"))
         ttk.Button(self.panel_controles, text="Aplicar Rotación", command=self.rotar_img).pack(pady=5)
 
         # Zoom visual (no cambia los datos, solo la vista)
@@ -186,78 +329,199 @@ class App:
         ttk.Button(self.panel_controles, text="Reducir", command=self.reducir).pack(pady=3)
         ttk.Separator(self.panel_controles, orient='horizontal').pack(fill='x', pady=10)
 
+        # === SECCIÓN: FILTROS ===
+        tk.Label(self.panel_controles, text="FILTROS", fg="white", bg="#2b2b2b",
+                 font=("Arial", 12, "bold")).pack(pady=5)
+        self.slider_filtro = tk.Scale(
+            self.panel_controles, from_=0.5, to=25, resolution=0.5,
+            orient="horizontal", length=200, label="Radio / sigma (px)",
+            bg="#2b2b2b", fg="white"
+        )
+        self.slider_filtro.set(2.0)
+        self.slider_filtro.pack(pady=5)
+        ttk.Button(self.panel_controles, text="Desenfoque gaussiano",
+                   command=lambda: self.aplicar_filtro("gaussiano")).pack(pady=3)
+        ttk.Button(self.panel_controles, text="Desenfoque de caja",
+                   command=lambda: self.aplicar_filtro("caja")).pack(pady=3)
+        ttk.Button(self.panel_controles, text="Enfocar (máscara de desenfoque)",
+                   command=lambda: self.aplicar_filtro("enfocar")).pack(pady=3)
+        ttk.Button(self.panel_controles, text="Bordes (Sobel)",
+                   command=lambda: self.aplicar_filtro("sobel")).pack(pady=3)
+        ttk.Button(self.panel_controles, text="Mediana (quitar ruido)",
+                   command=lambda: self.aplicar_filtro("mediana")).pack(pady=3)
+        ttk.Separator(self.panel_controles, orient='horizontal').pack(fill='x', pady=10)
+
         # === SECCIÓN: FUSIÓN ===
         tk.Label(self.panel_controles, text="FUSIÓN DE IMÁGENES", fg="white", bg="#2b2b2b",
                  font=("Arial", 12, "bold")).pack(pady=5)
         self.slider_fusion = tk.Scale(
             self.panel_controles, from_=0.0, to=1.0, resolution=0.1,
             orient="horizontal", length=200, label="Factor de fusión",
-            bg="#2b2b2b", fg="white"
+            bg="#2b2b2b", fg="white", command=lambda _: self.previsualizar("fusion")
         )
         self.slider_fusion.pack(pady=5)
+        self.slider_fusion.bind("<ButtonRelease-1>", lambda _: self.confirmar_previa("fusion"))
         ttk.Button(self.panel_controles, text="Fusionar", command=self.fusionar).pack(pady=3)
+        ttk.Button(self.panel_controles, text="Apilar imágenes (promedio)",
+                   command=self.apilar_imagenes).pack(pady=3)
+
+        # Tablas de brillo y de canal de todas las posiciones de los sliders
+        TablasSlider(-0.5, 0.5, 0.05)
+
+        if DIAGNOSTICO:
+            self.cambiar_diagnostico()
 
     # =============== FUNCIONES PRINCIPALES ===============
 
+    def representar(self, img: np.ndarray) -> np.ndarray:
+        """
+        Convierte img a la representación activa: uint8 si self.modo_uint8,
+        float [0,1] en caso contrario (sin copia si ya está en ese formato).
+        """
+        if self.modo_uint8.get():
+            return imgControl.ConvertirUint8(img)
+        return imgControl.ConvertirFloat(img)
+
+    def cambiar_modo(self):
+        """
+        Callback del Checkbutton de modo uint8: consolida los pasos pendientes y
+        convierte las imágenes en memoria (actual, original y segunda) a la nueva
+        representación. El historial se reinicia (sus pasos dependen del tipo).
+        """
+        def convertir():
+            if self.img_original is not None:
+                self.img_original = self.representar(self.img_original)
+            if self.img2 is not None:
+                self.img2 = self.representar(self.img2)
+            if self.img is not None:
+                self.img = self.representar(self.img)
+                self.nueva_sesion()
+
+        self.consolidar(despues=convertir)
+
     def abrir_imagen(self):
         """
         Abre un diálogo para seleccionar un archivo de imagen (JPG/PNG),
-        carga la imagen, la normaliza a float [0,1], guarda una copia original
-        y la muestra en la interfaz.
+        carga la imagen (desde self.cache_imagenes si se abrió hace poco), la
+        normaliza a float [0,1] (o la deja en uint8 en modo uint8) y la muestra.
 
         Efectos secundarios
         -------------------
-        - Actualiza self.img (np.ndarray float en [0,1]).
-        - Actualiza self.img_original con una copia.
+        - Actualiza self.img (np.ndarray float en [0,1], o uint8 de solo lectura).
+        - Actualiza self.img_original.
         - Resetea self.zoom_factor a 1.0.
         """
         ruta = filedialog.askopenfilename(filetypes=[("Imágenes", "*.jpg *.png *.jpeg")])
         if ruta:
-            imgPIL = Image.open(ruta).convert("RGB")
-            self.img = np.array(imgPIL) / 255.0
-            self.img_original = self.img.copy()
+            with Medir("decodificar"):
+                decodificada = self.cache_imagenes.Obtener(ruta)
+            self.img = self.representar(decodificada)
+            self.img_original = self.img
             self.zoom_factor = 1.0
-            self.mostrar_imagen(self.img)
+            self.centro_vista = (0.5, 0.5)
+            self.nueva_sesion()
 
     def abrir_imagen2(self):
         """
         Abre un diálogo para seleccionar la segunda imagen (para fusión).
-        Convierte la imagen a RGB y la deja en self.img2 (normalizada [0,1]).
+        Convierte la imagen a RGB y la deja en self.img2 (normalizada [0,1]);
+        usa self.cache_imagenes como abrir_imagen.
         Muestra un messagebox informando que la imagen 2 fue cargada.
         """
         ruta = filedialog.askopenfilename(filetypes=[("Imágenes", "*.jpg *.png *.jpeg")])
         if ruta:
-            imgPIL = Image.open(ruta).convert("RGB")
-            self.img2 = np.array(imgPIL) / 255.0
+            with Medir("decodificar"):
+                decodificada = self.cache_imagenes.Obtener(ruta)
+            self.img2 = self.representar(decodificada)
             messagebox.showinfo("Imagen 2", "Segunda imagen cargada correctamente")
 
-    def mostrar_imagen(self, img: np.ndarray, zoom_factor: float | None = None):
+    def mostrar_imagen(self, img: np.ndarray, zoom_factor: float | None = None,
+                       piramide: Piramide | None = None):
         """
-        Muestra la imagen proporcionada en el panel de visualización.
+        Muestra la imagen proporcionada en el panel de visualización
+        (ver mostrar_actual para la imagen en edición).
 
         Parámetros
         ----------
         img : np.ndarray
-            Imagen en formato (h,w,3) con valores float en [0,1].
+            Imagen en formato (h,w,3) con valores float en [0,1] (o uint8).
         zoom_factor : float, opcional
             Factor de zoom visual (si es None se usa self.zoom_factor).
+        piramide : Piramide, opcional
+            Pirámide ya preparada para img (p. ej. por el hilo trabajador).
 
         Comportamiento
         -------------
-        - Convierte a uint8 (0..255) y crea un Image de PIL.
-        - Redimensiona la imagen según el zoom visual antes de crear el PhotoImage.
-        - Asigna la PhotoImage al widget self.panel_imagen y guarda una referencia.
+        - La pirámide uint8 (self.piramide) solo se rehace si cambia la imagen;
+          un cambio de zoom o de desplazamiento reutiliza la existente.
+        - Se dibuja solo la región visible (ver renderizar).
         """
         if zoom_factor is None:
             zoom_factor = self.zoom_factor
-        h, w = img.shape[:2]
-        new_h = max(1, int(h * zoom_factor))
-        new_w = max(1, int(w * zoom_factor))
-        imgPIL = Image.fromarray((img * 255).astype(np.uint8))
-        imgPIL = imgPIL.resize((new_w, new_h))
-        self.imgTk = ImageTk.PhotoImage(imgPIL)
-        self.panel_imagen.config(image=self.imgTk)
-        self.panel_imagen.image = self.imgTk  # mantener referencia
+        if self.piramide is None or self.piramide.img is not img:
+            if piramide is None or piramide.img is not img:
+                with Medir("piramide"):
+                    piramide = Piramide(img)
+            self.piramide = piramide
+            self.actualizar_histograma(piramide.NivelHasta(PIXELES_HISTOGRAMA))
+        self.zoom_vista = zoom_factor
+        self.renderizar()
+
+    def renderizar(self):
+        """
+        Dibuja la región visible de self.piramide con self.zoom_vista, centrada en
+        self.centro_vista (fracciones del ancho y alto de la imagen).
+
+        - Se muestrea solo la ventana visible desde el nivel de la pirámide adecuado.
+        - La PhotoImage se actualiza en sitio (paste) si no cambió de tamaño.
+        """
+        if self.piramide is None:
+            return
+        with Medir("renderizar"):
+            region = self.piramide.Ventana(self.zoom_vista, *self.ventana_visible())
+        self.pintar(region)
+
+    def ventana_visible(self) -> tuple[int, int, int, int]:
+        """(x0, y0, ancho, alto) de la región visible de self.piramide, en píxeles de pantalla."""
+        piramide = self.piramide
+        ancho_vista, alto_vista = self.tam_vista()
+        ancho_total = piramide.ancho * self.zoom_vista
+        alto_total = piramide.alto * self.zoom_vista
+        ancho = max(1, min(ancho_vista, int(ancho_total)))
+        alto = max(1, min(alto_vista, int(alto_total)))
+        cx, cy = self.centro_vista
+        x0 = int(min(max(cx * ancho_total - ancho / 2, 0), max(0, ancho_total - ancho)))
+        y0 = int(min(max(cy * alto_total - alto / 2, 0), max(0, alto_total - alto)))
+        return x0, y0, ancho, alto
+
+    def pintar(self, region: np.ndarray):
+        """Muestra una región uint8 del tamaño de la vista (en sitio si no cambió de tamaño)."""
+        alto, ancho = region.shape[:2]
+        with Medir("photoimage"):
+            imgPIL = Image.fromarray(region)
+            if self.imgTk is not None and (self.imgTk.width(), self.imgTk.height()) == (ancho, alto):
+                self.imgTk.paste(imgPIL)
+            else:
+                self.imgTk = ImageTk.PhotoImage(imgPIL)
+                self.panel_imagen.config(image=self.imgTk)
+                self.panel_imagen.image = self.imgTk  # mantener referencia
+
+    def iniciar_arrastre(self, evento):
+        """Callback de clic sobre la imagen: empieza a desplazar la vista."""
+        self.arrastre = (evento.x, evento.y)
+
+    def arrastrar(self, evento):
+        """Callback de arrastre: desplaza la vista (solo se redibuja la región visible)."""
+        if self.piramide is None or self.arrastre is None:
+            return
+        dx = evento.x - self.arrastre[0]
+        dy = evento.y - self.arrastre[1]
+        self.arrastre = (evento.x, evento.y)
+        cx, cy = self.centro_vista
+        cx -= dx / (self.piramide.ancho * self.zoom_vista)
+        cy -= dy / (self.piramide.alto * self.zoom_vista)
+        self.centro_vista = (min(max(cx, 0.0), 1.0), min(max(cy, 0.0), 1.0))
+        self.renderizar()
 
     def guardar_imagen(self):
         """
@@ -265,16 +529,20 @@ class App:
 
         Comportamiento
         -------------
-        - Convierte la imagen de float [0,1] a uint8 [0,255].
+        - En modo proxy primero reproduce los pasos pendientes a resolución completa.
+        - Convierte la imagen de float [0,1] a uint8 [0,255] (si no está ya en uint8).
         - Permite elegir ruta y nombre (extensión por defecto .png).
         - Muestra un messagebox de confirmación al finalizar.
         """
         if self.img is not None:
             ruta = filedialog.asksaveasfilename(defaultextension=".png")
             if ruta:
-                imgPIL = Image.fromarray((self.img * 255).astype(np.uint8))
-                imgPIL.save(ruta)
-                messagebox.showinfo("Guardado", "Imagen guardada con éxito")
+                def guardar():
+                    imgPIL = Image.fromarray(imgControl.ConvertirUint8(self.img))
+                    imgPIL.save(ruta)
+                    messagebox.showinfo("Guardado", "Imagen guardada con éxito")
+
+                self.consolidar(despues=guardar)
 
     def restaurar_original(self):
         """
@@ -286,65 +554,575 @@ class App:
 
         Efectos secundarios
         -------------------
-        - Actualiza self.img con una copia de self.img_original.
+        - Es un paso más del historial: se puede deshacer.
         - Resetea el zoom visual a 1.0 y actualiza la vista.
         - Muestra un messagebox indicando que se restauró la imagen.
         """
         if self.img_original is not None:
-            self.img = self.img_original.copy()
+            original = self.img_original
+
+            def restaurar(img, escala, progreso, cancelar):
+                if escala < 1.0:
+                    return imgControl.ReducirResolucion(original, 1 / escala)
+                return original.copy()
+
+            self.transformar("Restaurar", restaurar, escalable=True, despues=lambda: messagebox.showinfo(
+                "Restaurada", "La imagen ha sido restaurada a su estado original"))
             self.zoom_factor = 1.0
-            self.mostrar_imagen(self.img)
-            messagebox.showinfo("Restaurada", "La imagen ha sido restaurada a su estado original")
+            self.actualizar_zoom()
+
+    # =============== SESIÓN: EDICIÓN CON VISTA REDUCIDA E HISTORIAL ===============
+    # Los modelos (self.edicion, self.historial) solo se modifican en el hilo
+    # trabajador, al confirmar cada trabajo (ver GestorTrabajos, al_confirmar), así
+    # siguen el mismo orden que los trabajos. El hilo principal solo los lee para mostrar.
+
+    def tam_vista(self) -> tuple[int, int]:
+        """Tamaño (ancho, alto) disponible para la imagen (estimado si la ventana no se ha dibujado)."""
+        ancho = self.root.winfo_width() - 300
+        alto = self.root.winfo_height()
+        if ancho < 100 or alto < 100:
+            return 900, 700
+        return ancho, alto
+
+    def nueva_sesion(self):
+        """
+        Empieza de cero a partir de self.img (al abrir una imagen o cambiar de
+        representación): historial vacío, edición nueva y trabajos cancelados.
+        """
+        self.historial = Historial(self.img, self.presupuesto_historial,
+                                   mapear=self.ejecutor.Mapear)
+        if self.modo_proxy.get():
+            self.edicion = Edicion(self.img, *self.tam_vista(), self.zoom_factor)
+            self.trabajos.Reiniciar(self.edicion.proxy)
+        else:
+            self.edicion = None
+            self.trabajos.Reiniciar(self.img)
+        self.mostrar_actual()
+
+    def mostrar_actual(self, piramide: Piramide | None = None):
+        """Muestra la imagen en edición: el proxy en modo proxy, self.img en otro caso."""
+        edicion = self.edicion
+        if edicion is not None:
+            self.mostrar_imagen(edicion.proxy, edicion.ampliacion, piramide)
+        elif self.img is not None:
+            self.mostrar_imagen(self.img, piramide=piramide)
+        self.actualizar_etiqueta_historial()
+
+    def enviar(self, nombre: str, calcular, clave=None, despues=None):
+        """
+        Envía un trabajo encadenado al hilo trabajador.
+
+        calcular(estado, progreso, cancelar) -> (resultado, confirmar): resultado es el
+        nuevo estado (imagen completa o proxy) y confirmar() (o None) aplica los
+        cambios a los modelos si el trabajo no se cancela. despues() se llama en el
+        hilo principal una vez mostrado el resultado.
+        """
+        pendiente = {}
+
+        def funcion(estado, progreso, cancelar):
+            with Medir(nombre, "transformacion"):
+                resultado, pendiente["confirmar"] = calcular(estado, progreso, cancelar)
+            # La pirámide para mostrar también se arma aquí, fuera del hilo principal
+            # (incluye la conversión float -> uint8 con recorte)
+            edicion = self.edicion
+            zoom = edicion.ampliacion if edicion is not None else self.zoom_factor
+            with Medir("piramide"):
+                pendiente["piramide"] = Piramide(resultado).Preparar(zoom)
+            return resultado
+
+        def al_confirmar(resultado):
+            if pendiente.get("confirmar") is not None:
+                pendiente["confirmar"]()
+
+        def al_terminar(resultado):
+            self.aplicar_resultado(resultado, pendiente.get("piramide"))
+            if despues is not None:
+                despues()
+
+        self.trabajos.Enviar(funcion, nombre=nombre, clave=clave, encadenado=True,
+                             al_terminar=al_terminar, al_error=self.mostrar_error,
+                             al_confirmar=al_confirmar)
+
+    def aplicar_resultado(self, resultado: np.ndarray, piramide: Piramide | None = None):
+        """
+        Callback (hilo principal): sincroniza self.img (en modo proxy es la base a
+        resolución completa de la edición) y muestra la imagen en edición.
+        """
+        edicion = self.edicion
+        self.img = edicion.base if edicion is not None else resultado
+        self.mostrar_actual(piramide)
+
+    def cambiar_proxy(self):
+        """
+        Callback del Checkbutton de edición rápida. Al desactivarlo se consolidan
+        primero los pasos pendientes.
+        """
+        if self.img is None:
+            return
+        if self.modo_proxy.get():
+            ancho, alto = self.tam_vista()
+            zoom = self.zoom_factor
+
+            def activar(estado, progreso, cancelar):
+                if self.edicion is not None:
+                    return estado, None
+                edicion = Edicion(estado, ancho, alto, zoom)
+                return edicion.proxy, lambda: setattr(self, "edicion", edicion)
+
+            self.enviar("Vista reducida", activar)
+        else:
+            self.consolidar()
+
+            def desactivar(estado, progreso, cancelar):
+                edicion = self.edicion
+                if edicion is None:
+                    return estado, None
+                return edicion.base, lambda: setattr(self, "edicion", None)
+
+            self.enviar("Resolución completa", desactivar)
+
+    def consolidar(self, despues=None):
+        """
+        Reproduce a resolución completa (en segundo plano) los pasos pendientes del
+        proxy y adopta el resultado como base (queda como un paso del historial).
+
+        Parámetros
+        ----------
+        despues : callable, opcional
+            Se llama en el hilo principal cuando self.img ya está al día.
+        """
+        if self.img is None:
+            if despues is not None:
+                despues()
+            return
+
+        def calcular(estado, progreso, cancelar):
+            edicion, historial = self.edicion, self.historial
+            if edicion is None or not edicion.pasos:
+                return estado, None
+            pasos = list(edicion.pasos)
+            completa = edicion.Consolidar(self.ejecutor, progreso, cancelar, pasos)
+            entrada = historial.Preparar(
+                " + ".join(p.nombre for p in pasos), edicion.base, completa,
+                rehacer=lambda img: Reproducir(img, pasos, 1.0, self.ejecutor))
+
+            def confirmar():
+                edicion.Rebasar(completa, len(pasos))
+                historial.Registrar(entrada)
+            return estado, confirmar
+
+        self.enviar("Resolución completa", calcular, despues=despues)
+
+    def transformar(self, nombre: str, funcion=None, clave=None, cadena=None, escalable=False,
+                    despues=None, geometria=None):
+        """
+        Envía una transformación al hilo trabajador.
+
+        Parámetros
+        ----------
+        nombre : str
+            Texto que se muestra junto a la barra de progreso.
+        funcion : callable, opcional
+            funcion(img, progreso, cancelar) -> nueva imagen. Recibe el resultado de
+            la transformación anterior aunque todavía no se haya mostrado.
+        clave : hashable, opcional
+            Los pedidos pendientes con la misma clave se fusionan (solo corre el último).
+        cadena : Pipeline, opcional
+            Para operaciones puntuales, en lugar de funcion (se fusionan al consolidar
+            y, si no saturan, se deshacen con la cadena inversa).
+        escalable : bool
+            funcion recibe además la escala del proxy: funcion(img, escala, progreso, cancelar).
+        despues : callable, opcional
+            Se llama en el hilo principal al terminar.
+        geometria : Geometria, opcional
+            Para operaciones geométricas, en lugar de funcion (los pasos
+            consecutivos se componen en un solo remuestreo al consolidar).
+        """
+        if self.img is None:
+            return
+        paso = Paso(nombre, funcion, cadena, escalable, geometria)
+
+        def calcular(estado, progreso, cancelar):
+            edicion, historial = self.edicion, self.historial
+            if edicion is not None:
+                proxy = paso.Aplicar(estado, edicion.escala, self.ejecutor, progreso, cancelar)
+
+                def confirmar():
+                    edicion.Agregar(paso, proxy)
+                    historial.DescartarRehacer()
+                return proxy, confirmar
+
+            resultado = paso.Aplicar(estado, 1.0, self.ejecutor, progreso, cancelar)
+            inversa = InversaPuntual(cadena, estado) if cadena is not None else None
+            entrada = historial.Preparar(
+                nombre, estado, resultado,
+                rehacer=lambda img: paso.Aplicar(img, 1.0, self.ejecutor),
+                inversa=None if inversa is None else lambda img: self.ejecutor.Aplicar(inversa, img))
+            return resultado, lambda: historial.Registrar(entrada)
+
+        self.enviar(nombre, calcular, clave, despues)
+
+    # =============== HISTORIAL (DESHACER / REHACER) ===============
+
+    def deshacer(self):
+        """
+        Deshace el último paso: primero los pasos pendientes del proxy (se
+        recalculan desde la base reducida); luego, el historial a resolución completa.
+        """
+        if self.img is None:
+            return
+
+        def calcular(estado, progreso, cancelar):
+            edicion, historial = self.edicion, self.historial
+            if edicion is not None and edicion.pasos:
+                proxy = edicion.Anterior()
+                return proxy, lambda: edicion.Deshacer(proxy)
+            if not historial.PuedeDeshacer():
+                return estado, None
+            if edicion is None:
+                return historial.Anterior(estado), lambda: historial.Mover(-1)
+            vista = edicion.CalcularVista(*edicion.vista, base=historial.Anterior(edicion.base))
+
+            def confirmar():
+                historial.Mover(-1)
+                edicion.AdoptarVista(vista)
+            return vista["proxy"], confirmar
+
+        self.enviar("Deshacer", calcular)
+
+    def rehacer(self):
+        """Rehace el último paso deshecho (en el orden inverso al de deshacer)."""
+        if self.img is None:
+            return
+
+        def calcular(estado, progreso, cancelar):
+            edicion, historial = self.edicion, self.historial
+            if historial.PuedeRehacer():
+                if edicion is None:
+                    return historial.Siguiente(estado), lambda: historial.Mover(1)
+                vista = edicion.CalcularVista(*edicion.vista, base=historial.Siguiente(edicion.base))
+
+                def confirmar():
+                    historial.Mover(1)
+                    edicion.AdoptarVista(vista)
+                return vista["proxy"], confirmar
+            if edicion is not None and edicion.deshechos:
+                proxy = edicion.Siguiente(self.ejecutor)
+                return proxy, lambda: edicion.Rehacer(proxy)
+            return estado, None
+
+        self.enviar("Rehacer", calcular)
+
+    def actualizar_etiqueta_historial(self):
+        """Resume el historial: pasos aplicados, pasos del proxy y memoria usada."""
+        historial, edicion = self.historial, self.edicion
+        if historial is None:
+            return
+        texto = f"Pasos: {historial.indice}/{len(historial.entradas)}"
+        if edicion is not None and (edicion.pasos or edicion.deshechos):
+            texto += f" (+{len(edicion.pasos)} sin consolidar)"
+        texto += f" · {historial.bytes_usados / 2**20:.1f} MiB"
+        self.etiqueta_historial.config(text=texto)
+
+    def mostrar_memoria_historial(self):
+        """Muestra la memoria que ocupa cada entrada del historial."""
+        if self.historial is None:
+            return
+        lineas = []
+        for fila in self.historial.Memoria():
+            marca = "" if fila["aplicada"] else " (deshecha)"
+            lineas.append(f"{fila['nombre']}{marca}: {fila['tipo']}, {fila['bytes'] / 2**20:.2f} MiB")
+        lineas.append(f"Total: {self.historial.bytes_usados / 2**20:.1f} MiB de "
+                      f"{self.historial.presupuesto_bytes / 2**20:.0f} MiB")
+        messagebox.showinfo("Memoria del historial", "\n".join(lineas))
+
+    def mostrar_cache_imagenes(self):
+        """Muestra los contadores de la caché de imágenes decodificadas."""
+        e = self.cache_imagenes.Estadisticas()
+        disco = self.cache_imagenes.directorio or "desactivada (PROCESAMIENTOIMG_CACHE)"
+        messagebox.showinfo("Caché de imágenes", "\n".join([
+            f"Aciertos en memoria: {e['aciertos_memoria']}",
+            f"Aciertos en disco: {e['aciertos_disco']}",
+            f"Decodificadas: {e['fallos']}",
+            f"Tasa de aciertos: {e['tasa_aciertos']:.0%}",
+            f"Decodificación ahorrada: {e['bytes_ahorrados'] / 2**20:.1f} MiB",
+            f"En memoria: {e['imagenes_memoria']} imágenes, {e['bytes_memoria'] / 2**20:.1f} MiB",
+            f"Caché en disco: {disco}",
+        ]))
+
+    # =============== DIAGNÓSTICO (instrumentacion.py) ===============
+
+    def cambiar_diagnostico(self):
+        """
+        Callback de los Checkbutton del panel de diagnóstico: activa o desactiva
+        la medición (envuelve las funciones de imgControl y filtros) y la sonda
+        del bucle de Tk.
+        """
+        if self.medir.get():
+            INSTRUMENTOS.Desactivar()  # para cambiar el seguimiento de memoria
+            INSTRUMENTOS.Activar(memoria=self.medir_memoria.get())
+            INSTRUMENTOS.Envolver(imgControl, filtros)
+            if self.id_sonda is None:
+                self.id_sonda = self.root.after(INTERVALO_SONDA_TK_MS, self.sondear_tk,
+                                                time.perf_counter())
+        else:
+            INSTRUMENTOS.Desactivar()
+
+    def sondear_tk(self, agendado: float):
+        """
+        Mide cuánto tarde llega un root.after: el tiempo que el bucle de eventos
+        estuvo ocupado (la ventana no respondía) aparece como "retraso" en "tk".
+        """
+        if not INSTRUMENTOS.activo:
+            self.id_sonda = None
+            return
+        retraso = time.perf_counter() - agendado - INTERVALO_SONDA_TK_MS / 1000
+        INSTRUMENTOS.Registrar("retraso", max(0.0, retraso), "tk")
+        self.id_sonda = self.root.after(INTERVALO_SONDA_TK_MS, self.sondear_tk,
+                                        time.perf_counter())
+
+    def mostrar_diagnostico(self):
+        """
+        Abre (o trae al frente) el panel de diagnóstico: tabla por operación
+        (llamadas, media, p50/p90/p99, máximo y pico de memoria) que se actualiza
+        cada medio segundo, captura de perfil y exportación a JSON o traza de Chrome.
+        """
+        if self.ventana_diagnostico is not None:
+            self.ventana_diagnostico.lift()
+            return
+        ventana = self.ventana_diagnostico = tk.Toplevel(self.root)
+        ventana.title("Diagnóstico")
+        ventana.configure(bg="#222")
+        ventana.protocol("WM_DELETE_WINDOW", self.cerrar_diagnostico)
+
+        controles = tk.Frame(ventana, bg="#222")
+        controles.pack(fill="x", padx=5, pady=5)
+        ttk.Checkbutton(controles, text="Medir", variable=self.medir,
+                        command=self.cambiar_diagnostico).pack(side="left", padx=3)
+        ttk.Checkbutton(controles, text="Memoria (tracemalloc)", variable=self.medir_memoria,
+                        command=self.cambiar_diagnostico).pack(side="left", padx=3)
+        self.boton_perfil = ttk.Button(controles, text="Iniciar perfil", command=self.alternar_perfil)
+        self.boton_perfil.pack(side="left", padx=3)
+        ttk.Button(controles, text="Exportar JSON",
+                   command=lambda: self.exportar_diagnostico("json")).pack(side="left", padx=3)
+        ttk.Button(controles, text="Exportar traza (Chrome)",
+                   command=lambda: self.exportar_diagnostico("chrome")).pack(side="left", padx=3)
+        ttk.Button(controles, text="Limpiar", command=INSTRUMENTOS.Limpiar).pack(side="left", padx=3)
+
+        columnas = ("llamadas", "media", "p50", "p90", "p99", "maximo", "pico")
+        tabla = self.tabla_diagnostico = ttk.Treeview(ventana, columns=columnas, height=14)
+        tabla.heading("#0", text="Operación")
+        tabla.column("#0", width=240)
+        for columna, titulo in zip(columnas, ("Llamadas", "Media ms", "p50 ms", "p90 ms",
+                                              "p99 ms", "Máx ms", "Pico MiB")):
+            tabla.heading(columna, text=titulo)
+            tabla.column(columna, width=80, anchor="e")
+        tabla.pack(fill="both", expand=True, padx=5)
+
+        self.texto_perfil = tk.Text(ventana, height=12, bg="#111", fg="white", font=("Courier", 9))
+        self.texto_perfil.pack(fill="both", expand=True, padx=5, pady=5)
+        self.actualizar_diagnostico()
+
+    def actualizar_diagnostico(self):
+        """Redibuja la tabla del panel de diagnóstico (cada 500 ms mientras está abierto)."""
+        if self.ventana_diagnostico is None:
+            return
+        tabla = self.tabla_diagnostico
+        tabla.delete(*tabla.get_children())
+        for fila in INSTRUMENTOS.Resumen():
+            tabla.insert("", "end", text=f"{fila['categoria']}: {fila['nombre']}", values=(
+                fila["llamadas"], f"{fila['media_s'] * 1e3:.2f}", f"{fila['p50_s'] * 1e3:.2f}",
+                f"{fila['p90_s'] * 1e3:.2f}", f"{fila['p99_s'] * 1e3:.2f}",
+                f"{fila['maximo_s'] * 1e3:.2f}", f"{fila['pico_bytes'] / 2**20:.1f}"))
+        self.root.after(500, self.actualizar_diagnostico)
+
+    def alternar_perfil(self):
+        """Inicia o detiene la captura con cProfile + tracemalloc y muestra el informe."""
+        if not INSTRUMENTOS.perfilando:
+            if not self.medir.get():
+                self.medir.set(True)
+                self.cambiar_diagnostico()
+            INSTRUMENTOS.IniciarPerfil()
+            self.boton_perfil.config(text="Detener perfil")
+            return
+        informe = INSTRUMENTOS.DetenerPerfil()
+        self.boton_perfil.config(text="Iniciar perfil")
+        self.texto_perfil.delete("1.0", "end")
+        self.texto_perfil.insert("end", informe["perfil"])
+        if informe["memoria"]:
+            self.texto_perfil.insert("end", "\nAsignaciones durante la captura:\n" + informe["memoria"])
+
+    def exportar_diagnostico(self, formato: str):
+        """Guarda el resumen (JSON) o los eventos (traza de Chrome / Perfetto)."""
+        ruta = filedialog.asksaveasfilename(defaultextension=".json",
+                                            filetypes=[("JSON", "*.json")])
+        if not ruta:
+            return
+        if formato == "json":
+            INSTRUMENTOS.ExportarJSON(ruta)
+        else:
+            INSTRUMENTOS.ExportarChrome(ruta)
+
+    def cerrar_diagnostico(self):
+        """Cierra el panel (la medición sigue activa si estaba activada)."""
+        self.ventana_diagnostico.destroy()
+        self.ventana_diagnostico = None
+        self.tabla_diagnostico = None
+        self.texto_perfil = None
+
+    # =============== TRABAJOS EN SEGUNDO PLANO ===============
+
+    def mostrar_error(self, error: Exception):
+        """Callback (hilo principal) cuando un trabajo falla."""
+        messagebox.showerror("Error", f"No se pudo aplicar la transformación:\n{error}")
+
+    def mostrar_progreso(self, fraccion: float | None, nombre: str):
+        """Actualiza la barra de progreso (fraccion None = sin trabajo en curso)."""
+        if fraccion is None:
+            self.barra_progreso["value"] = 0
+            self.etiqueta_progreso.config(text="")
+        else:
+            self.barra_progreso["value"] = fraccion
+            self.etiqueta_progreso.config(text=f"{nombre}... {fraccion * 100:.0f}%")
+
+    def cancelar_trabajo(self):
+        """Cancela el trabajo en curso y descarta los pendientes."""
+        self.trabajos.Cancelar()
+
+    # =============== VISTA PREVIA DE LOS SLIDERS ===============
+    # Cada movimiento de un slider solo agenda un cuadro; los movimientos que llegan
+    # antes del siguiente cuadro se funden (se lee el valor del slider al dibujar).
+    # El cuadro se calcula sobre la región visible (VistaPrevia) y la transformación
+    # real se envía al soltar el slider.
+
+    def previsualizar(self, tipo: str):
+        """Callback de los sliders: agenda un cuadro de vista previa (a lo sumo uno por cuadro)."""
+        if self.piramide is None:
+            return
+        self.tipo_previa = tipo
+        if self.id_previa is None:
+            # Si un cuadro tarda más que el presupuesto se espacian según su costo
+            intervalo = max(PRESUPUESTO_CUADRO_MS, self.costo_previa_ms)
+            espera = intervalo - (time.perf_counter() - self.ultima_previa) * 1000
+            self.id_previa = self.root.after(max(1, int(espera)), self.dibujar_previa)
+
+    def dibujar_previa(self):
+        """Dibuja la vista previa del slider activo sobre la región visible."""
+        self.id_previa = None
+        tipo = self.tipo_previa
+        if self.piramide is None or tipo is None:
+            return
+        inicio = time.perf_counter()
+        ventana = self.ventana_visible()
+        if self.previa is None or not self.previa.Vigente(self.piramide, self.zoom_vista, ventana):
+            self.previa = VistaPrevia(self.piramide, self.zoom_vista, ventana)
+        previa = self.previa
+        if tipo == "brillo":
+            region = previa.Brillo(self.slider_brillo.get())
+        elif tipo == "canal":
+            region = previa.Canal(self.canal_previa.get(), self.slider_canal.get())
+        elif tipo == "rotar":
+            region = previa.Rotacion(self.slider_angulo.get())
+        else:
+            if self.img2 is None:
+                return
+            if self.piramide2 is None or self.piramide2.img is not self.img2:
+                self.piramide2 = Piramide(self.img2)
+            # En modo proxy la segunda imagen se muestrea a la escala del proxy
+            escala = self.edicion.escala if self.edicion is not None else 1.0
+            region = previa.Fusion(self.slider_fusion.get(), self.piramide2,
+                                   self.zoom_vista * escala)
+        self.pintar(region)
+        self.ultima_previa = time.perf_counter()
+        self.costo_previa_ms = (self.ultima_previa - inicio) * 1000
+        INSTRUMENTOS.Registrar(f"previa {tipo}", self.ultima_previa - inicio)
+
+    def confirmar_previa(self, tipo: str):
+        """
+        Callback al soltar un slider: aplica la transformación real con el valor
+        final (solo si el slider se movió; un valor neutro no crea un paso).
+        """
+        if self.tipo_previa != tipo:
+            return
+        self.tipo_previa = None
+        if self.id_previa is not None:
+            self.root.after_cancel(self.id_previa)
+            self.id_previa = None
+        self.previa = None
+        if tipo == "brillo" and self.slider_brillo.get() != 0:
+            self.aplicar_brillo()
+        elif tipo == "canal" and self.slider_canal.get() != 0:
+            self.ajustar_canal(self.canal_previa.get())
+        elif tipo == "rotar" and self.slider_angulo.get() != 0:
+            self.rotar_img()
+        elif tipo == "fusion" and self.img2 is not None:
+            self.fusionar()
+        else:
+            self.renderizar()
 
     # =============== TRANSFORMACIONES (llaman a imgControl) ===============
 
     def aplicar_negativo(self):
         """
-        Aplica el negativo a la imagen actual usando imgControl.Negativo.
+        Aplica el negativo a la imagen actual (Pipeline().Negativo(), igual a imgControl.Negativo;
+        como cadena se fusiona con los pasos puntuales vecinos al consolidar).
 
         Requisito
         ---------
         - self.img no debe ser None.
         """
-        if self.img is not None:
-            self.img = imgControl.Negativo(self.img)
-            self.mostrar_imagen(self.img)
+        self.transformar("Negativo", cadena=Pipeline().Negativo())
 
     def aplicar_grises(self):
         """
         Convierte la imagen actual a escala de grises usando imgControl.Grises,
         y vuelve a convertir a formato RGB (tres canales iguales) para mantener la consistencia.
         """
-        if self.img is not None:
-            gris = imgControl.Grises(self.img)
-            gris_rgb = np.stack((gris, gris, gris), axis=2)
-            self.img = gris_rgb
-            self.mostrar_imagen(self.img)
+        def grises(img, progreso, cancelar):
+            gris = self.ejecutor.Aplicar(imgControl.Grises, img, progreso=progreso, cancelar=cancelar)
+            return np.stack((gris, gris, gris), axis=2)
+
+        self.transformar("Escala de grises", grises)
 
-    def binarizar(self):
+    def binarizar(self, metodo: str = "fijo"):
         """
-        Binariza la imagen actual usando un umbral fijo (0.5).
-        - Usa imgControl.Binaria que retorna una máscara booleana.
-        - Convierte la máscara a float y la muestra en RGB.
+        Binariza la imagen actual.
+
+        Parámetros
+        ----------
+        metodo : str
+            "fijo" (umbral 0.5), "otsu" (umbral global calculado del histograma
+            de luminancia, umbral.Otsu) o "sauvola" (umbral local por ventanas de
+            31x31 px, umbral.Adaptativo; útil con iluminación despareja).
+
+        - El umbral fijo y el de Otsu usan imgControl.Binaria (máscara booleana).
+        - Convierte la máscara a la representación activa y la muestra en RGB.
         """
-        if self.img is not None:
-            umbral = 0.5
-            binaria = imgControl.Binaria(self.img, umbral)
-            binaria_rgb = np.stack((binaria, binaria, binaria), axis=2)
-            self.img = binaria_rgb.astype(float)
-            self.mostrar_imagen(self.img)
+        convertir = imgControl.ConvertirUint8 if self.modo_uint8.get() else imgControl.ConvertirFloat
+
+        def binarizar(img, escala, progreso, cancelar):
+            if metodo == "sauvola":
+                # La ventana se mide en píxeles de la imagen completa
+                binaria = Adaptativo(img, radio=max(1, round(15 * escala)), metodo="sauvola",
+                                     mapear=self.ejecutor.Mapear)
+                progreso(1, 1)
+            else:
+                umbral = Otsu(img) if metodo == "otsu" else 0.5
+                binaria = self.ejecutor.Aplicar(imgControl.Binaria, img, umbral,
+                                                progreso=progreso, cancelar=cancelar)
+            return convertir(np.stack((binaria, binaria, binaria), axis=2))
+
+        nombres = {"fijo": "Binarizar", "otsu": "Binarizar (Otsu)", "sauvola": "Binarizar (Sauvola)"}
+        self.transformar(nombres[metodo], binarizar, escalable=True)
 
     def aplicar_brillo(self):
         """
         Ajusta el brillo de la imagen actual según el valor del slider self.slider_brillo.
-        - Llama a imgControl.SumarBrillo.
-        - Aplica np.clip para mantener valores en [0,1].
+        - Equivale a imgControl.SumarBrillo seguido de np.clip a [0,1], pero
+          fusionado en una sola pasada con Pipeline (sin temporales intermedios).
         """
-        if self.img is not None:
-            brillo = self.slider_brillo.get()
-            self.img = imgControl.SumarBrillo(self.img, brillo)
-            self.img = np.clip(self.img, 0, 1)
-            self.mostrar_imagen(self.img)
+        cadena = Pipeline().SumarBrillo(self.slider_brillo.get()).Clip()
+        self.transformar("Brillo", cadena=cadena, clave="brillo")
 
     def ajustar_canal(self, canal: int):
         """
@@ -354,12 +1132,11 @@ class App:
         ----------
         canal : int
             Índice del canal a ajustar (0=R, 1=G, 2=B).
+
+        Usa Pipeline (AjusteCanal + Clip fusionados en una pasada).
         """
-        if self.img is not None:
-            ajuste = self.slider_canal.get()
-            self.img = imgControl.AjusteCanal(self.img, canal, ajuste)
-            self.img = np.clip(self.img, 0, 1)
-            self.mostrar_imagen(self.img)
+        cadena = Pipeline().AjusteCanal(canal, self.slider_canal.get()).Clip()
+        self.transformar("Canal", cadena=cadena, clave=("canal", canal))
 
     def aplicar_contraste(self, tipo: int):
         """
@@ -371,21 +1148,63 @@ class App:
         ----------
         tipo : int
             Selector del tipo de contraste (0 log, 1 exp).
+
+        Usa Pipeline (AjusteContraste + Clip fusionados en una pasada).
         """
-        if self.img is not None:
-            self.img = imgControl.AjusteContraste(self.img, tipo, 1.2)
-            self.img = np.clip(self.img, 0, 1)
-            self.mostrar_imagen(self.img)
+        cadena = Pipeline().AjusteContraste(tipo, 1.2).Clip()
+        self.transformar("Contraste", cadena=cadena)
 
     def rotar_img(self):
         """
         Rota la imagen actual por el ángulo seleccionado en self.slider_angulo.
-        - Usa imgControl.RotarImg que devuelve una nueva matriz rotada.
+        - Es un paso de Geometria con "vecino": en modo proxy las rotaciones
+          consecutivas se componen y la imagen completa se remuestrea una sola
+          vez al consolidar. Una rotación sola coincide con imgControl.RotarImg
+          salvo en los píxeles cuya coordenada fuente cae justo en x.5 (p. ej.
+          a 30° o 60°): la matriz compuesta puede quedar a un ulp del empate y
+          redondear al otro vecino. Varias rotaciones compuestas no dan lo
+          mismo que aplicarlas una por una (ver geometria.py).
+        - Se calcula por franjas en segundo plano (cancelable).
+        - Pulsaciones repetidas mientras hay una rotación en cola se fusionan.
         """
-        if self.img is not None:
-            angulo = self.slider_angulo.get()
-            self.img = imgControl.RotarImg(self.img, angulo)
-            self.mostrar_imagen(self.img)
+        angulo = self.slider_angulo.get()
+        self.transformar("Rotación", geometria=Geometria("vecino").RotarImg(angulo), clave="rotar")
+
+    def aplicar_filtro(self, tipo: str):
+        """
+        Aplica un filtro de filtros.py con el radio (o sigma) de self.slider_filtro.
+
+        Parámetros
+        ----------
+        tipo : str
+            "gaussiano" (sigma), "caja" (radio), "enfocar" (máscara de desenfoque
+            con sigma y cantidad 1), "sobel" (magnitud del gradiente, no usa el
+            slider) o "mediana" (radio; conviene 1 a 3, el costo crece con radio^2).
+
+        - Se calcula por franjas en segundo plano con self.ejecutor (cada franja
+          lee su halo de vecinos, el resultado es el mismo que en serie).
+        - En la vista reducida el radio se escala con ella, así el efecto se ve
+          igual que al guardar a resolución completa.
+        """
+        valor = self.slider_filtro.get()
+
+        def filtrar(img, escala, progreso, cancelar):
+            # Radios y sigmas se miden en píxeles de la imagen completa
+            sigma = valor * escala
+            radio = int(round(valor * escala))
+            operaciones = {
+                "gaussiano": (filtros.Gaussiano, (sigma,)),
+                "caja": (filtros.Caja, (radio,)),
+                "enfocar": (filtros.Enfocar, (sigma, 1.0)),
+                "sobel": (filtros.Sobel, ()),
+                "mediana": (filtros.Mediana, (max(1, radio),)),
+            }
+            operacion, args = operaciones[tipo]
+            return self.ejecutor.Aplicar(operacion, img, *args, progreso=progreso, cancelar=cancelar)
+
+        nombres = {"gaussiano": "Gaussiano", "caja": "Caja", "enfocar": "Enfocar",
+                   "sobel": "Sobel", "mediana": "Mediana"}
+        self.transformar(nombres[tipo], filtrar, escalable=True)
 
     # ==== ZOOM VISUAL (no destructivo) ====
 
@@ -396,7 +1215,7 @@ class App:
         """
         if self.img is not None:
             self.zoom_factor = self.slider_zoom.get()
-            self.mostrar_imagen(self.img)
+            self.actualizar_zoom()
 
     def reducir(self):
         """
@@ -407,41 +1226,136 @@ class App:
         if self.img is not None:
             factor = self.slider_zoom.get()
             self.zoom_factor = 1 / factor if factor != 0 else 1
-            self.mostrar_imagen(self.img)
+            self.actualizar_zoom()
+
+    def actualizar_zoom(self):
+        """Aplica self.zoom_factor a la vista (en modo proxy recalcula el proxy a ese tamaño)."""
+        if self.edicion is None:
+            # Sin proxy basta con volver a dibujar desde la pirámide existente
+            self.mostrar_actual()
+            return
+        ancho, alto = self.tam_vista()
+        zoom = self.zoom_factor
+
+        def calcular(estado, progreso, cancelar):
+            edicion = self.edicion
+            if edicion is None:
+                return estado, None
+            vista = edicion.CalcularVista(ancho, alto, zoom)
+            return vista["proxy"], lambda: edicion.AdoptarVista(vista)
+
+        self.enviar("Zoom", calcular, clave="zoom")
 
     def mostrar_histograma(self):
         """
-        Obtiene los histogramas por canal usando imgControl.Histograma y los muestra
-        en una ventana de matplotlib con tres curvas (R, G, B).
+        Abre (o trae al frente) el panel de histograma en vivo.
+
+        - El panel es un tk.Toplevel con un Canvas; no bloquea la ventana principal.
+        - Se redibuja automáticamente cada vez que cambia la imagen (ver mostrar_imagen).
+        """
+        if self.img is None:
+            return
+        if self.ventana_hist is None:
+            self.ventana_hist = tk.Toplevel(self.root)
+            self.ventana_hist.title("Histograma RGB")
+            self.ventana_hist.configure(bg="#222")
+            self.canvas_hist = tk.Canvas(self.ventana_hist, width=512, height=200,
+                                         bg="#111", highlightthickness=0)
+            self.canvas_hist.pack(padx=5, pady=5)
+            tk.Label(self.ventana_hist, text="Intensidad (0-255)", fg="white",
+                     bg="#222").pack()
+            self.ventana_hist.protocol("WM_DELETE_WINDOW", self.cerrar_histograma)
+        else:
+            self.ventana_hist.lift()
+        if self.piramide is not None:
+            self.actualizar_histograma(self.piramide.NivelHasta(PIXELES_HISTOGRAMA))
+
+    def cerrar_histograma(self):
+        """Cierra el panel de histograma y deja de actualizarlo."""
+        if self.ventana_hist is not None:
+            self.ventana_hist.destroy()
+        self.ventana_hist = None
+        self.canvas_hist = None
+
+    def actualizar_histograma(self, img_u8: np.ndarray):
         """
-        if self.img is not None:
-            histR, histG, histB = imgControl.Histograma(self.img)
-            plt.figure()
-            plt.plot(histR, 'r')
-            plt.plot(histG, 'g')
-            plt.plot(histB, 'b')
-            plt.title("Histograma RGB")
-            plt.xlabel("Intensidad (0-255)")
-            plt.ylabel("Frecuencia")
-            plt.show()
+        Redibuja el histograma en vivo (si el panel está abierto).
+
+        Parámetros
+        ----------
+        img_u8 : np.ndarray
+            Imagen en uint8 (h,w,3); se usa el camino rápido de histograma.HistogramaCanales.
+            Basta un nivel reducido de la pirámide: la curva se normaliza por su máximo.
+        """
+        if self.canvas_hist is None:
+            return
+        hist = histograma.HistogramaCanales(img_u8)
+        ancho = int(self.canvas_hist["width"])
+        alto = int(self.canvas_hist["height"])
+        maximo = max(int(hist.max()), 1)
+        xs = np.linspace(0, ancho - 1, hist.shape[1])
+        self.canvas_hist.delete("all")
+        for conteos, color in zip(hist, ("red", "green", "blue")):
+            ys = alto - 1 - conteos / maximo * (alto - 1)
+            puntos = np.column_stack((xs, ys)).ravel().tolist()
+            self.canvas_hist.create_line(*puntos, fill=color)
 
     def fusionar(self):
         """
         Fusiona self.img y self.img2 con un factor determinado por self.slider_fusion.
         - Recorta las imágenes al tamaño mínimo común para evitar broadcasting.
         - Usa imgControl.CombinarF(img1, img2, factor) que realiza mezcla lineal.
-        - Sobrescribe self.img con el resultado y lo muestra.
+        - Sobrescribe self.img con el resultado y lo muestra (cálculo en segundo plano).
         """
         if self.img is not None and self.img2 is not None:
             factor = self.slider_fusion.get()
-            h1, w1 = self.img.shape[:2]
-            h2, w2 = self.img2.shape[:2]
-            h = min(h1, h2)
-            w = min(w1, w2)
-            img1r = self.img[:h, :w]
-            img2r = self.img2[:h, :w]
-            self.img = imgControl.CombinarF(img1r, img2r, factor)
-            self.mostrar_imagen(self.img)
+            img2 = self.img2
+
+            def fusionar(img, escala, progreso, cancelar):
+                segunda = img2
+                if escala < 1.0:
+                    segunda = imgControl.ReducirResolucion(img2, 1 / escala)
+                h1, w1 = img.shape[:2]
+                h2, w2 = segunda.shape[:2]
+                h = min(h1, h2)
+                w = min(w1, w2)
+                img1r = img[:h, :w]
+                img2r = segunda[:h, :w]
+                resultado = imgControl.CombinarF(img1r, img2r, factor)
+                progreso(1, 1)
+                return resultado
+
+            self.transformar("Fusión", fusionar, clave="fusion", escalable=True)
+
+    def apilar_imagenes(self):
+        """
+        Promedia la imagen actual con varias imágenes elegidas en un diálogo
+        (p. ej. tomas repetidas para reducir ruido).
+        - Usa mezcla.Mezclador: los cuadros se leen de a uno (self.cache_imagenes)
+          y se acumulan en un único buffer float32, así que la memoria no crece
+          con la cantidad de imágenes.
+        - Las imágenes de distinto tamaño se recortan a la esquina común, como en fusionar.
+        """
+        if self.img is None:
+            return
+        rutas = filedialog.askopenfilenames(filetypes=[("Imágenes", "*.jpg *.png *.jpeg")])
+        if not rutas:
+            return
+        cache = self.cache_imagenes
+
+        def apilar(img, escala, progreso, cancelar):
+            mezclador = Mezclador("recortar").Agregar(img)
+            for i, ruta in enumerate(rutas, start=1):
+                if cancelar is not None and cancelar.is_set():
+                    raise Cancelado()
+                cuadro = cache.Obtener(ruta)
+                if escala < 1.0:
+                    cuadro = imgControl.ReducirResolucion(cuadro, 1 / escala)
+                mezclador.Agregar(cuadro)
+                progreso(i, len(rutas))
+            return mezclador.Resultado(img.dtype)
+
+        self.transformar(f"Apilar {len(rutas) + 1} imágenes", apilar, escalable=True)
 
 
 # Punto de entrada de la aplicación
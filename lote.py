@@ -0,0 +1,521 @@
+"""
+lote.py
+-------
+
+Procesamiento por lotes sin interfaz gráfica (no importa tkinter ni matplotlib).
+
+Aplica una cadena de operaciones de imgControl a todas las imágenes de un
+directorio o patrón glob, en paralelo con un pool de procesos. Dentro de cada
+proceso la decodificación de la siguiente imagen y la codificación de la
+anterior corren en hilos, solapadas con el cálculo de la actual.
+
+Uso
+---
+    python lote.py fotos/ -o salida/ --op grises --op contraste=log,1.2
+    python lote.py "scans/*.png" -o miniaturas/ --op reducir=4 -j 8
+    python lote.py fotos/ -o fusion/ --op fusionar=fondo.png,0.4 --op rotar=15,bilineal
+    python lote.py scans/ -o texto/ --op binarizar=sauvola,25
+    python lote.py fotos/ -o nitidas/ --op mediana=1 --op enfocar=1.5,0.8
+
+Operaciones (--op, en orden)
+----------------------------
+    negativo | grises | binarizar[=umbral|otsu|sauvola[,radio[,k]]|media[,radio[,c]]]
+    brillo=valor | canal=R|G|B,ajuste
+    contraste=log|exp[,factor] | rotar=angulo[,vecino|bilineal|bicubica[,expandir]]
+    reducir=factor[,area|vecino|bilineal] | ampliar=factor[,vecino|bilineal|area]
+    fusionar=ruta[,factor]
+    gaussiano=sigma | caja=radio | enfocar=sigma[,cantidad] | sobel | mediana=radio
+
+Las imágenes se procesan en uint8 (camino de tablas de búsqueda de imgControl);
+con --float se usa la representación float [0,1] de la interfaz.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import numpy as np
+from PIL import Image
+import imgControl
+import umbral
+import filtros
+from pipeline import Pipeline
+from geometria import Geometria
+
+EXTENSIONES = (".jpg", ".jpeg", ".png")
+
+# Archivo del directorio de salida con la huella de la cadena de cada salida
+MANIFIESTO = ".lote.json"
+
+_CANALES = {"r": 0, "g": 1, "b": 2, "0": 0, "1": 1, "2": 2}
+
+_GEOMETRICAS = ("rotar", "reducir", "ampliar")
+
+_FILTROS = {"gaussiano": filtros.Gaussiano, "caja": filtros.Caja, "enfocar": filtros.Enfocar,
+            "sobel": filtros.Sobel, "mediana": filtros.Mediana}
+
+
+# =============== Cadena de operaciones ===============
+
+def ParsearOperacion(texto: str) -> tuple:
+    """
+    Convierte "nombre=a,b" en una tupla (nombre, *parámetros) validada.
+
+    Lanza ValueError con un mensaje legible si la operación no es válida.
+    """
+    nombre, _, resto = texto.partition("=")
+    nombre = nombre.strip().lower()
+    partes = [p.strip() for p in resto.split(",")] if resto else []
+    try:
+        if nombre in ("negativo", "grises", "sobel"):
+            return (nombre,)
+        if nombre == "binarizar":
+            if not partes:
+                return (nombre, 0.5)
+            metodo = partes[0].lower()
+            if metodo == "otsu":
+                return (nombre, metodo)
+            if metodo in umbral.METODOS:
+                radio = int(partes[1]) if len(partes) > 1 else 15
+                return (nombre, metodo, radio, float(partes[2]) if len(partes) > 2 else None)
+            return (nombre, float(partes[0]))
+        if nombre == "brillo":
+            return (nombre, float(partes[0]))
+        if nombre == "canal":
+            return (nombre, _CANALES[partes[0].lower()], float(partes[1]))
+        if nombre == "contraste":
+            zonas = {"log": 0, "exp": 1}[partes[0].lower()]
+            return (nombre, zonas, float(partes[1]) if len(partes) > 1 else 1.2)
+        if nombre == "rotar":
+            interpolacion = partes[1] if len(partes) > 1 else "vecino"
+            expandir = len(partes) > 2 and partes[2].lower() in ("expandir", "1", "si", "true")
+            return (nombre, float(partes[0]), interpolacion, expandir)
+        if nombre == "reducir":
+            return (nombre, float(partes[0]), partes[1] if len(partes) > 1 else "area")
+        if nombre == "ampliar":
+            return (nombre, float(partes[0]), partes[1] if len(partes) > 1 else "vecino")
+        if nombre == "fusionar":
+            return (nombre, partes[0], float(partes[1]) if len(partes) > 1 else 0.5)
+        if nombre == "gaussiano":
+            return (nombre, float(partes[0]))
+        if nombre in ("caja", "mediana"):
+            return (nombre, int(partes[0]))
+        if nombre == "enfocar":
+            return (nombre, float(partes[0]), float(partes[1]) if len(partes) > 1 else 1.0)
+    except (IndexError, KeyError, ValueError):
+        raise ValueError(f"Parámetros inválidos para la operación: {texto}")
+    raise ValueError(f"Operación desconocida: {nombre}")
+
+
+def _geometria(op) -> Geometria:
+    """Una operación geométrica de la línea de comandos como Geometria."""
+    nombre, parametro, metodo = op[0], op[1], op[2]
+    if nombre == "rotar":
+        return Geometria(metodo).RotarImg(parametro, op[3])
+    # "area" reduce con prefiltrado por bloques; al ampliar equivale a replicar
+    interpolacion = {"area": "bilineal" if nombre == "reducir" else "vecino"}.get(metodo, metodo)
+    if nombre == "reducir":
+        return Geometria(interpolacion).ReducirResolucion(parametro)
+    return Geometria(interpolacion).Ampliar(parametro)
+
+
+def _componer_geometria(pasos) -> list:
+    """Reemplaza cada tramo de dos o más pasos geométricos por ("geometria", Geometria)."""
+    resultado, tramo = [], []
+    for paso in pasos + [None]:
+        if paso is not None and paso[0] in _GEOMETRICAS:
+            tramo.append(paso)
+            continue
+        if len(tramo) > 1:
+            compuesta = _geometria(tramo[0])
+            for op in tramo[1:]:
+                compuesta = compuesta.Seguir(_geometria(op))
+            resultado.append(("geometria", compuesta))
+        else:
+            resultado.extend(tramo)
+        tramo = []
+        if paso is not None:
+            resultado.append(paso)
+    return resultado
+
+
+def _a_rgb(img):
+    """Grises/binaria -> tres canales iguales (igual que la interfaz)."""
+    if img.dtype == np.bool_:
+        img = imgControl.ConvertirUint8(img)
+    if img.ndim == 2:
+        img = np.stack((img, img, img), axis=2)
+    return img
+
+
+class Cadena:
+    """
+    Cadena de operaciones lista para ejecutar.
+
+    Las operaciones puntuales consecutivas se agrupan en un Pipeline (una sola
+    pasada o una LUT); dos o más geométricas seguidas (rotar, reducir, ampliar)
+    se componen en una Geometria (un solo remuestreo, sin intermedios); una
+    geométrica sola y la fusión se aplican con imgControl.
+    """
+
+    def __init__(self, operaciones: list, usar_float: bool = False):
+        self.operaciones = operaciones
+        self.usar_float = usar_float
+        self._fusion = {}
+        self.pasos = []
+        actual = None
+        for op in operaciones:
+            nombre = op[0]
+            if nombre in ("negativo", "brillo", "canal", "contraste"):
+                if actual is None:
+                    actual = Pipeline()
+                    self.pasos.append(("pipeline", actual))
+                if nombre == "negativo":
+                    actual.Negativo()
+                elif nombre == "brillo":
+                    actual.SumarBrillo(op[1]).Clip()
+                elif nombre == "canal":
+                    actual.AjusteCanal(op[1], op[2]).Clip()
+                else:
+                    actual.AjusteContraste(op[1], op[2]).Clip()
+            else:
+                actual = None
+                self.pasos.append(op)
+        self.pasos = _componer_geometria(self.pasos)
+
+    def Dependencias(self) -> list:
+        """Rutas extra que afectan al resultado (imágenes de fusión)."""
+        return [op[1] for op in self.operaciones if op[0] == "fusionar"]
+
+    def _imagen_fusion(self, ruta):
+        if ruta not in self._fusion:
+            self._fusion[ruta] = Decodificar(ruta, self.usar_float)
+        return self._fusion[ruta]
+
+    def Aplicar(self, img: np.ndarray) -> np.ndarray:
+        for paso in self.pasos:
+            nombre = paso[0]
+            if nombre == "pipeline":
+                img = paso[1].Evaluar(img)
+            elif nombre == "grises":
+                img = _a_rgb(imgControl.Grises(img))
+            elif nombre == "binarizar":
+                if paso[1] in umbral.METODOS:
+                    binaria = umbral.Adaptativo(img, paso[2], paso[1], paso[3])
+                else:
+                    corte = umbral.Otsu(img) if paso[1] == "otsu" else paso[1]
+                    binaria = imgControl.Binaria(img, corte)
+                binaria = _a_rgb(binaria)
+                img = binaria if not self.usar_float else imgControl.ConvertirFloat(binaria)
+            elif nombre == "rotar":
+                img = imgControl.RotarImg(img, paso[1], paso[2], paso[3])
+                if self.usar_float:
+                    img = np.clip(img, 0, 1)
+            elif nombre == "geometria":
+                img = paso[1].Evaluar(img)
+            elif nombre == "reducir":
+                img = imgControl.ReducirResolucion(img, paso[1], paso[2])
+            elif nombre == "ampliar":
+                img = imgControl.Ampliar(img, paso[1], paso[2])
+            elif nombre == "fusionar":
+                otra = self._imagen_fusion(paso[1])
+                h = min(img.shape[0], otra.shape[0])
+                w = min(img.shape[1], otra.shape[1])
+                img = imgControl.CombinarF(img[:h, :w], otra[:h, :w], paso[2])
+            elif nombre in _FILTROS:
+                img = _FILTROS[nombre](img, *paso[1:])
+        return img
+
+
+# =============== E/S ===============
+
+def Decodificar(ruta: str, usar_float: bool = False) -> np.ndarray:
+    """Abre una imagen como RGB uint8 (o float [0,1] si usar_float)."""
+    with Image.open(ruta) as imgPIL:
+        img = np.asarray(imgPIL.convert("RGB"))
+    return imgControl.ConvertirFloat(img) if usar_float else img
+
+
+def Codificar(img: np.ndarray, ruta: str):
+    """Guarda la imagen (float o uint8) creando el directorio si hace falta."""
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    Image.fromarray(imgControl.ConvertirUint8(img)).save(ruta)
+
+
+def ListarEntradas(entradas: list) -> list:
+    """Expande directorios y patrones glob a una lista ordenada de archivos de imagen."""
+    rutas = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            candidatos = [os.path.join(entrada, n) for n in os.listdir(entrada)]
+        else:
+            candidatos = glob.glob(entrada) or [entrada]
+        rutas.extend(c for c in candidatos
+                     if os.path.isfile(c) and c.lower().endswith(EXTENSIONES))
+    return sorted(set(rutas))
+
+
+def RaizComun(rutas: list) -> str:
+    """Directorio común a todas las rutas (las salidas conservan lo que sigue)."""
+    if not rutas:
+        return ""
+    return os.path.commonpath([os.path.dirname(os.path.abspath(r)) for r in rutas])
+
+
+def RutaSalida(ruta: str, directorio: str, formato: str | None, raiz: str | None = None) -> str:
+    """
+    Ruta de salida de `ruta`: con raiz, conserva los subdirectorios relativos a
+    ella (a/x.png y b/x.png no chocan); sin raiz, solo el nombre del archivo.
+    """
+    base, ext = os.path.splitext(os.path.basename(ruta))
+    nombre = base + ("." + formato.lstrip(".") if formato else ext)
+    if raiz is None:
+        return os.path.join(directorio, nombre)
+    relativo = os.path.relpath(os.path.dirname(os.path.abspath(ruta)), raiz)
+    return os.path.normpath(os.path.join(directorio, relativo, nombre))
+
+
+def HuellaCadena(operaciones: list, usar_float: bool = False, formato: str | None = None) -> str:
+    """Hash de la cadena parseada y de las opciones que cambian el resultado."""
+    texto = json.dumps([[list(op) for op in operaciones], bool(usar_float), formato])
+    return hashlib.sha1(texto.encode()).hexdigest()[:16]
+
+
+def LeerManifiesto(directorio: str) -> dict:
+    """Huella de la cadena con la que se generó cada salida (ruta relativa -> huella)."""
+    try:
+        with open(os.path.join(directorio, MANIFIESTO)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def GuardarManifiesto(directorio: str, manifiesto: dict):
+    os.makedirs(directorio, exist_ok=True)
+    archivo = os.path.join(directorio, MANIFIESTO)
+    temporal = f"{archivo}.{os.getpid()}.tmp"
+    with open(temporal, "w") as f:
+        json.dump(manifiesto, f, indent=1, sort_keys=True)
+    os.replace(temporal, archivo)
+
+
+def Actualizada(entrada: str, salida: str, dependencias: list, huella: str | None = None,
+                manifiesto: dict | None = None, directorio: str | None = None) -> bool:
+    """
+    True si la salida existe, es más reciente que la entrada y sus dependencias
+    y (si se da huella) el manifiesto de `directorio` dice que se generó con
+    la misma cadena.
+    """
+    if not os.path.exists(salida):
+        return False
+    if huella is not None:
+        relativa = os.path.relpath(salida, directorio) if directorio else salida
+        if (manifiesto or {}).get(relativa) != huella:
+            return False
+    limite = os.path.getmtime(salida)
+    return all(os.path.getmtime(r) <= limite for r in [entrada] + dependencias)
+
+
+# =============== Trabajo de cada proceso ===============
+
+def _procesar_grupo(pares: list, operaciones: list, usar_float: bool) -> list:
+    """
+    Procesa un grupo de (entrada, salida) dentro de un proceso.
+
+    Un hilo decodifica la imagen siguiente y otro codifica la anterior mientras
+    el hilo principal calcula la actual. Retorna una lista de dict por imagen.
+    """
+    cadena = Cadena(operaciones, usar_float)
+    resultados = []
+    with ThreadPoolExecutor(max_workers=1) as lector, ThreadPoolExecutor(max_workers=1) as escritor:
+        pendientes = []
+        siguiente = lector.submit(_leer, pares[0][0], usar_float) if pares else None
+        for i, (entrada, salida) in enumerate(pares):
+            inicio = time.perf_counter()
+            try:
+                img, t_leer = siguiente.result()
+            except Exception as error:
+                img, t_leer = error, 0.0
+            if i + 1 < len(pares):
+                siguiente = lector.submit(_leer, pares[i + 1][0], usar_float)
+            registro = {"entrada": entrada, "salida": salida,
+                        "bytes": os.path.getsize(entrada), "decodificar_s": t_leer}
+            if isinstance(img, Exception):
+                registro.update(estado="error", error=str(img), latencia_s=0.0)
+                resultados.append(registro)
+                continue
+            t0 = time.perf_counter()
+            try:
+                img = cadena.Aplicar(img)
+            except Exception as error:
+                registro.update(estado="error", error=str(error),
+                                latencia_s=time.perf_counter() - inicio)
+                resultados.append(registro)
+                continue
+            registro["calcular_s"] = time.perf_counter() - t0
+            pendientes.append((registro, inicio, escritor.submit(_escribir, img, salida)))
+            resultados.append(registro)
+        for registro, inicio, futuro in pendientes:
+            try:
+                fin = futuro.result()
+                registro["estado"] = "ok"
+            except Exception as error:
+                fin = time.perf_counter()
+                registro.update(estado="error", error=str(error))
+            registro["latencia_s"] = fin - inicio + registro["decodificar_s"]
+    return resultados
+
+
+def _escribir(img, ruta):
+    Codificar(img, ruta)
+    return time.perf_counter()
+
+
+def _leer(ruta, usar_float):
+    t0 = time.perf_counter()
+    img = Decodificar(ruta, usar_float)
+    return img, time.perf_counter() - t0
+
+
+# =============== Estadísticas ===============
+
+def Estadisticas(resultados: list, omitidas: int, segundos: float) -> dict:
+    """Rendimiento del lote: imágenes/s, MB/s y percentiles de latencia por imagen."""
+    ok = [r for r in resultados if r.get("estado") == "ok"]
+    latencias = np.array([r["latencia_s"] for r in ok]) if ok else np.zeros(1)
+    megabytes = sum(r["bytes"] for r in ok) / 1e6
+    return {
+        "procesadas": len(ok),
+        "errores": len(resultados) - len(ok),
+        "omitidas": omitidas,
+        "segundos": segundos,
+        "imagenes_s": len(ok) / segundos if segundos > 0 else 0.0,
+        "mb_s": megabytes / segundos if segundos > 0 else 0.0,
+        "latencia_p50_s": float(np.percentile(latencias, 50)),
+        "latencia_p95_s": float(np.percentile(latencias, 95)),
+    }
+
+
+def ProcesarLote(entradas: list, directorio_salida: str, operaciones: list,
+                 trabajadores: int | None = None, formato: str | None = None,
+                 forzar: bool = False, usar_float: bool = False, tam_grupo: int = 4,
+                 informar=None) -> dict:
+    """
+    Procesa todas las imágenes de `entradas` y devuelve las estadísticas del lote.
+
+    Parámetros
+    ----------
+    entradas : list[str]
+        Directorios, patrones glob o archivos.
+    directorio_salida : str
+        Directorio donde se escriben los resultados.
+    operaciones : list[tuple]
+        Operaciones ya parseadas (ver ParsearOperacion).
+    trabajadores : int, opcional
+        Procesos del pool (por defecto os.cpu_count()).
+    formato : str, opcional
+        Extensión de salida (png, jpg...); por defecto la de la entrada.
+    forzar : bool
+        Reprocesar aunque la salida esté actualizada. Una salida está
+        actualizada si es más reciente que su entrada (y las imágenes de
+        fusión) y el manifiesto del directorio registra la misma cadena,
+        --float y formato.
+    tam_grupo : int
+        Imágenes por tarea; dentro de cada grupo se solapan E/S y cálculo.
+    informar : callable, opcional
+        informar(registro) por cada imagen terminada.
+    """
+    dependencias = Cadena(operaciones).Dependencias()
+    huella = HuellaCadena(operaciones, usar_float, formato)
+    manifiesto = LeerManifiesto(directorio_salida)
+    rutas = ListarEntradas(entradas)
+    raiz = RaizComun(rutas)
+    salidas = {}
+    for ruta in rutas:
+        salida = RutaSalida(ruta, directorio_salida, formato, raiz)
+        if salida in salidas:
+            raise ValueError(f"{salidas[salida]} y {ruta} escribirían la misma salida: {salida}")
+        salidas[salida] = ruta
+    pares = []
+    omitidas = 0
+    for salida, ruta in salidas.items():
+        if not forzar and Actualizada(ruta, salida, dependencias, huella, manifiesto,
+                                      directorio_salida):
+            omitidas += 1
+        else:
+            pares.append((ruta, salida))
+
+    inicio = time.perf_counter()
+    resultados = []
+    grupos = [pares[i:i + tam_grupo] for i in range(0, len(pares), tam_grupo)]
+    if grupos:
+        with ProcessPoolExecutor(max_workers=trabajadores) as pool:
+            futuros = [pool.submit(_procesar_grupo, g, operaciones, usar_float) for g in grupos]
+            for futuro in as_completed(futuros):
+                for registro in futuro.result():
+                    resultados.append(registro)
+                    if registro.get("estado") == "ok":
+                        manifiesto[os.path.relpath(registro["salida"], directorio_salida)] = huella
+                    if informar is not None:
+                        informar(registro)
+        GuardarManifiesto(directorio_salida, manifiesto)
+    return Estadisticas(resultados, omitidas, time.perf_counter() - inicio)
+
+
+# =============== Línea de comandos ===============
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Aplica operaciones de imgControl a lotes de imágenes (sin interfaz).")
+    parser.add_argument("entradas", nargs="+", help="Directorios, patrones glob o archivos")
+    parser.add_argument("-o", "--salida", required=True, help="Directorio de salida")
+    parser.add_argument("--op", action="append", default=[], metavar="NOMBRE[=ARGS]",
+                        help="Operación a aplicar (repetible, en orden)")
+    parser.add_argument("-j", "--trabajadores", type=int, default=None,
+                        help="Procesos en paralelo (por defecto, todos los núcleos)")
+    parser.add_argument("--formato", default=None, help="Extensión de salida (png, jpg...)")
+    parser.add_argument("--forzar", action="store_true", help="Reprocesar salidas actualizadas")
+    parser.add_argument("--float", dest="usar_float", action="store_true",
+                        help="Procesar en float [0,1] en lugar de uint8")
+    parser.add_argument("--json", action="store_true", help="Imprimir estadísticas en JSON")
+    parser.add_argument("-q", "--silencioso", action="store_true", help="No listar cada imagen")
+    args = parser.parse_args(argv)
+
+    try:
+        operaciones = [ParsearOperacion(op) for op in args.op]
+    except ValueError as error:
+        parser.error(str(error))
+
+    def informar(registro):
+        if args.silencioso:
+            return
+        if registro.get("estado") == "ok":
+            print(f"{registro['entrada']} -> {registro['salida']} "
+                  f"({registro['latencia_s'] * 1000:.0f} ms)", file=sys.stderr)
+        else:
+            print(f"ERROR {registro['entrada']}: {registro.get('error')}", file=sys.stderr)
+
+    try:
+        estadisticas = ProcesarLote(args.entradas, args.salida, operaciones, args.trabajadores,
+                                    args.formato, args.forzar, args.usar_float,
+                                    informar=informar)
+    except ValueError as error:
+        print(f"ERROR: {error}", file=sys.stderr)
+        return 2
+    if args.json:
+        print(json.dumps(estadisticas, indent=2))
+    else:
+        print(f"{estadisticas['procesadas']} procesadas, {estadisticas['omitidas']} omitidas, "
+              f"{estadisticas['errores']} errores en {estadisticas['segundos']:.2f} s | "
+              f"{estadisticas['imagenes_s']:.1f} img/s, {estadisticas['mb_s']:.1f} MB/s | "
+              f"latencia p50 {estadisticas['latencia_p50_s'] * 1000:.0f} ms, "
+              f"p95 {estadisticas['latencia_p95_s'] * 1000:.0f} ms")
+    return 1 if estadisticas["errores"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+mezcla.py
+---------
+
+Mezcla de N imágenes en streaming (promedios, pilas de exposición, alfa).
+
+imgControl.CombinarF mezcla solo dos imágenes y crea varias copias completas.
+Mezclador acumula los cuadros de a uno en un único buffer float32, por franjas
+de filas y sobre un temporal reutilizado, así que la memoria no depende de
+cuántos cuadros se mezclen (basta un iterador que los vaya leyendo):
+
+    resultado = suma(peso_i * alfa_i * img_i) / suma(peso_i * alfa_i)
+
+- peso : escalar por cuadro.
+- alfa : máscara opcional por píxel (h, w), float [0,1] o uint8 [0,255].
+- Alineación de tamaños distintos:
+    "recortar"    esquina superior izquierda común (como App.fusionar);
+    "rellenar"    el lienzo crece al cuadro más grande; cada píxel se
+                  normaliza solo con los cuadros que lo cubren;
+    "remuestrear" cada cuadro se remuestrea (bilineal) al tamaño de `forma`
+                  o del primer cuadro.
+
+Los cuadros uint8 se llevan a [0,1] al acumular, así se pueden mezclar con
+cuadros float. El resultado es uint8 si todos los cuadros eran uint8 y float32
+en otro caso (o el dtype que se pida).
+
+Ejemplo
+-------
+    mezclador = Mezclador("recortar")
+    for ruta in rutas:
+        mezclador.Agregar(cache.Obtener(ruta))
+    promedio = mezclador.Resultado()
+
+    fondo_con_logo = Mezclar([fondo, logo], alfas=[None, mascara], normalizar=False)
+"""
+
+import itertools
+import numpy as np
+import imgControl
+
+ALINEACIONES = ("recortar", "rellenar", "remuestrear")
+
+# Tamaño objetivo de cada franja de filas (bytes del temporal float32)
+_BYTES_FRANJA = 4 << 20
+
+
+class Mezclador:
+    """
+    Acumulador de cuadros para una mezcla ponderada.
+
+    Atributos
+    ---------
+    alineacion : str
+        "recortar", "rellenar" o "remuestrear".
+    forma : tuple | None
+        (alto, ancho) del resultado; None lo toma del primer cuadro.
+    normalizar : bool
+        Si es True se divide por la suma de pesos de cada píxel (promedio
+        ponderado); si es False se devuelve la suma ponderada.
+    acumulado : np.ndarray | None
+        Suma ponderada float32 (h, w[, c]).
+    cuadros : int
+        Cuadros agregados.
+    """
+
+    def __init__(self, alineacion: str = "recortar", forma: tuple | None = None,
+                 normalizar: bool = True):
+        if alineacion not in ALINEACIONES:
+            raise ValueError(f"Alineación desconocida: {alineacion}")
+        self.alineacion = alineacion
+        self.forma = None if forma is None else tuple(forma[:2])
+        self.normalizar = normalizar
+        self.acumulado = None
+        self.cuadros = 0
+        self._pesos = None       # suma de pesos por píxel (h, w); None si es uniforme
+        self._peso_total = 0.0   # suma de pesos cuando es uniforme
+        self._temporal = None    # franja float32 reutilizada
+        self._todas_uint8 = True
+
+    # ---- Acumulación ----
+
+    def Agregar(self, img: np.ndarray, peso: float = 1.0, alfa: np.ndarray | None = None):
+        """Suma un cuadro (uint8 o float [0,1]) con su peso y máscara alfa opcional."""
+        img = np.asarray(img)
+        if self.acumulado is None:
+            self._iniciar(img)
+        elif img.shape[2:] != self.acumulado.shape[2:]:
+            raise ValueError(f"Canales distintos: {img.shape} y {self.acumulado.shape}")
+        if alfa is not None and np.shape(alfa)[:2] != img.shape[:2]:
+            raise ValueError(f"La máscara {np.shape(alfa)} no coincide con el cuadro {img.shape}")
+        self._todas_uint8 &= img.dtype == np.uint8
+
+        leer, h, w = self._alinear(img)
+        if alfa is not None or (h, w) != self.acumulado.shape[:2]:
+            self._pesos_por_pixel()
+        escala = np.float32(1 / 255 if img.dtype == np.uint8 else 1)
+        filas = self._temporal.shape[0]
+        for yI in range(0, h, filas):
+            yF = min(yI + filas, h)
+            temporal = self._temporal[:yF - yI, :w]
+            np.multiply(leer(yI, yF, w), escala, out=temporal, casting="unsafe")
+            if alfa is not None:
+                factor = _alfa(alfa, yI, yF, w, self._remuestreo_alfa(img)) * np.float32(peso)
+                temporal *= factor[..., None] if temporal.ndim == 3 else factor
+                self._pesos[yI:yF, :w] += factor
+            else:
+                if peso != 1:
+                    temporal *= np.float32(peso)
+                if self._pesos is not None:
+                    self._pesos[yI:yF, :w] += np.float32(peso)
+            self.acumulado[yI:yF, :w] += temporal
+        if self._pesos is None:
+            self._peso_total += peso
+        self.cuadros += 1
+        return self
+
+    def _iniciar(self, img):
+        h, w = self.forma or img.shape[:2]
+        self.acumulado = np.zeros((h, w) + img.shape[2:], dtype=np.float32)
+        self._nuevo_temporal()
+
+    def _nuevo_temporal(self):
+        fila = self.acumulado[0].nbytes
+        filas = max(1, min(self.acumulado.shape[0], _BYTES_FRANJA // max(1, fila)))
+        self._temporal = np.empty((filas,) + self.acumulado.shape[1:], dtype=np.float32)
+
+    def _pesos_por_pixel(self):
+        # Pasa de un peso total uniforme a uno por píxel (máscaras o coberturas parciales)
+        if self._pesos is None:
+            self._pesos = np.full(self.acumulado.shape[:2], self._peso_total, dtype=np.float32)
+
+    def _alinear(self, img):
+        """
+        Ajusta el lienzo al cuadro según la alineación. Retorna (leer, h, w):
+        leer(yI, yF, w) da las filas yI:yF (primeras w columnas) del cuadro ya
+        alineado, y (h, w) es la región del lienzo que cubre.
+        """
+        H, W = self.acumulado.shape[:2]
+        h, w = img.shape[:2]
+        if self.alineacion == "remuestrear":
+            if (h, w) == (H, W):
+                return (lambda yI, yF, ancho: img[yI:yF, :ancho]), H, W
+            return _remuestreo(img, H, W), H, W
+        if self.alineacion == "recortar":
+            if h < H or w < W:
+                # Vistas del mismo buffer: la memoria no crece
+                self.acumulado = self.acumulado[:min(H, h), :min(W, w)]
+                if self._pesos is not None:
+                    self._pesos = self._pesos[:min(H, h), :min(W, w)]
+            H, W = self.acumulado.shape[:2]
+            return (lambda yI, yF, ancho: img[yI:yF, :ancho]), H, W
+        # rellenar
+        if h > H or w > W:
+            self._pesos_por_pixel()
+            nuevo = np.zeros((max(H, h), max(W, w)) + self.acumulado.shape[2:], dtype=np.float32)
+            nuevo[:H, :W] = self.acumulado
+            pesos = np.zeros(nuevo.shape[:2], dtype=np.float32)
+            pesos[:H, :W] = self._pesos
+            self.acumulado, self._pesos = nuevo, pesos
+            self._nuevo_temporal()
+        return (lambda yI, yF, ancho: img[yI:yF, :ancho]), h, w
+
+    def _remuestreo_alfa(self, img):
+        # Con remuestreo la máscara (del tamaño del cuadro) se remuestrea igual
+        H, W = self.acumulado.shape[:2]
+        if self.alineacion == "remuestrear" and img.shape[:2] != (H, W):
+            return (H, W)
+        return None
+
+    # ---- Resultado ----
+
+    def Resultado(self, dtype=None) -> np.ndarray:
+        """
+        Mezcla de los cuadros agregados hasta ahora (no modifica el acumulador:
+        se pueden seguir agregando cuadros).
+
+        dtype : uint8 si todos los cuadros eran uint8, float32 en otro caso.
+        Los píxeles que no cubre ningún cuadro (o con peso 0) quedan en 0.
+        """
+        if self.acumulado is None:
+            raise ValueError("No hay cuadros para mezclar")
+        if dtype is None:
+            dtype = np.uint8 if self._todas_uint8 else np.float32
+        dtype = np.dtype(dtype)
+        salida = np.empty(self.acumulado.shape, dtype=dtype)
+        h = self.acumulado.shape[0]
+        filas = self._temporal.shape[0]
+        for yI in range(0, h, filas):
+            yF = min(yI + filas, h)
+            temporal = self._temporal[:yF - yI, :self.acumulado.shape[1]]
+            temporal[...] = self.acumulado[yI:yF]
+            if self.normalizar:
+                if self._pesos is None:
+                    if self._peso_total != 0:
+                        temporal /= np.float32(self._peso_total)
+                else:
+                    pesos = self._pesos[yI:yF]
+                    pesos = pesos[..., None] if temporal.ndim == 3 else pesos
+                    np.divide(temporal, pesos, out=temporal, where=pesos != 0)
+            if dtype == np.uint8:
+                temporal *= 255
+                np.rint(temporal, out=temporal)
+                np.clip(temporal, 0, 255, out=temporal)
+            salida[yI:yF] = temporal
+        return salida
+
+
+def _alfa(alfa, yI, yF, w, remuestreo):
+    """Filas yI:yF de la máscara como float32 [0,1]."""
+    alfa = np.asarray(alfa)
+    if alfa.ndim == 3:
+        alfa = alfa[:, :, 0]
+    if remuestreo is not None:
+        bloque = _remuestreo(alfa, *remuestreo)(yI, yF, w)
+    else:
+        bloque = alfa[yI:yF, :w]
+    bloque = bloque.astype(np.float32)
+    if alfa.dtype == np.uint8:
+        bloque /= 255
+    return bloque
+
+
+def _remuestreo(img, H, W):
+    """leer(yI, yF, w) de img remuestreada (bilineal) a H x W, sin materializarla entera."""
+    h, w = img.shape[:2]
+    preparada = imgControl.PrepararMuestreo(img, "bilineal")
+    # Centros de los píxeles de salida en coordenadas de img (con borde replicado)
+    xs = np.clip((np.arange(W) + 0.5) * (w / W) - 0.5, 0, w - 1)
+    todas_ys = np.clip((np.arange(H) + 0.5) * (h / H) - 0.5, 0, h - 1)
+
+    def leer(yI, yF, ancho):
+        ys, xs_f = np.broadcast_arrays(todas_ys[yI:yF, None], xs[None, :ancho])
+        return imgControl.Muestrear(img, xs_f, ys, "bilineal", preparada)
+
+    return leer
+
+
+def Mezclar(imagenes, pesos=None, alfas=None, alineacion: str = "recortar",
+            normalizar: bool = True, forma: tuple | None = None, dtype=None) -> np.ndarray:
+    """
+    Mezcla una secuencia (o iterador) de imágenes en una sola pasada por cuadro.
+
+    pesos y alfas son secuencias paralelas opcionales (un None en alfas es un
+    cuadro sin máscara). Ver Mezclador para la alineación y el tipo de salida.
+    """
+    mezclador = Mezclador(alineacion, forma, normalizar)
+    pesos = itertools.repeat(1.0) if pesos is None else pesos
+    alfas = itertools.repeat(None) if alfas is None else alfas
+    for img, peso, alfa in zip(imagenes, pesos, alfas):
+        mezclador.Agregar(img, peso, alfa)
+    return mezclador.Resultado(dtype)
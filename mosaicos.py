@@ -0,0 +1,470 @@
+"""
+mosaicos.py
+-----------
+
+Procesamiento por mosaicos (tiles) para imágenes más grandes que la RAM.
+
+La imagen vive en disco como un arreglo .npy (uint8, forma (h,w,3)) que se abre
+con np.memmap; las operaciones de imgControl se aplican mosaico a mosaico y el
+resultado se escribe de forma incremental en otro .npy en disco. La memoria
+pico queda acotada por `presupuesto_bytes` sin importar el tamaño de la imagen.
+
+Tipos de operación
+------------------
+- Puntuales (Negativo, SumarBrillo, AjusteCanal, AjusteContraste, Grises,
+  Binaria, Canal, Layer o un Pipeline): cada mosaico de salida depende solo del
+  mismo mosaico de entrada.
+- Geométricas (RotarImg, ReducirResolucion, Ampliar, Desplazar, Recortar): cada
+  mosaico de salida se calcula por mapeo inverso (ReducirResolucion y Ampliar,
+  eje por eje como imgControl); se lee de disco solo la ventana fuente que
+  cubre sus coordenadas, más un halo con los vecinos que necesita la
+  interpolación. La bicúbica en float se recorta al rango de toda la imagen,
+  así que cada mosaico da lo mismo que la llamada directa.
+- Cadenas geométricas (geometria.Geometria): una sola matriz afín; cada
+  mosaico se calcula como los geométricos, con el prefiltrado por bloques
+  alineado a la grilla de la imagen.
+- De vecindad (filtros de filtros.py, o cualquier función con un atributo
+  halo(**parametros)): cada mosaico se calcula sobre su ventana más `halo`
+  píxeles por lado y se recorta; da lo mismo que sobre la imagen entera.
+
+Ejemplo
+-------
+    ImportarImagen("mosaico_aereo.tif", "aereo.npy")
+    ProcesarMosaicos("aereo.npy", "rotada.npy", imgControl.RotarImg, 30,
+                     interpolacion="bilineal", presupuesto_bytes=512 << 20)
+"""
+
+import inspect
+import math
+import numpy as np
+from PIL import Image
+import imgControl
+import histograma
+from pipeline import Pipeline
+
+# Presupuesto de memoria por defecto para un mosaico (bytes)
+PRESUPUESTO_DEFECTO = 256 << 20
+
+# Vecinos extra (por lado) que necesita cada interpolación
+_HALO = {"vecino": 1, "bilineal": 2, "bicubica": 3}
+
+_GEOMETRICAS = ("RotarImg", "ReducirResolucion", "Ampliar", "Desplazar", "Recortar")
+
+
+class Cancelado(Exception):
+    """Se lanza cuando un procesamiento por partes se cancela a mitad de camino."""
+
+
+def Abrir(entrada, modo: str = "r") -> np.ndarray:
+    """
+    Devuelve la imagen de entrada como arreglo (memmap si es una ruta .npy).
+
+    entrada puede ser una ruta a un .npy o un np.ndarray/np.memmap ya abierto.
+    """
+    if isinstance(entrada, np.ndarray):
+        return entrada
+    return np.load(entrada, mmap_mode=modo)
+
+
+def ImportarImagen(ruta: str, destino: str, filas_por_franja: int = 1024) -> np.memmap:
+    """
+    Decodifica una imagen (JPG/PNG/TIFF...) a un .npy uint8 en disco.
+
+    Limitación: Pillow no decodifica por franjas, así que la imagen completa
+    pasa una vez por la RAM en su modo original (3 bytes por píxel en RGB, 1
+    en escala de grises; no los 24 de float64). La conversión a RGB y la copia
+    a disco sí se hacen por franjas, sin una segunda copia completa. Para
+    imágenes que no caben ni así, convertirlas antes a .npy por otra vía
+    (p. ej. un lector de TIFF por mosaicos) y usar Abrir directamente.
+    """
+    limite = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None  # los mosaicos aéreos superan el límite anti "bomba"
+    try:
+        with Image.open(ruta) as imgPIL:
+            imgPIL.load()
+            w, h = imgPIL.size
+            salida = np.lib.format.open_memmap(destino, mode="w+", dtype=np.uint8,
+                                               shape=(h, w, 3))
+            for yI in range(0, h, filas_por_franja):
+                yF = min(yI + filas_por_franja, h)
+                salida[yI:yF] = np.asarray(imgPIL.crop((0, yI, w, yF)).convert("RGB"))
+            salida.flush()
+    finally:
+        Image.MAX_IMAGE_PIXELS = limite
+    return salida
+
+
+def ExportarImagen(entrada, ruta: str):
+    """
+    Guarda un .npy/memmap como imagen con Pillow.
+
+    Nota: los codificadores de Pillow necesitan la imagen completa en memoria
+    (en uint8); para resultados que no caben, conservar el .npy.
+    """
+    img = imgControl.ConvertirUint8(np.asarray(Abrir(entrada)))
+    Image.fromarray(img).save(ruta)
+
+
+# =============== Descripción de las operaciones ===============
+
+class _Puntual:
+    """Operación por píxel: el mosaico de salida es op(mosaico de entrada)."""
+
+    def __init__(self, funcion, args, kwargs, fuente):
+        self.funcion = funcion
+        self.args = args
+        # out= es para la imagen entera: cada mosaico crea su propio resultado
+        self.kwargs = {k: v for k, v in kwargs.items() if k != "out"}
+        muestra = self(np.asarray(fuente[:2, :2]))
+        self.forma = fuente.shape[:2] + muestra.shape[2:]
+        self.dtype = muestra.dtype
+        self.relacion = 1.0
+
+    def __call__(self, bloque):
+        if isinstance(self.funcion, Pipeline):
+            return self.funcion.Evaluar(bloque)
+        return self.funcion(bloque, *self.args, **self.kwargs)
+
+    def calcular(self, fuente, filas, columnas):
+        bloque = np.asarray(fuente[filas[0]:filas[-1] + 1, columnas[0]:columnas[-1] + 1])
+        return self(bloque)
+
+
+class _Mapeo:
+    """
+    Operación geométrica por mapeo inverso: mapa(filas, columnas) da las
+    coordenadas fuente (xs, ys) de la grilla de salida.
+    """
+
+    def __init__(self, forma, mapa, interpolacion, fuente, relacion=1.0):
+        self.forma = tuple(forma) + fuente.shape[2:]
+        self.mapa = mapa
+        self.interpolacion = interpolacion
+        self.dtype = fuente.dtype
+        self.relacion = relacion
+        # La bicúbica en float se recorta al rango de toda la fuente, no al de la ventana
+        self.rango = None
+        if interpolacion == "bicubica" and np.issubdtype(self.dtype, np.floating):
+            self.rango = _rango(fuente)
+
+    def calcular(self, fuente, filas, columnas):
+        h, w = fuente.shape[:2]
+        xs, ys = self.mapa(filas, columnas)
+        xs, ys = np.broadcast_arrays(xs, ys)
+        if self.interpolacion == "vecino":
+            # Redondear antes de desplazar a la ventana: rint desempata al par,
+            # y restar un origen impar cambiaría el desempate
+            xs = np.rint(xs)
+            ys = np.rint(ys)
+        halo = _HALO[self.interpolacion]
+        # Ventana fuente: caja de las coordenadas + halo, recortada a la imagen
+        x0 = max(0, int(np.floor(xs.min())) - halo)
+        x1 = min(w, int(np.ceil(xs.max())) + halo + 1)
+        y0 = max(0, int(np.floor(ys.min())) - halo)
+        y1 = min(h, int(np.ceil(ys.max())) + halo + 1)
+        if x0 >= x1 or y0 >= y1:
+            return np.zeros((len(filas), len(columnas)) + fuente.shape[2:], dtype=self.dtype)
+        ventana = np.asarray(fuente[y0:y1, x0:x1])
+        return imgControl.Muestrear(ventana, xs - x0, ys - y0, self.interpolacion,
+                                    rango=self.rango)
+
+
+def _rango(fuente, filas_por_franja: int = 1024):
+    """(mínimo, máximo) de la fuente, leída franja por franja."""
+    h, w = fuente.shape[:2]
+    minimo = maximo = None
+    for yI in range(0, h, filas_por_franja):
+        franja = np.asarray(fuente[yI:min(yI + filas_por_franja, h), 0:w])
+        minimo = franja.min() if minimo is None else min(minimo, franja.min())
+        maximo = franja.max() if maximo is None else max(maximo, franja.max())
+    return minimo, maximo
+
+
+class _Reducida:
+    """Fuente vista como promediada por bloques k x k ("area", "rellenar"), leída por ventanas."""
+
+    def __init__(self, fuente, factor):
+        self.fuente = fuente
+        self.factor = factor
+        h, w = fuente.shape[:2]
+        self.shape = (math.ceil(h / factor), math.ceil(w / factor)) + fuente.shape[2:]
+        self.dtype = fuente.dtype
+
+    def __getitem__(self, clave):
+        filas, columnas = clave
+        k = self.factor
+        h, w = self.fuente.shape[:2]
+        # Bloques alineados a la grilla de la imagen: da lo mismo que reducir todo
+        ventana = np.asarray(self.fuente[filas.start * k:min(h, filas.stop * k),
+                                         columnas.start * k:min(w, columnas.stop * k)])
+        return imgControl.ReducirResolucion(ventana, k, "area", "rellenar")
+
+
+class _Afin(_Mapeo):
+    """Cadena geométrica compuesta: mapeo inverso con una sola matriz (ver geometria.py)."""
+
+    def __init__(self, geometria, fuente, escala=1.0, **_):
+        h, w = fuente.shape[:2]
+        inversa, forma, self.factor, interpolacion = geometria.Plan(h, w, escala)
+        hR, wR = math.ceil(h / self.factor), math.ceil(w / self.factor)
+        a = inversa
+
+        def mapa(filas, columnas):
+            y = filas[:, None].astype(np.float64)
+            x = columnas[None, :].astype(np.float64)
+            xs = a[0, 0] * x + a[0, 1] * y + a[0, 2]
+            ys = a[1, 0] * x + a[1, 1] * y + a[1, 2]
+            # Dentro de la huella de los píxeles del borde se replica el borde
+            for coordenadas, n in ((xs, wR), (ys, hR)):
+                huella = (coordenadas >= -0.5) & (coordenadas <= n - 0.5)
+                np.clip(coordenadas, 0, n - 1, out=coordenadas, where=huella)
+            return xs, ys
+
+        relacion = max(abs(np.linalg.det(inversa[:2, :2])), 1e-3) * self.factor ** 2
+        if self.factor > 1:
+            fuente = _Reducida(fuente, self.factor)
+        super().__init__(forma, mapa, interpolacion, fuente, relacion)
+
+    def calcular(self, fuente, filas, columnas):
+        if self.factor > 1:
+            fuente = _Reducida(fuente, self.factor)
+        return super().calcular(fuente, filas, columnas)
+
+
+class _Separable:
+    """
+    Remuestreo por ejes (ReducirResolucion, Ampliar con "vecino"/"bilineal"):
+    la misma aritmética de imgControl, sobre la ventana fuente del mosaico.
+    """
+
+    def __init__(self, forma, escalas, metodo, fuente):
+        self.forma = tuple(forma) + fuente.shape[2:]
+        self.escalas = escalas
+        self.metodo = metodo
+        self.dtype = fuente.dtype
+        self.relacion = escalas[0] * escalas[1]
+
+    def calcular(self, fuente, filas, columnas):
+        cortes, muestras = [], []
+        for n, salidas, escala in zip(fuente.shape[:2], (filas, columnas), self.escalas):
+            i0, i1, t = imgControl.IndicesEje(n, salidas, escala, self.metodo)
+            # Los índices crecen con la salida: la ventana va del primero al último
+            inicio = i0[0]
+            cortes.append(slice(inicio, (i0 if i1 is None else i1)[-1] + 1))
+            muestras.append((i0 - inicio, None if i1 is None else i1 - inicio, t))
+        bloque = np.asarray(fuente[cortes[0], cortes[1]])
+        for eje, (i0, i1, t) in enumerate(muestras):
+            bloque = imgControl.InterpolarEje(bloque, eje, i0, i1, t)
+        return imgControl._a_tipo(bloque, self.dtype)
+
+
+class _AreaEntera:
+    """ReducirResolucion por área con factor entero: bloques alineados al mosaico."""
+
+    def __init__(self, fuente, factor, borde):
+        self.factor = int(factor)
+        self.borde = borde
+        h, w = fuente.shape[:2]
+        if borde == "recortar":
+            forma = (h // self.factor, w // self.factor)
+        else:
+            forma = (math.ceil(h / self.factor), math.ceil(w / self.factor))
+        self.forma = forma + fuente.shape[2:]
+        self.dtype = fuente.dtype
+        self.relacion = float(self.factor ** 2)
+
+    def calcular(self, fuente, filas, columnas):
+        f = self.factor
+        h, w = fuente.shape[:2]
+        ventana = np.asarray(fuente[filas[0] * f:min(h, (filas[-1] + 1) * f),
+                                    columnas[0] * f:min(w, (columnas[-1] + 1) * f)])
+        return imgControl.ReducirResolucion(ventana, f, "area", self.borde)
+
+
+class _Vecindad:
+    """Filtro de vecindad: op(ventana + halo) recortado al mosaico."""
+
+    def __init__(self, funcion, args, kwargs, fuente):
+        self.funcion = funcion
+        self.args = args
+        # out= es para la imagen entera: cada mosaico crea su propio resultado
+        self.kwargs = {k: v for k, v in kwargs.items() if k != "out"}
+        parametros = dict(zip(_parametros(funcion), args))
+        parametros.update(self.kwargs)
+        self.halo = int(funcion.halo(**parametros))
+        self.forma = fuente.shape
+        self.dtype = fuente.dtype
+        # Ventana con halo y temporales float del filtro
+        self.relacion = 3.0
+
+    def calcular(self, fuente, filas, columnas):
+        h, w = fuente.shape[:2]
+        y0, x0 = max(0, filas[0] - self.halo), max(0, columnas[0] - self.halo)
+        y1 = min(h, filas[-1] + 1 + self.halo)
+        x1 = min(w, columnas[-1] + 1 + self.halo)
+        ventana = np.asarray(fuente[y0:y1, x0:x1])
+        bloque = self.funcion(ventana, *self.args, **self.kwargs)
+        return bloque[filas[0] - y0:filas[-1] + 1 - y0, columnas[0] - x0:columnas[-1] + 1 - x0]
+
+
+def Describir(operacion, args, kwargs, fuente):
+    """
+    Construye el descriptor de mosaicos adecuado para la operación.
+
+    El descriptor expone forma y dtype de la salida, y
+    calcular(fuente, filas, columnas), que produce el bloque de salida de esas
+    filas/columnas leyendo de fuente solo lo necesario.
+    """
+    nombre = getattr(operacion, "__name__", None)
+    if hasattr(operacion, "halo"):
+        return _Vecindad(operacion, args, kwargs, fuente)
+    if hasattr(operacion, "Plan"):
+        return _Afin(operacion, fuente, *args, **kwargs)
+    if isinstance(operacion, Pipeline) or nombre not in _GEOMETRICAS:
+        return _Puntual(operacion, args, kwargs, fuente)
+
+    h, w = fuente.shape[:2]
+    parametros = dict(zip(_parametros(operacion), args))
+    parametros.update(kwargs)
+
+    if nombre == "RotarImg":
+        interpolacion = parametros.get("interpolacion", "vecino")
+        forma, mapa = imgControl.MapaRotacion(h, w, parametros["angulo"],
+                                              parametros.get("expandir", False))
+        theta = np.deg2rad(parametros["angulo"])
+        relacion = (abs(np.cos(theta)) + abs(np.sin(theta))) ** 2
+        return _Mapeo(forma, mapa, interpolacion, fuente, relacion)
+
+    if nombre == "Desplazar":
+        dx, dy = parametros["dx"], parametros["dy"]
+        mapa = lambda filas, columnas: ((columnas - dx)[None, :], (filas - dy)[:, None])
+        return _Mapeo((h, w), mapa, "vecino", fuente)
+
+    if nombre == "Recortar":
+        filas = range(h)[parametros["xI"]:parametros["xF"]]
+        columnas = range(w)[parametros["yI"]:parametros["yF"]]
+        mapa = lambda f, c: ((c + columnas.start)[None, :], (f + filas.start)[:, None])
+        return _Mapeo((len(filas), len(columnas)), mapa, "vecino", fuente)
+
+    factor = parametros["factor"]
+    metodo = parametros.get("metodo", "area" if nombre == "ReducirResolucion" else "vecino")
+    if nombre == "ReducirResolucion":
+        borde = parametros.get("borde", "recortar")
+        if borde == "recortar":
+            h_new, w_new = max(1, int(h // factor)), max(1, int(w // factor))
+        else:
+            h_new, w_new = math.ceil(h / factor), math.ceil(w / factor)
+        escala_y = escala_x = factor
+        if metodo == "area":
+            if not float(factor).is_integer():
+                raise ValueError("Por mosaicos, el método 'area' requiere un factor entero; "
+                                 "use 'vecino' o 'bilineal' para factores no enteros")
+            return _AreaEntera(fuente, factor, borde)
+    else:
+        h_new, w_new = max(1, int(round(h * factor))), max(1, int(round(w * factor)))
+        escala_y, escala_x = h / h_new, w / w_new
+        if metodo == "area":
+            if not float(factor).is_integer():
+                raise ValueError("Por mosaicos, Ampliar con 'area' requiere un factor entero")
+            metodo = "vecino"  # con factor entero el promedio por área es la réplica
+    if metodo not in ("vecino", "bilineal"):
+        raise ValueError(f"Método de remuestreo desconocido: {metodo}")
+    return _Separable((h_new, w_new), (escala_y, escala_x), metodo, fuente)
+
+
+def _parametros(funcion):
+    # Los nombres son los de la función original (no los de una envoltura
+    # functools.wraps, p. ej. de instrumentacion.Envolver)
+    codigo = inspect.unwrap(funcion).__code__
+    return codigo.co_varnames[1:codigo.co_argcount]
+
+
+def TamMosaico(descriptor, fuente, presupuesto_bytes: int) -> int:
+    """
+    Lado del mosaico (en píxeles de salida) para no pasar el presupuesto.
+
+    Estimación por píxel de salida: la ventana fuente (copia + versión float32
+    con marco para interpolar), ~10 arreglos de coordenadas/índices y los
+    acumuladores float de la salida.
+    """
+    canales = fuente.shape[2] if fuente.ndim == 3 else 1
+    por_fuente = canales * (fuente.dtype.itemsize + 4)
+    por_salida = 10 * 8 + 3 * canales * 8
+    bytes_px = descriptor.relacion * por_fuente + por_salida
+    return max(16, int(math.sqrt(presupuesto_bytes / bytes_px)))
+
+
+def ProcesarMosaicos(entrada, salida: str, operacion, *args,
+                     presupuesto_bytes: int = PRESUPUESTO_DEFECTO,
+                     tam_mosaico: int | None = None, progreso=None, cancelar=None,
+                     **kwargs) -> np.memmap:
+    """
+    Aplica una operación de imgControl por mosaicos, de disco a disco.
+
+    Parámetros
+    ----------
+    entrada : str | np.ndarray
+        Ruta .npy (se abre como memmap de solo lectura) o arreglo ya abierto.
+    salida : str
+        Ruta .npy donde se escribe el resultado de forma incremental.
+    operacion : callable | Pipeline
+        Función de imgControl (p. ej. imgControl.RotarImg) o un Pipeline.
+    *args, **kwargs
+        Parámetros de la operación (sin la imagen).
+    presupuesto_bytes : int
+        Memoria de trabajo máxima aproximada por mosaico.
+    tam_mosaico : int, opcional
+        Lado del mosaico de salida; si es None se deriva del presupuesto.
+    progreso : callable, opcional
+        progreso(hechos, total) se llama después de cada mosaico.
+    cancelar : threading.Event, opcional
+        Si se activa, se detiene antes del siguiente mosaico y lanza Cancelado.
+
+    Retorna
+    -------
+    np.memmap
+        El resultado abierto desde disco.
+    """
+    fuente = Abrir(entrada)
+    descriptor = Describir(operacion, args, kwargs, fuente)
+    if tam_mosaico is None:
+        tam_mosaico = TamMosaico(descriptor, fuente, presupuesto_bytes)
+
+    destino = np.lib.format.open_memmap(salida, mode="w+", dtype=descriptor.dtype,
+                                        shape=descriptor.forma)
+    h, w = descriptor.forma[:2]
+    for yI, yF, xI, xF, hechos, total in Recorrido(h, w, tam_mosaico):
+        if cancelar is not None and cancelar.is_set():
+            destino.flush()
+            raise Cancelado(salida)
+        destino[yI:yF, xI:xF] = descriptor.calcular(fuente, np.arange(yI, yF), np.arange(xI, xF))
+        if xF == w:
+            destino.flush()  # las páginas escritas ya pueden liberarse
+        if progreso is not None:
+            progreso(hechos, total)
+    destino.flush()
+    return destino
+
+
+def Recorrido(h: int, w: int, tam: int):
+    """Genera (yI, yF, xI, xF, hechos, total) para cada mosaico, fila por fila."""
+    total = math.ceil(h / tam) * math.ceil(w / tam)
+    hechos = 0
+    for yI in range(0, h, tam):
+        for xI in range(0, w, tam):
+            hechos += 1
+            yield yI, min(yI + tam, h), xI, min(xI + tam, w), hechos, total
+
+
+def HistogramaMosaicos(entrada, bins: int = 256, filas_por_franja: int = 1024) -> np.ndarray:
+    """
+    Histograma por canal de una imagen en disco, sumando franja por franja.
+
+    Retorna el mismo resultado que histograma.HistogramaCanales sobre la imagen completa.
+    """
+    fuente = Abrir(entrada)
+    total = None
+    for yI in range(0, fuente.shape[0], filas_por_franja):
+        parcial = histograma.HistogramaCanales(np.asarray(fuente[yI:yI + filas_por_franja]), bins)
+        total = parcial if total is None else total + parcial
+    return total
@@ -0,0 +1,311 @@
+"""
+pipeline.py
+-----------
+
+Cadena perezosa de operaciones puntuales de imgControl.
+
+Cada llamada de imgControl crea al menos una copia completa de la imagen, y la
+interfaz agrega un np.clip después de cada una. Pipeline solo *registra* las
+operaciones y al evaluar:
+
+- Pliega las operaciones afines consecutivas (Negativo, SumarBrillo, AjusteCanal)
+  en un único `x * a + b` por canal.
+- Recorre la imagen una sola vez, por franjas de filas que caben en caché,
+  aplicando todas las operaciones in-place (ufuncs con `out=`) sobre un único
+  buffer de salida.
+- Para entradas uint8 compone todas las operaciones en una tabla de búsqueda
+  (LUT) por canal y la aplica con np.take.
+
+Ejemplo
+-------
+    p = Pipeline().SumarBrillo(0.1).AjusteCanal(0, 0.2).Clip().Negativo()
+    resultado = p.Evaluar(img)
+    p.estadisticas["temporales_evitados"]
+"""
+
+import numpy as np
+import imgControl
+
+# Temporales de imagen completa que crea la versión directa de cada operación
+# (np.copy inicial + resultados intermedios de la aritmética).
+_TEMPORALES_DIRECTOS = {
+    "Negativo": 2,
+    "SumarBrillo": 2,
+    "AjusteCanal": 2,
+    "AjusteContraste": 4,
+    "Grises": 6,
+    "Binaria": 8,
+    "Clip": 1,
+}
+
+# Tamaño objetivo de cada franja de filas (bytes), para que quepa en caché
+_BYTES_FRANJA = 1 << 20
+
+PESOS_GRISES = np.array([0.299, 0.587, 0.114])
+
+
+class Pipeline:
+    """
+    Registro perezoso de operaciones puntuales.
+
+    Atributos
+    ---------
+    operaciones : list[tuple]
+        Operaciones registradas, en orden: (nombre, *parámetros).
+    estadisticas : dict
+        Se llena al evaluar: temporales usados, temporales que habría creado la
+        cadena directa de imgControl, temporales evitados y pasos del plan.
+    """
+
+    def __init__(self):
+        self.operaciones = []
+        self.estadisticas = {}
+
+    # ---- Registro (cada método devuelve self para encadenar) ----
+
+    def Negativo(self):
+        self.operaciones.append(("Negativo",))
+        return self
+
+    def SumarBrillo(self, brillo: float):
+        self.operaciones.append(("SumarBrillo", float(brillo)))
+        return self
+
+    def AjusteCanal(self, canal: int, ajuste: float):
+        self.operaciones.append(("AjusteCanal", int(canal), float(ajuste)))
+        return self
+
+    def AjusteContraste(self, zonas: int, contraste: float):
+        if zonas not in (0, 1):
+            raise ValueError("zonas debe ser 0 (logarítmico) o 1 (exponencial)")
+        self.operaciones.append(("AjusteContraste", int(zonas), float(contraste)))
+        return self
+
+    def Grises(self):
+        self.operaciones.append(("Grises",))
+        return self
+
+    def Binaria(self, umbral: float):
+        self.operaciones.append(("Binaria", float(umbral)))
+        return self
+
+    def Clip(self, minimo: float = 0.0, maximo: float = 1.0):
+        self.operaciones.append(("Clip", float(minimo), float(maximo)))
+        return self
+
+    def __len__(self):
+        return len(self.operaciones)
+
+    def __repr__(self):
+        nombres = " -> ".join(op[0] for op in self.operaciones)
+        return f"Pipeline({nombres})"
+
+    # ---- Planificación ----
+
+    def _planificar(self, canales: int):
+        """
+        Traduce las operaciones a pasos ejecutables, plegando las afines.
+
+        Pasos: ("afin", a, b), ("clip", lo, hi), ("log", c), ("exp", c),
+        ("grises",), ("binaria", umbral).
+        """
+        plan = []
+        a = np.ones(canales)
+        b = np.zeros(canales)
+        pendiente = False
+
+        def vaciar():
+            nonlocal a, b, pendiente
+            if pendiente:
+                plan.append(("afin", a, b))
+            a = np.ones(canales)
+            b = np.zeros(canales)
+            pendiente = False
+
+        for op in self.operaciones:
+            nombre = op[0]
+            if nombre == "Negativo":
+                a, b = -a, 1 - b
+                pendiente = True
+            elif nombre == "SumarBrillo":
+                b = b + op[1]
+                pendiente = True
+            elif nombre == "AjusteCanal":
+                if canales == 1:
+                    raise ValueError("AjusteCanal requiere una imagen con canales")
+                b = b.copy()
+                b[op[1]] += op[2]
+                pendiente = True
+            else:
+                vaciar()
+                if nombre == "AjusteContraste":
+                    plan.append(("log" if op[1] == 0 else "exp", op[2]))
+                elif nombre == "Clip":
+                    plan.append(("clip", op[1], op[2]))
+                elif nombre in ("Grises", "Binaria"):
+                    if canales > 1:
+                        plan.append(("grises",))
+                        canales = 1
+                        a = np.ones(1)
+                        b = np.zeros(1)
+                    if nombre == "Binaria":
+                        plan.append(("binaria", op[1]))
+        vaciar()
+        return plan
+
+    @staticmethod
+    def _aplicar_paso(paso, blk):
+        """Aplica un paso in-place sobre el bloque float blk."""
+        tipo = paso[0]
+        if tipo == "afin":
+            a, b = paso[1], paso[2]
+            if np.any(a != 1):
+                np.multiply(blk, a, out=blk)
+            if np.any(b != 0):
+                np.add(blk, b, out=blk)
+        elif tipo == "clip":
+            np.clip(blk, paso[1], paso[2], out=blk)
+        elif tipo == "log":
+            np.add(blk, 1, out=blk)
+            np.log10(blk, out=blk)
+            np.multiply(blk, paso[1], out=blk)
+        elif tipo == "exp":
+            np.subtract(blk, 1, out=blk)
+            np.exp(blk, out=blk)
+            np.multiply(blk, paso[1], out=blk)
+
+    # ---- Evaluación ----
+
+    def Evaluar(self, img: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Ejecuta la cadena sobre img y devuelve el resultado.
+
+        Parámetros
+        ----------
+        img : np.ndarray
+            Imagen (h,w,3) o (h,w). float en [0,1] o uint8.
+        out : np.ndarray, opcional
+            Buffer float64 de salida (puede ser la propia img para trabajar
+            in-place). Solo se usa si la cadena no cambia la forma de la imagen.
+
+        Retorna
+        -------
+        np.ndarray
+            float64 para entradas float, uint8 para entradas uint8, bool si la
+            cadena termina en Binaria.
+        """
+        canales = img.shape[2] if img.ndim == 3 else 1
+        plan = self._planificar(canales)
+        if img.dtype == np.uint8:
+            resultado, usados, pasadas = self._evaluar_lut(img, plan)
+        else:
+            resultado, usados, pasadas = self._evaluar_float(img, plan, out)
+
+        directos = sum(_TEMPORALES_DIRECTOS[op[0]] for op in self.operaciones)
+        self.estadisticas = {
+            "operaciones": len(self.operaciones),
+            "pasos": len(plan),
+            "pasadas": pasadas,
+            "temporales_directos": directos,
+            "temporales_usados": usados,
+            "temporales_evitados": max(0, directos - usados),
+        }
+        return resultado
+
+    def _evaluar_float(self, img, plan, out):
+        h, w = img.shape[:2]
+        canales = img.shape[2] if img.ndim == 3 else 1
+        usados = 0
+        cambia_forma = any(p[0] in ("grises", "binaria") for p in plan)
+
+        if out is not None and not cambia_forma and out.shape == img.shape \
+                and out.dtype == np.float64:
+            buf = out
+        else:
+            buf = np.empty(img.shape, dtype=np.float64)
+            usados += 1
+        gris = None
+        mascara = None
+        if any(p[0] == "grises" for p in plan):
+            gris = np.empty((h, w), dtype=np.float64)
+            usados += 1
+        if any(p[0] == "binaria" for p in plan):
+            mascara = np.empty((h, w), dtype=bool)
+            usados += 1
+            if plan[-1][0] != "binaria":
+                # Tras binarizar la cadena sigue en float
+                if gris is None:
+                    gris = np.empty((h, w), dtype=np.float64)
+                    usados += 1
+
+        en_sitio = buf is img
+        filas = max(1, _BYTES_FRANJA // max(1, w * canales * 8))
+        for yI in range(0, h, filas):
+            yF = min(yI + filas, h)
+            blk = buf[yI:yF]
+            if not en_sitio:
+                np.copyto(blk, img[yI:yF], casting="unsafe")
+            for paso in plan:
+                if paso[0] == "grises":
+                    np.dot(blk, PESOS_GRISES[:blk.shape[2]], out=gris[yI:yF])
+                    blk = gris[yI:yF]
+                elif paso[0] == "binaria":
+                    np.greater(blk, paso[1], out=mascara[yI:yF])
+                    blk = mascara[yI:yF]
+                else:
+                    if blk.dtype == bool:
+                        np.copyto(gris[yI:yF], blk)
+                        blk = gris[yI:yF]
+                    self._aplicar_paso(paso, blk)
+
+        if plan and plan[-1][0] == "binaria":
+            return mascara, usados, 1
+        if cambia_forma:
+            return gris, usados, 1
+        return buf, usados, 1
+
+    def _evaluar_lut(self, img, plan):
+        """
+        Camino uint8: cada tramo de pasos por canal se compone en una LUT de
+        256 entradas (se evalúa el plan sobre los 256 niveles posibles).
+        """
+        canales = img.shape[2] if img.ndim == 3 else 1
+        tramos = [[]]
+        for paso in plan:
+            if paso[0] in ("grises", "binaria"):
+                tramos.append(paso)
+                tramos.append([])
+            else:
+                tramos[-1].append(paso)
+
+        actual = img
+        usados = 0
+        pasadas = 0
+        for tramo in tramos:
+            if isinstance(tramo, tuple):
+                if tramo[0] == "grises":
+                    actual = imgControl.Grises(actual)
+                else:
+                    umbral = int(np.floor(tramo[1] * 255))
+                    actual = actual > umbral
+                canales = 1
+                usados += 1
+                pasadas += 1
+                continue
+            if not tramo:
+                continue
+            if actual.dtype == bool:
+                actual = actual.astype(np.uint8) * np.uint8(255)
+                usados += 1
+            niveles = np.arange(256, dtype=np.float64) / 255.0
+            tabla = np.repeat(niveles[:, None], canales, axis=1)
+            for paso in tramo:
+                self._aplicar_paso(paso, tabla if canales > 1 else tabla[:, 0])
+            lut = np.clip(np.rint(tabla * 255), 0, 255).astype(np.uint8)
+            actual = imgControl.AplicarLUT(actual, lut)
+            usados += 1
+            pasadas += 1
+        if actual is img:
+            actual = img.copy()
+            usados += 1
+        return actual, usados, pasadas
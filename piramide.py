@@ -0,0 +1,115 @@
+"""
+piramide.py
+-----------
+
+Pirámide multirresolución uint8 y renderizado de la región visible.
+
+mostrar_imagen convertía la imagen completa a uint8 y la redimensionaba entera
+en cada llamada, incluso al cambiar solo el zoom. Piramide convierte una vez a
+uint8 y genera bajo demanda niveles a 1/2, 1/4, ... (promedio 2x2 en enteros).
+Para mostrar, Ventana muestrea solo los píxeles visibles desde el nivel más
+pequeño que aún tiene resolución suficiente para el zoom pedido, así el costo
+depende del tamaño de la vista y no del de la imagen.
+
+Ejemplo
+-------
+    piramide = Piramide(img)
+    region = piramide.Ventana(0.25, x0=0, y0=0, ancho=900, alto=700)  # uint8 (700, 900, 3)
+"""
+
+import math
+import numpy as np
+import imgControl
+
+# Lado mínimo del nivel más pequeño
+LADO_MINIMO = 64
+
+
+def _mitad(nivel: np.ndarray) -> np.ndarray:
+    """Reduce un nivel uint8 a la mitad promediando bloques 2x2 (redondeo al más cercano)."""
+    h, w = nivel.shape[0] // 2 * 2, nivel.shape[1] // 2 * 2
+    suma = nivel[0:h:2, 0:w:2].astype(np.uint16)
+    suma += nivel[1:h:2, 0:w:2]
+    suma += nivel[0:h:2, 1:w:2]
+    suma += nivel[1:h:2, 1:w:2]
+    suma += 2
+    suma >>= 2
+    return suma.astype(np.uint8)
+
+
+class Piramide:
+    """
+    Niveles uint8 de una imagen: nivel 0 a resolución completa, nivel k a 1/2^k.
+
+    Atributos
+    ---------
+    img : np.ndarray
+        Imagen de origen (se usa para saber si la pirámide sigue vigente).
+    alto, ancho : int
+        Tamaño de la imagen de origen.
+    """
+
+    def __init__(self, img: np.ndarray):
+        self.img = img
+        self.alto, self.ancho = img.shape[:2]
+        self._niveles = []
+
+    def Nivel(self, k: int) -> np.ndarray:
+        """Nivel k (lo genera, junto con los intermedios, la primera vez)."""
+        if not self._niveles:
+            self._niveles.append(imgControl.ConvertirUint8(self.img))
+        while len(self._niveles) <= k:
+            self._niveles.append(_mitad(self._niveles[-1]))
+        return self._niveles[k]
+
+    def _ultimo(self) -> int:
+        # Índice del nivel más pequeño con lado >= LADO_MINIMO
+        return max(0, int(math.log2(max(1, min(self.alto, self.ancho) / LADO_MINIMO))))
+
+    def IndiceNivel(self, zoom: float) -> int:
+        """Nivel más pequeño con al menos la resolución que se muestra con este zoom."""
+        if zoom >= 1:
+            return 0
+        return min(int(math.floor(math.log2(1 / zoom))), self._ultimo())
+
+    def NivelHasta(self, pixeles: int) -> np.ndarray:
+        """Primer nivel con a lo sumo ~`pixeles` píxeles (p. ej. para el histograma en vivo)."""
+        k = math.ceil(math.log2(max(1.0, self.alto * self.ancho / pixeles)) / 2)
+        return self.Nivel(min(k, self._ultimo()))
+
+    def Preparar(self, zoom: float):
+        """Genera por adelantado los niveles que necesita este zoom (p. ej. en un hilo trabajador)."""
+        self.Nivel(self.IndiceNivel(zoom))
+        return self
+
+    def Ventana(self, zoom: float, x0: int, y0: int, ancho: int, alto: int) -> np.ndarray:
+        """
+        Región visible (alto, ancho) uint8 de la imagen mostrada a `zoom`, con la
+        esquina superior izquierda en (x0, y0) en coordenadas de la imagen ya
+        escalada. Muestreo por vecino más cercano desde el nivel adecuado.
+        """
+        nivel = self.Nivel(self.IndiceNivel(zoom))
+        hk, wk = nivel.shape[:2]
+        filas = ((np.arange(y0, y0 + alto) + 0.5) * (hk / (self.alto * zoom))).astype(np.intp)
+        columnas = ((np.arange(x0, x0 + ancho) + 0.5) * (wk / (self.ancho * zoom))).astype(np.intp)
+        np.clip(filas, 0, hk - 1, out=filas)
+        np.clip(columnas, 0, wk - 1, out=columnas)
+        return nivel[filas[:, None], columnas[None, :]]
+
+    def VentanaRotada(self, zoom: float, x0: int, y0: int, ancho: int, alto: int,
+                      angulo: float) -> np.ndarray:
+        """
+        Como Ventana, pero de la imagen rotada `angulo` grados (la geometría de
+        imgControl.RotarImg sin expandir). Solo se calcula el mapeo inverso de
+        los píxeles visibles, así que sirve para previsualizar la rotación.
+        """
+        nivel = self.Nivel(self.IndiceNivel(zoom))
+        hk, wk = nivel.shape[:2]
+        # Centros de los píxeles visibles en coordenadas de la imagen completa
+        filas = (np.arange(y0, y0 + alto) + 0.5) / zoom - 0.5
+        columnas = (np.arange(x0, x0 + ancho) + 0.5) / zoom - 0.5
+        _, mapa = imgControl.MapaRotacion(self.alto, self.ancho, angulo)
+        xr, yr = mapa(filas, columnas)
+        xs = (xr + 0.5) * (wk / self.ancho) - 0.5
+        ys = (yr + 0.5) * (hk / self.alto) - 0.5
+        return imgControl.Muestrear(nivel, xs, ys)
@@ -0,0 +1,125 @@
+"""
+previa.py
+---------
+
+Vista previa en vivo de los sliders (brillo, canal, rotación y fusión).
+
+Aplicar la transformación a la imagen completa en cada movimiento de un slider
+es demasiado lento. VistaPrevia toma una sola vez la región visible, ya a la
+resolución de pantalla (uint8, desde la Piramide), y en cada movimiento
+recalcula solo esa región:
+
+- Brillo y canal: una pasada de tabla de búsqueda (LUT) por la región, sobre un
+  buffer de salida reutilizado. Las tablas de todas las posiciones del slider
+  se precalculan con TablasSlider.
+- Fusión: mezcla en enteros (punto fijo de 8 bits) con la misma región de la
+  segunda imagen, que se toma una sola vez.
+- Rotación: mapeo inverso solo de los píxeles visibles (Piramide.VentanaRotada).
+
+Es una aproximación a la resolución de pantalla: la transformación real se
+calcula al soltar el slider.
+
+Ejemplo
+-------
+    TablasSlider(-0.5, 0.5, 0.05)
+    previa = VistaPrevia(piramide, zoom, (x0, y0, ancho, alto))
+    region = previa.Brillo(0.2)      # uint8 (alto, ancho, 3), lista para mostrar
+"""
+
+from functools import lru_cache
+import numpy as np
+import imgControl
+from piramide import Piramide
+
+
+def _valor(valor: float) -> float:
+    # Misma clave de caché para 0.15 y 0.15000000000000002
+    return round(float(valor), 10)
+
+
+@lru_cache(maxsize=256)
+def TablaCanal(canal: int, ajuste: float, canales: int = 3) -> np.ndarray:
+    """Tabla (256, canales) uint8: identidad salvo en `canal`, que suma `ajuste`."""
+    tabla = np.repeat(np.arange(256, dtype=np.uint8)[:, None], canales, axis=1)
+    tabla[:, canal] = imgControl.LUT("SumarBrillo", _valor(ajuste))
+    tabla.flags.writeable = False
+    return tabla
+
+
+def TablasSlider(desde: float, hasta: float, resolucion: float, canales: int = 3):
+    """
+    Precalcula las tablas de brillo y de canal de todas las posiciones de un
+    slider (quedan en las cachés de imgControl.LUT y TablaCanal).
+    """
+    for valor in np.arange(desde, hasta + resolucion / 2, resolucion):
+        imgControl.LUT("SumarBrillo", _valor(valor))
+        for canal in range(canales):
+            TablaCanal(canal, _valor(valor), canales)
+
+
+class VistaPrevia:
+    """
+    Región visible de una imagen, lista para previsualizar transformaciones.
+
+    Atributos
+    ---------
+    piramide : Piramide
+        Pirámide de la imagen mostrada (sin modificar).
+    zoom : float
+        Zoom con que se muestra la pirámide.
+    ventana : tuple
+        (x0, y0, ancho, alto) de la región visible, en píxeles de pantalla.
+    base : np.ndarray
+        Región visible uint8 sin transformar (se toma una sola vez).
+    """
+
+    def __init__(self, piramide: Piramide, zoom: float, ventana: tuple):
+        self.piramide = piramide
+        self.zoom = zoom
+        self.ventana = tuple(ventana)
+        self.base = piramide.Ventana(zoom, *self.ventana)
+        self._salida = np.empty_like(self.base)
+        self._segunda = None  # (pirámide, zoom, región) de la segunda imagen
+        self._acumulado = None
+
+    def Vigente(self, piramide: Piramide, zoom: float, ventana: tuple) -> bool:
+        """True si la previa corresponde a esta pirámide, zoom y región visible."""
+        return piramide is self.piramide and zoom == self.zoom and tuple(ventana) == self.ventana
+
+    def Brillo(self, brillo: float) -> np.ndarray:
+        """Región con el brillo sumado y recortado (una pasada de LUT)."""
+        lut = imgControl.LUT("SumarBrillo", _valor(brillo))
+        return imgControl.AplicarLUT(self.base, lut, out=self._salida)
+
+    def Canal(self, canal: int, ajuste: float) -> np.ndarray:
+        """Región con `ajuste` sumado al canal indicado (una pasada de LUT)."""
+        if self.base.ndim != 3:
+            return self.base
+        tabla = TablaCanal(canal, _valor(ajuste), self.base.shape[2])
+        return imgControl.AplicarLUT(self.base, tabla, out=self._salida)
+
+    def Rotacion(self, angulo: float) -> np.ndarray:
+        """Región visible de la imagen rotada (solo se muestrean los píxeles visibles)."""
+        return self.piramide.VentanaRotada(self.zoom, *self.ventana, angulo)
+
+    def Fusion(self, factor: float, piramide2: Piramide, zoom2: float) -> np.ndarray:
+        """
+        Región mezclada factor * imagen + (1 - factor) * segunda imagen.
+
+        zoom2 es el zoom con que hay que muestrear la segunda imagen para que sus
+        píxeles coincidan con los de la primera (difiere en modo proxy).
+        """
+        if self._segunda is None or self._segunda[:2] != (piramide2, zoom2):
+            self._segunda = (piramide2, zoom2, piramide2.Ventana(zoom2, *self.ventana))
+            self._acumulado = np.empty(self.base.shape, dtype=np.uint16)
+        segunda = self._segunda[2]
+        if segunda.shape != self.base.shape:
+            return self.base
+        peso = int(round(min(max(factor, 0.0), 1.0) * 256))
+        acumulado = self._acumulado
+        np.multiply(self.base, np.uint16(peso), out=acumulado)
+        acumulado += segunda * np.uint16(256 - peso)
+        acumulado += 128
+        acumulado >>= 8
+        np.copyto(self._salida, acumulado, casting="unsafe")
+        return self._salida
@@ -0,0 +1,683 @@
+"""
+secuencias.py
+-------------
+
+Procesamiento en flujo de secuencias de cuadros (cámara, video) con las
+operaciones de imgControl, sin interfaz gráfica (no importa tkinter ni
+matplotlib).
+
+Los cuadros llegan de un generador: una secuencia numerada de archivos
+(LeerSecuencia) o un flujo de cuadros crudos por una tubería (LeerCrudo, p. ej.
+la salida rawvideo de ffmpeg). ProcesadorSecuencia solapa las tres fases en
+hilos unidos por colas acotadas:
+
+    lector (decodificar) -> cola -> cálculo (CadenaCuadros) -> cola -> escritor (codificar)
+
+- Todos los buffers se reservan con el primer cuadro y se reciclan: un
+  conjunto de buffers de entrada y otro de salida que circulan entre las
+  colas, dos intermedios que se alternan entre etapas y el estado propio de
+  cada etapa. El cálculo no reserva memoria por cuadro.
+- Las etapas escriben con `out=`: las puntuales consecutivas (negativo,
+  brillo, canal, contraste) se componen en una LUT por canal; grises y
+  binarizar usan la aritmética entera de histograma.Luminancia; fusionar
+  precalcula la parte del fondo de CombinarF.
+- Etapas temporales con estado entre cuadros: PromedioMovil (la mezcla de
+  CombinarF entre el cuadro y el promedio acumulado) y DiferenciaCuadros.
+- Con descartar=True (fuentes en vivo) el lector no espera: si no hay buffer
+  libre el cuadro se descarta y se cuenta, en lugar de frenar la fuente.
+
+Procesar devuelve los cuadros por segundo sostenidos, los descartados y el
+tiempo medio de cada fase.
+
+Uso
+---
+    python secuencias.py "cuadros/%05d.png" -o "salida/%05d.png" --op grises --op contraste=log
+    python secuencias.py capturas/ -o promedio/ --op promedio=0.1
+    ffmpeg -i entrada.mp4 -f rawvideo -pix_fmt rgb24 - \\
+        | python secuencias.py - --tam 1280x720 -o - --op diferencia --descartar \\
+        | ffmpeg -f rawvideo -pix_fmt rgb24 -s 1280x720 -i - salida.mp4
+
+Operaciones (--op, en orden)
+----------------------------
+    negativo | grises | binarizar[=umbral] | brillo=valor | canal=R|G|B,ajuste
+    contraste=log|exp[,factor] | fusionar=ruta[,factor]
+    promedio=alfa | diferencia
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+import numpy as np
+import histograma
+import lote
+from pipeline import Pipeline
+from instrumentacion import Medir
+
+# Cuadros en espera entre fases (la latencia extra es de a lo sumo esta
+# cantidad de cuadros por cola)
+PROFUNDIDAD = 2
+
+# Cuadros usados para los cuadros por segundo de la ventana reciente
+VENTANA_FPS = 30
+
+# Índices por tramo de EtapaPuntual (intp: 1 MB)
+_ELEMENTOS_TRAMO = 1 << 17
+
+_PUNTUALES = ("negativo", "brillo", "canal", "contraste")
+
+# Operaciones que no tienen sentido sobre cuadros de un solo canal
+_REQUIEREN_COLOR = ("canal",)
+
+
+# =============== Etapas ===============
+
+class EtapaPuntual:
+    """
+    Operaciones puntuales de un Pipeline compuestas en una LUT por canal.
+
+    La tabla se aplana a [nivel * canales + canal] para indexar el cuadro
+    intercalado de una vez; los índices intp van a un buffer propio por tramos
+    (imgControl.AplicarLUT reserva uno por franja en cada llamada).
+    """
+
+    def __init__(self, pipeline: Pipeline):
+        self.pipeline = pipeline
+        self._tabla = None
+        self._indices = None
+        self._desplazamientos = None
+
+    def Preparar(self, forma: tuple):
+        canales = forma[2] if len(forma) == 3 else 1
+        # La cadena evaluada sobre los 256 niveles es su propia tabla
+        rampa = np.repeat(np.arange(256, dtype=np.uint8)[:, None, None], canales, axis=2)
+        self._tabla = np.ascontiguousarray(self.pipeline.Evaluar(rampa)[:, 0, :]).reshape(-1)
+        tramo = max(canales, _ELEMENTOS_TRAMO // canales * canales)
+        self._indices = np.empty(tramo, dtype=np.intp)
+        self._desplazamientos = np.tile(np.arange(canales, dtype=np.intp), tramo // canales)
+
+    def Aplicar(self, entrada: np.ndarray, salida: np.ndarray):
+        canales = entrada.shape[2] if entrada.ndim == 3 else 1
+        plana, destino = entrada.reshape(-1), salida.reshape(-1)
+        tramo = self._indices.size
+        for i in range(0, plana.size, tramo):
+            n = min(tramo, plana.size - i)
+            indices = self._indices[:n]
+            np.copyto(indices, plana[i:i + n])
+            if canales > 1:
+                indices *= canales
+                indices += self._desplazamientos[:n]
+            # mode="clip": con "raise" y out, take usa un buffer intermedio
+            np.take(self._tabla, indices, out=destino[i:i + n], mode="clip")
+
+
+class EtapaGrises:
+    """
+    Luminancia (histograma.Luminancia, pesos enteros) replicada en todos los
+    canales; con umbral, binaria 0/255 como imgControl.Binaria.
+    """
+
+    def __init__(self, umbral: float | None = None):
+        self.umbral = umbral
+        self._corte = None
+        self._mascara = None
+        self._gris = None
+        self._suma = None
+
+    def Preparar(self, forma: tuple):
+        if self.umbral is not None:
+            # Como imgControl.Binaria: gris/255 > umbral  <=>  gris > floor(umbral * 255)
+            self._corte = int(np.floor(self.umbral * 255))
+            self._mascara = np.empty(forma[:2], dtype=bool)
+        self._gris = np.empty(forma[:2], dtype=np.uint16)
+        self._suma = np.empty(forma[:2], dtype=np.uint16)
+
+    def Aplicar(self, entrada: np.ndarray, salida: np.ndarray):
+        gris, suma = self._gris, self._suma
+        if entrada.ndim == 2:
+            np.copyto(gris, entrada)
+        else:
+            r, g, b = histograma._PESOS_LUMA_U8
+            np.multiply(entrada[:, :, 0], r, out=gris, dtype=np.uint16)
+            np.multiply(entrada[:, :, 1], g, out=suma, dtype=np.uint16)
+            gris += suma
+            np.multiply(entrada[:, :, 2], b, out=suma, dtype=np.uint16)
+            gris += suma
+            gris += 128
+            gris >>= 8
+        if self.umbral is not None:
+            np.greater(gris, self._corte, out=self._mascara)
+            np.multiply(self._mascara, 255, out=gris, dtype=np.uint16)
+        if salida.ndim == 2:
+            np.copyto(salida, gris, casting="unsafe")
+            return
+        # Canal por canal desde gris: copiar entre canales de salida se solapa
+        # en memoria y numpy haría una copia temporal
+        for c in range(salida.shape[2]):
+            np.copyto(salida[:, :, c], gris, casting="unsafe")
+
+
+class EtapaFusion:
+    """CombinarF(cuadro, fondo, factor) con la parte del fondo precalculada."""
+
+    def __init__(self, fondo: np.ndarray, factor: float):
+        self.fondo = fondo
+        self.factor = factor
+        self._fondo = None
+        self._mezcla = None
+
+    def Preparar(self, forma: tuple):
+        fondo = self.fondo
+        if len(forma) == 2 and fondo.ndim == 3:
+            fondo = histograma.Luminancia(fondo[:, :, :3])
+        elif len(forma) == 3:
+            if fondo.ndim == 2:
+                fondo = fondo[:, :, None]
+            canales = fondo.shape[2]
+            if canales == 1:
+                fondo = np.repeat(fondo, min(3, forma[2]), axis=2)
+            if fondo.shape[2] < forma[2]:
+                # Cuadros RGBA y fondo RGB: alfa opaco
+                alfa = np.full(fondo.shape[:2] + (forma[2] - fondo.shape[2],), 255, dtype=fondo.dtype)
+                fondo = np.concatenate((fondo, alfa), axis=2)
+            fondo = fondo[:, :, :forma[2]]
+        if fondo.shape[0] < forma[0] or fondo.shape[1] < forma[1]:
+            raise ValueError(f"La imagen de fusión ({fondo.shape[1]}x{fondo.shape[0]}) es "
+                             f"menor que los cuadros ({forma[1]}x{forma[0]})")
+        self._fondo = fondo[:forma[0], :forma[1]] * np.float32(1 - self.factor)
+        self._mezcla = np.empty(forma, dtype=np.float32)
+
+    def Aplicar(self, entrada: np.ndarray, salida: np.ndarray):
+        mezcla = self._mezcla
+        np.multiply(entrada, np.float32(self.factor), out=mezcla)
+        mezcla += self._fondo
+        np.rint(mezcla, out=mezcla)
+        np.clip(mezcla, 0, 255, out=mezcla)
+        np.copyto(salida, mezcla, casting="unsafe")
+
+
+class PromedioMovil:
+    """
+    Promedio exponencial de los cuadros: promedio = CombinarF(cuadro, promedio, alfa).
+
+    El promedio se acumula en float32 (sin redondear entre cuadros) y se
+    cuantiza solo al escribir la salida. alfa chico suaviza más (ruido,
+    fondo estático); alfa = 1 deja pasar el cuadro.
+    """
+
+    def __init__(self, alfa: float):
+        if not 0 < alfa <= 1:
+            raise ValueError("alfa debe estar en (0, 1]")
+        self.alfa = alfa
+        self.promedio = None
+        self._mezcla = None
+        self._vacio = True
+
+    def Preparar(self, forma: tuple):
+        self.promedio = np.empty(forma, dtype=np.float32)
+        self._mezcla = np.empty(forma, dtype=np.float32)
+        self._vacio = True
+
+    def Aplicar(self, entrada: np.ndarray, salida: np.ndarray):
+        promedio, mezcla = self.promedio, self._mezcla
+        if self._vacio:
+            np.copyto(promedio, entrada)
+            self._vacio = False
+        else:
+            # Mismo orden de operaciones que CombinarF, in-place
+            np.multiply(entrada, np.float32(self.alfa), out=mezcla)
+            promedio *= np.float32(1 - self.alfa)
+            promedio += mezcla
+        np.rint(promedio, out=mezcla)
+        np.clip(mezcla, 0, 255, out=mezcla)
+        np.copyto(salida, mezcla, casting="unsafe")
+
+
+class DiferenciaCuadros:
+    """|cuadro - cuadro anterior| (movimiento); el primer cuadro da 0."""
+
+    def __init__(self):
+        self.anterior = None
+        self._menor = None
+        self._vacio = True
+
+    def Preparar(self, forma: tuple):
+        self.anterior = np.empty(forma, dtype=np.uint8)
+        self._menor = np.empty(forma, dtype=np.uint8)
+        self._vacio = True
+
+    def Aplicar(self, entrada: np.ndarray, salida: np.ndarray):
+        if self._vacio:
+            np.copyto(self.anterior, entrada)
+            self._vacio = False
+        # max - min en uint8: sin desborde ni temporales int16
+        np.minimum(entrada, self.anterior, out=self._menor)
+        np.maximum(entrada, self.anterior, out=salida)
+        salida -= self._menor
+        np.copyto(self.anterior, entrada)
+
+
+class CadenaCuadros:
+    """
+    Etapas aplicadas a cada cuadro uint8 (h,w,c) o (h,w).
+
+    Las etapas conservan la forma del cuadro; los resultados intermedios se
+    alternan entre dos buffers reservados en Preparar y la última etapa
+    escribe directamente en el buffer de salida.
+    """
+
+    def __init__(self, etapas: list):
+        self.etapas = etapas
+        self.forma = None
+        self._intermedios = ()
+
+    @classmethod
+    def DesdeOperaciones(cls, operaciones: list) -> "CadenaCuadros":
+        """Cadena a partir de tuplas de ParsearEtapa (puntuales consecutivas en una LUT)."""
+        etapas = []
+        actual = None
+        for op in operaciones:
+            nombre = op[0]
+            if nombre in _PUNTUALES:
+                if actual is None:
+                    actual = Pipeline()
+                    etapas.append(EtapaPuntual(actual))
+                if nombre == "negativo":
+                    actual.Negativo()
+                elif nombre == "brillo":
+                    actual.SumarBrillo(op[1]).Clip()
+                elif nombre == "canal":
+                    actual.AjusteCanal(op[1], op[2]).Clip()
+                else:
+                    actual.AjusteContraste(op[1], op[2]).Clip()
+                continue
+            actual = None
+            if nombre == "grises":
+                etapas.append(EtapaGrises())
+            elif nombre == "binarizar":
+                etapas.append(EtapaGrises(op[1]))
+            elif nombre == "fusionar":
+                etapas.append(EtapaFusion(lote.Decodificar(op[1]), op[2]))
+            elif nombre == "promedio":
+                etapas.append(PromedioMovil(op[1]))
+            elif nombre == "diferencia":
+                etapas.append(DiferenciaCuadros())
+        return cls(etapas)
+
+    def Preparar(self, forma: tuple):
+        self.forma = tuple(forma)
+        for etapa in self.etapas:
+            etapa.Preparar(self.forma)
+        necesarios = min(2, max(0, len(self.etapas) - 1))
+        self._intermedios = tuple(np.empty(self.forma, dtype=np.uint8) for _ in range(necesarios))
+
+    def Aplicar(self, entrada: np.ndarray, salida: np.ndarray) -> np.ndarray:
+        if not self.etapas:
+            np.copyto(salida, entrada)
+            return salida
+        actual = entrada
+        for i, etapa in enumerate(self.etapas):
+            destino = salida if i == len(self.etapas) - 1 else self._intermedios[i % 2]
+            etapa.Aplicar(actual, destino)
+            actual = destino
+        return salida
+
+
+def ParsearEtapa(texto: str) -> tuple:
+    """
+    Como lote.ParsearOperacion, más las temporales "promedio=alfa" y
+    "diferencia"; rechaza las operaciones que no son por píxel.
+    """
+    nombre, _, resto = texto.partition("=")
+    nombre = nombre.strip().lower()
+    if nombre == "diferencia":
+        return (nombre,)
+    if nombre == "promedio":
+        try:
+            alfa = float(resto)
+        except ValueError:
+            raise ValueError(f"Parámetros inválidos para la operación: {texto}")
+        if not 0 < alfa <= 1:
+            raise ValueError(f"alfa debe estar en (0, 1]: {texto}")
+        return (nombre, alfa)
+    op = lote.ParsearOperacion(texto)
+    if op[0] == "binarizar" and isinstance(op[1], str):
+        raise ValueError(f"En secuencias binarizar solo admite un umbral fijo: {texto}")
+    if op[0] not in _PUNTUALES + ("grises", "binarizar", "fusionar"):
+        raise ValueError(f"Operación no disponible en secuencias: {op[0]}")
+    return op
+
+
+# =============== Fuentes y destinos ===============
+
+def LeerSecuencia(patron: str, inicio: int = 0):
+    """
+    Genera los cuadros RGB uint8 de una secuencia de archivos.
+
+    patron con formato printf ("cuadros/%05d.png") recorre los números desde
+    inicio hasta el primero que falte; un directorio o patrón glob recorre los
+    archivos en orden (lote.ListarEntradas).
+    """
+    if "%" in patron:
+        indice = inicio
+        while os.path.isfile(patron % indice):
+            yield lote.Decodificar(patron % indice)
+            indice += 1
+        return
+    for ruta in lote.ListarEntradas([patron]):
+        yield lote.Decodificar(ruta)
+
+
+def LeerCrudo(flujo, ancho: int, alto: int, canales: int = 3):
+    """
+    Genera cuadros crudos uint8 (alto, ancho, canales) leídos de un flujo binario.
+
+    Se lee con readinto sobre un único buffer reutilizado: cada cuadro es
+    válido hasta pedir el siguiente. Un cuadro incompleto al final se ignora.
+    """
+    forma = (alto, ancho) if canales == 1 else (alto, ancho, canales)
+    cuadro = np.empty(forma, dtype=np.uint8)
+    vista = memoryview(cuadro).cast("B")
+    while True:
+        leidos = 0
+        while leidos < len(vista):
+            n = flujo.readinto(vista[leidos:])
+            if not n:
+                return
+            leidos += n
+        yield cuadro
+
+
+def EscribirSecuencia(patron: str):
+    """Destino que guarda cada cuadro como patron % indice (o directorio/NNNNNN.png)."""
+    if "%" not in patron:
+        patron = os.path.join(patron, "%06d.png")
+
+    def escribir(cuadro, indice):
+        lote.Codificar(cuadro, patron % indice)
+    return escribir
+
+
+def EscribirCrudo(flujo):
+    """Destino que escribe los bytes crudos de cada cuadro en un flujo binario."""
+    def escribir(cuadro, indice):
+        flujo.write(memoryview(cuadro).cast("B"))
+    return escribir
+
+
+# =============== Procesador ===============
+
+_FIN = object()
+
+# Fase -> contador por el que se promedia su tiempo
+_FASES = {"lectura": "leidos", "calculo": "procesados", "escritura": "escritos"}
+
+
+class ProcesadorSecuencia:
+    """
+    Lector, cálculo y escritor solapados sobre buffers reciclados.
+
+    Atributos
+    ---------
+    cadena : CadenaCuadros
+        Etapas aplicadas a cada cuadro.
+    profundidad : int
+        Cuadros en espera entre fases (cada lado tiene profundidad + 1 buffers).
+    descartar : bool
+        Descartar cuadros si el cálculo no da abasto, en lugar de frenar al
+        lector (fuentes en vivo).
+    estadisticas : dict
+        Se llena al terminar Procesar.
+    """
+
+    def __init__(self, cadena: CadenaCuadros, profundidad: int = PROFUNDIDAD,
+                 descartar: bool = False):
+        self.cadena = cadena
+        self.profundidad = max(1, profundidad)
+        self.descartar = descartar
+        self.estadisticas = {}
+
+    def _esperar(self, cola, detener):
+        """get que se rinde si otra fase falló o se canceló."""
+        while True:
+            try:
+                return cola.get(timeout=0.1)
+            except queue.Empty:
+                if detener.is_set():
+                    return _FIN
+
+    def Procesar(self, cuadros, escribir=None, progreso=None, cancelar=None) -> dict:
+        """
+        Procesa todos los cuadros del iterable.
+
+        Parámetros
+        ----------
+        cuadros : iterable de np.ndarray
+            Cuadros uint8 de forma constante (p. ej. LeerSecuencia, LeerCrudo).
+            Cada cuadro se copia a un buffer propio antes de pedir el siguiente.
+        escribir : callable, opcional
+            escribir(cuadro, indice) en el hilo escritor; el cuadro es un buffer
+            que se recicla al volver.
+        progreso : callable, opcional
+            progreso(escritos) después de cada cuadro escrito.
+        cancelar : threading.Event, opcional
+            Detiene la lectura; los cuadros ya leídos se terminan.
+
+        Retorna
+        -------
+        dict
+            Cuadros leídos, procesados, escritos y descartados, cuadros por
+            segundo (sostenidos y de la ventana reciente) y ms por fase.
+        """
+        iterador = iter(cuadros)
+        inicio = time.perf_counter()
+        with Medir("decodificar", "secuencias"):
+            primero = next(iterador, None)
+        if primero is None:
+            contadores = dict.fromkeys(("leidos", "descartados", "procesados", "escritos"), 0)
+            tiempos = dict.fromkeys(_FASES, 0.0)
+            self.estadisticas = self._estadisticas(inicio, contadores, tiempos, deque(), 0.0)
+            return self.estadisticas
+
+        forma = primero.shape
+        self.cadena.Preparar(forma)
+        # Cada cola tiene a lo sumo profundidad cuadros más el que está en la
+        # fase siguiente: con profundidad 1, doble buffer
+        n_buffers = self.profundidad + 1
+        libres_entrada = queue.Queue()
+        libres_salida = queue.Queue()
+        for _ in range(n_buffers):
+            libres_entrada.put(np.empty(forma, dtype=np.uint8))
+            libres_salida.put(np.empty(forma, dtype=np.uint8))
+        # Los buffers acotan las colas; el lugar extra es para la marca de fin
+        a_calcular = queue.Queue(maxsize=n_buffers + 1)
+        a_escribir = queue.Queue(maxsize=n_buffers + 1)
+        detener = threading.Event()
+        errores = []
+        tiempos = {"lectura": time.perf_counter() - inicio, "calculo": 0.0, "escritura": 0.0}
+        contadores = {"leidos": 0, "descartados": 0, "procesados": 0, "escritos": 0}
+        recientes = deque(maxlen=VENTANA_FPS)
+
+        def leer():
+            # lectura: decodificar (next) y copiar al buffer, sin las esperas
+            try:
+                cuadro = primero
+                indice = 0
+                while cuadro is not None:
+                    if cancelar is not None and cancelar.is_set() or detener.is_set():
+                        break
+                    if cuadro.shape != forma or cuadro.dtype != np.uint8:
+                        raise ValueError(f"Cuadro {indice}: se esperaba uint8 {forma}, "
+                                         f"llegó {cuadro.dtype} {cuadro.shape}")
+                    contadores["leidos"] += 1
+                    buffer = None
+                    if self.descartar:
+                        try:
+                            buffer = libres_entrada.get_nowait()
+                        except queue.Empty:
+                            contadores["descartados"] += 1
+                    else:
+                        buffer = self._esperar(libres_entrada, detener)
+                        if buffer is _FIN:
+                            break
+                    t0 = time.perf_counter()
+                    if buffer is not None:
+                        np.copyto(buffer, cuadro)
+                        a_calcular.put((indice, buffer))
+                    indice += 1
+                    with Medir("decodificar", "secuencias"):
+                        cuadro = next(iterador, None)
+                    tiempos["lectura"] += time.perf_counter() - t0
+            except BaseException as error:
+                errores.append(error)
+                detener.set()
+            finally:
+                a_calcular.put(_FIN)
+
+        def escribir_todo():
+            try:
+                while True:
+                    item = self._esperar(a_escribir, detener)
+                    if item is _FIN:
+                        break
+                    indice, salida = item
+                    t0 = time.perf_counter()
+                    if escribir is not None:
+                        with Medir("codificar", "secuencias"):
+                            escribir(salida, indice)
+                    libres_salida.put(salida)
+                    ahora = time.perf_counter()
+                    tiempos["escritura"] += ahora - t0
+                    recientes.append(ahora)
+                    contadores["escritos"] += 1
+                    if progreso is not None:
+                        progreso(contadores["escritos"])
+            except BaseException as error:
+                errores.append(error)
+                detener.set()
+
+        lector = threading.Thread(target=leer, name="secuencias-lector", daemon=True)
+        escritor = threading.Thread(target=escribir_todo, name="secuencias-escritor", daemon=True)
+        lector.start()
+        escritor.start()
+        try:
+            while True:
+                item = self._esperar(a_calcular, detener)
+                if item is _FIN:
+                    break
+                indice, entrada = item
+                salida = self._esperar(libres_salida, detener)
+                if salida is _FIN:
+                    break
+                t0 = time.perf_counter()
+                with Medir("cuadro", "secuencias"):
+                    self.cadena.Aplicar(entrada, salida)
+                tiempos["calculo"] += time.perf_counter() - t0
+                libres_entrada.put(entrada)
+                contadores["procesados"] += 1
+                a_escribir.put((indice, salida))
+        except BaseException as error:
+            errores.append(error)
+            detener.set()
+        finally:
+            a_escribir.put(_FIN)
+            escritor.join()
+            detener.set()
+            lector.join()
+        if errores:
+            raise errores[0]
+
+        mb = n_buffers * 2 * primero.nbytes + sum(b.nbytes for b in self.cadena._intermedios)
+        self.estadisticas = self._estadisticas(inicio, contadores, tiempos, recientes, mb / 1e6)
+        self.estadisticas["forma"] = list(forma)
+        return self.estadisticas
+
+    @staticmethod
+    def _estadisticas(inicio, contadores, tiempos, recientes, mb_buffers) -> dict:
+        segundos = time.perf_counter() - inicio
+        ventana = 0.0
+        if len(recientes) > 1:
+            ventana = (len(recientes) - 1) / max(recientes[-1] - recientes[0], 1e-9)
+        por_cuadro = {f"{fase}_ms": 1000 * tiempos[fase] / max(1, contadores[cuenta])
+                      for fase, cuenta in _FASES.items()}
+        return {
+            **contadores,
+            "segundos": segundos,
+            "fps": contadores["escritos"] / segundos if segundos > 0 else 0.0,
+            "fps_ventana": ventana,
+            "mb_buffers": mb_buffers,
+            **por_cuadro,
+        }
+
+
+# =============== Línea de comandos ===============
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Aplica operaciones de imgControl a secuencias de cuadros en flujo.")
+    parser.add_argument("entrada", help="Patrón numerado (%%05d), directorio, glob o - (crudo por stdin)")
+    parser.add_argument("-o", "--salida", default=None,
+                        help="Patrón numerado, directorio o - (crudo por stdout); sin salida solo mide")
+    parser.add_argument("--op", action="append", default=[], metavar="NOMBRE[=ARGS]",
+                        help="Operación a aplicar (repetible, en orden)")
+    parser.add_argument("--tam", default=None, metavar="ANCHOxALTO",
+                        help="Tamaño de los cuadros crudos")
+    parser.add_argument("--canales", type=int, default=3, choices=(1, 3, 4),
+                        help="Canales de los cuadros crudos")
+    parser.add_argument("--inicio", type=int, default=0, help="Primer número de la secuencia")
+    parser.add_argument("--profundidad", type=int, default=PROFUNDIDAD,
+                        help="Cuadros en cada cola entre fases")
+    parser.add_argument("--descartar", action="store_true",
+                        help="Descartar cuadros si el cálculo no da abasto (fuentes en vivo)")
+    parser.add_argument("--json", action="store_true", help="Imprimir estadísticas en JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        operaciones = [ParsearEtapa(op) for op in args.op]
+        cadena = CadenaCuadros.DesdeOperaciones(operaciones)
+    except ValueError as error:
+        parser.error(str(error))
+
+    if args.entrada == "-":
+        if not args.tam:
+            parser.error("--tam es obligatorio para cuadros crudos")
+        if args.canales == 1:
+            for op in operaciones:
+                if op[0] in _REQUIEREN_COLOR:
+                    parser.error(f"La operación {op[0]} requiere cuadros con color (--canales 3 o 4)")
+        try:
+            ancho, alto = (int(v) for v in args.tam.lower().split("x"))
+        except ValueError:
+            parser.error(f"Tamaño inválido: {args.tam}")
+        cuadros = LeerCrudo(sys.stdin.buffer, ancho, alto, args.canales)
+    else:
+        cuadros = LeerSecuencia(args.entrada, args.inicio)
+
+    if args.salida is None:
+        escribir = None
+    elif args.salida == "-":
+        escribir = EscribirCrudo(sys.stdout.buffer)
+    else:
+        escribir = EscribirSecuencia(args.salida)
+
+    procesador = ProcesadorSecuencia(cadena, args.profundidad, args.descartar)
+    estadisticas = procesador.Procesar(cuadros, escribir)
+    # Con salida cruda stdout lleva los cuadros: el resumen va a stderr
+    destino = sys.stderr if args.salida == "-" else sys.stdout
+    if args.json:
+        print(json.dumps(estadisticas, indent=2), file=destino)
+    else:
+        print(f"{estadisticas['escritos']} cuadros, {estadisticas['descartados']} descartados "
+              f"en {estadisticas['segundos']:.2f} s | {estadisticas['fps']:.1f} fps sostenidos "
+              f"({estadisticas['fps_ventana']:.1f} recientes) | lectura "
+              f"{estadisticas['lectura_ms']:.1f} ms, cálculo {estadisticas['calculo_ms']:.1f} ms, "
+              f"escritura {estadisticas['escritura_ms']:.1f} ms por cuadro", file=destino)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
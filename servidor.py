@@ -0,0 +1,653 @@
+"""
+servidor.py
+-----------
+
+Servicio HTTP local con las operaciones de imgControl, sin interfaz gráfica
+(no importa tkinter ni matplotlib, así que arranca rápido).
+
+Otras herramientas envían los bytes de una imagen y una cadena de operaciones
+(la misma sintaxis que lote.py) y reciben la imagen procesada:
+
+- Pool de procesos precalentado: los trabajadores arrancan con el servidor y
+  ejecutan una cadena de prueba (importaciones, tablas y cachés listas) antes
+  de aceptar la primera petición.
+- Agrupación: las imágenes chicas que llegan a la vez viajan al pool en una
+  sola tarea (menos idas y vueltas entre procesos). Si hay trabajadores libres
+  no se espera; con el pool ocupado se juntan hasta `tam_lote` imágenes
+  durante a lo sumo `espera_lote_s`.
+- Caché de entradas: cache.CacheImagenes por hash del contenido; la misma
+  imagen enviada otra vez no se decodifica.
+- Contrapresión: a lo sumo `limite_cola` peticiones admitidas a la vez (las
+  demás reciben 503 con Retry-After) y cuerpos de hasta `max_bytes` (413).
+  Las cadenas que llegan por la red se limitan: ni la entrada ni ningún paso
+  (ampliar, rotar con expandir) puede superar `max_pixeles` (413).
+- Si un trabajador muere, las peticiones que estaban en ese pool reciben 503
+  y el pool se rehace y recalienta; las que llegan después (incluso las que
+  encontraron el pool ya roto) se atienden en el nuevo.
+- La respuesta se envía por trozos (Transfer-Encoding: chunked).
+- /metricas: profundidad de la cola, percentiles de latencia total y por fase,
+  rendimiento, lotes y caché, en JSON.
+
+Uso
+---
+    python servidor.py --puerto 8080 -j 4
+    curl --data-binary @foto.jpg "http://127.0.0.1:8080/procesar?op=grises&op=contraste=log,1.2" -o gris.png
+    curl --data-binary @foto.jpg "http://127.0.0.1:8080/procesar?op=rotar=30,bilineal&formato=jpg" -o rotada.jpg
+    curl http://127.0.0.1:8080/metricas
+
+Rutas
+-----
+    POST /procesar?op=NOMBRE[=ARGS]&...[&formato=png|jpg]   cuerpo: imagen codificada
+    GET  /metricas                                          estadísticas en JSON
+    GET  /salud                                             {"estado": "ok"}
+"""
+
+import argparse
+import io
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as TiempoAgotado
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+from PIL import Image
+import imgControl
+import lote
+from cache import CacheImagenes
+from instrumentacion import Latencias
+
+# Peticiones admitidas a la vez (en cola + en cálculo); las demás reciben 503
+LIMITE_COLA = 64
+
+# Tamaño máximo del cuerpo de una petición (bytes)
+MAX_BYTES = 64 << 20
+
+# Imágenes de hasta esta cantidad de píxeles se pueden agrupar en una tarea
+PIXELES_LOTE = 512 * 512
+
+# Imágenes por tarea agrupada y espera máxima para juntarlas (pool ocupado)
+TAM_LOTE = 8
+ESPERA_LOTE_S = 0.005
+
+# Píxeles máximos de la entrada y de cualquier paso de la cadena (una ampliación
+# o rotación enorme pedida por la red mataría al trabajador por memoria)
+MAX_PIXELES = 64_000_000
+
+# Radio máximo de la mediana (su costo crece con el cuadrado del radio)
+MAX_RADIO_MEDIANA = 15
+
+# Espera máxima de una petición por su resultado (504 si se supera)
+ESPERA_MAX_S = 120.0
+
+# Tamaño de cada trozo de la respuesta
+TAM_TROZO = 64 << 10
+
+# Ventana (segundos) del rendimiento reciente en /metricas
+VENTANA_RENDIMIENTO_S = 60.0
+
+FORMATOS = {"png": ("PNG", "image/png"), "jpg": ("JPEG", "image/jpeg"),
+            "jpeg": ("JPEG", "image/jpeg")}
+
+# Rutas del sistema de archivos del servidor: no se aceptan desde la red
+_NO_PERMITIDAS = ("fusionar",)
+
+
+class DemasiadoGrande(ValueError):
+    """La entrada o un paso de la cadena supera MAX_PIXELES."""
+
+
+class NoEnviado(BrokenProcessPool):
+    """El pool ya estaba roto al enviar: el trabajo no llegó a ejecutarse."""
+
+
+def PixelesMaximos(operaciones, h: int, w: int) -> int:
+    """Mayor cantidad de píxeles de la imagen a lo largo de la cadena (entrada incluida)."""
+    maximo = h * w
+    for op in operaciones:
+        if op[0] in lote._GEOMETRICAS:
+            if op[0] != "rotar" and op[1] <= 0:
+                raise ValueError(f"Factor inválido: {op[0]}={op[1]}")
+            h, w = lote._geometria(op).Compilar(h, w)[1]
+            maximo = max(maximo, h * w)
+    return maximo
+
+
+# =============== Trabajadores ===============
+
+_cadenas = {}
+
+
+def _iniciar_trabajador():
+    """Inicializador del pool: calienta una cadena con operaciones de cada tipo."""
+    prueba = np.zeros((16, 16, 3), dtype=np.uint8)
+    operaciones = [("grises",), ("brillo", 0.1), ("contraste", 0, 1.2),
+                   ("rotar", 10.0, "bilineal", False), ("gaussiano", 1.0)]
+    _codificar(lote.Cadena(operaciones).Aplicar(prueba), "png")
+
+
+def _listo() -> int:
+    return os.getpid()
+
+
+def _crear_pool(trabajadores: int) -> ProcessPoolExecutor:
+    """Pool con todos los trabajadores arrancados y calentados."""
+    pool = ProcessPoolExecutor(trabajadores, initializer=_iniciar_trabajador)
+    # Una tarea por trabajador: todos arrancados y calentados antes de servir
+    for futuro in [pool.submit(_listo) for _ in range(trabajadores)]:
+        futuro.result()
+    return pool
+
+
+def _codificar(img: np.ndarray, formato: str) -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(imgControl.ConvertirUint8(img)).save(buffer, format=FORMATOS[formato][0])
+    return buffer.getvalue()
+
+
+def _procesar_lote(trabajos: list) -> list:
+    """
+    Ejecuta en un trabajador una lista de (img, operaciones, formato).
+
+    Retorna por trabajo ("ok", bytes, calcular_s, codificar_s) o
+    ("error", mensaje, 0, 0); un error no afecta a los demás del lote.
+    """
+    resultados = []
+    for img, operaciones, formato in trabajos:
+        try:
+            cadena = _cadenas.get(operaciones)
+            if cadena is None:
+                cadena = _cadenas[operaciones] = lote.Cadena(list(operaciones))
+            t0 = time.perf_counter()
+            img = cadena.Aplicar(img)
+            t1 = time.perf_counter()
+            datos = _codificar(img, formato)
+            resultados.append(("ok", datos, t1 - t0, time.perf_counter() - t1))
+        except Exception as error:
+            resultados.append(("error", f"{type(error).__name__}: {error}", 0.0, 0.0))
+    return resultados
+
+
+# =============== Agrupación ===============
+
+class Agrupador:
+    """
+    Junta trabajos chicos en tareas del pool.
+
+    Enviar devuelve un Future con el resultado de _procesar_lote para ese
+    trabajo. Un hilo toma los trabajos en espera: si hay trabajadores libres
+    envía lo que haya; si no, espera a completar tam_lote o espera_s.
+    """
+
+    def __init__(self, pool: ProcessPoolExecutor, trabajadores: int,
+                 tam_lote: int = TAM_LOTE, espera_s: float = ESPERA_LOTE_S):
+        self.pool = pool
+        self.trabajadores = trabajadores
+        self.tam_lote = tam_lote
+        self.espera_s = espera_s
+        self.tareas_en_curso = 0
+        self.lotes = 0
+        self.agrupados = 0
+        self._cola = queue.Queue()
+        self._lock = threading.Lock()
+        self._hilo = threading.Thread(target=self._bucle, name="agrupador", daemon=True)
+        self._hilo.start()
+
+    @property
+    def en_espera(self) -> int:
+        return self._cola.qsize()
+
+    def Enviar(self, trabajo: tuple) -> Future:
+        futuro = Future()
+        self._cola.put((trabajo, futuro))
+        return futuro
+
+    def EnviarSolo(self, trabajo: tuple) -> Future:
+        """Un trabajo grande en su propia tarea, sin pasar por la agrupación."""
+        futuro = Future()
+        self._someter([(trabajo, futuro)])
+        return futuro
+
+    def CambiarPool(self, pool: ProcessPoolExecutor):
+        """Las tareas siguientes van a pool (las del anterior terminan con error)."""
+        self.pool = pool
+
+    def Detener(self):
+        self._cola.put(None)
+        self._hilo.join()
+
+    def _bucle(self):
+        while True:
+            item = self._cola.get()
+            if item is None:
+                return
+            grupo = [item]
+            ocupado = self.tareas_en_curso >= self.trabajadores
+            limite = time.monotonic() + (self.espera_s if ocupado else 0.0)
+            while len(grupo) < self.tam_lote:
+                restante = limite - time.monotonic()
+                try:
+                    item = self._cola.get(timeout=restante) if restante > 0 \
+                        else self._cola.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._cola.put(None)
+                    break
+                grupo.append(item)
+            self._someter(grupo)
+
+    def _someter(self, grupo: list):
+        with self._lock:
+            self.tareas_en_curso += 1
+            if len(grupo) > 1:
+                self.lotes += 1
+                self.agrupados += len(grupo)
+        try:
+            tarea = self.pool.submit(_procesar_lote, [trabajo for trabajo, _ in grupo])
+        except BrokenProcessPool as error:
+            self._terminar(grupo, error=NoEnviado(str(error)))
+            return
+        except Exception as error:
+            self._terminar(grupo, error=error)
+            return
+        tarea.add_done_callback(lambda t: self._terminar(grupo, tarea=t))
+
+    def _terminar(self, grupo, tarea=None, error=None):
+        with self._lock:
+            self.tareas_en_curso -= 1
+        if tarea is not None:
+            error = CancelledError() if tarea.cancelled() else tarea.exception()
+        for i, (_, futuro) in enumerate(grupo):
+            if error is not None:
+                futuro.set_exception(error)
+            else:
+                futuro.set_result(tarea.result()[i] + (len(grupo),))
+
+
+# =============== Servicio ===============
+
+class Servicio:
+    """
+    Estado compartido por los hilos del servidor: pool, agrupador, caché y
+    métricas.
+
+    Atributos
+    ---------
+    trabajadores : int
+        Procesos del pool.
+    limite_cola : int
+        Peticiones admitidas a la vez.
+    max_bytes : int
+        Tamaño máximo del cuerpo.
+    cache : CacheImagenes
+        Entradas decodificadas por hash del contenido.
+    max_pixeles : int
+        Píxeles máximos de la entrada y de cada paso de la cadena.
+
+    Si un trabajador muere (p. ej. sin memoria), las peticiones que ya estaban
+    en ese pool fallan y el pool se rehace y recalienta; las que no llegaron
+    a enviarse se reintentan en el nuevo.
+    """
+
+    def __init__(self, trabajadores: int | None = None, limite_cola: int = LIMITE_COLA,
+                 max_bytes: int = MAX_BYTES, cache: CacheImagenes | None = None,
+                 tam_lote: int = TAM_LOTE, espera_lote_s: float = ESPERA_LOTE_S,
+                 espera_max_s: float = ESPERA_MAX_S, max_pixeles: int = MAX_PIXELES):
+        self.trabajadores = trabajadores or os.cpu_count() or 1
+        self.limite_cola = limite_cola
+        self.max_bytes = max_bytes
+        self.espera_max_s = espera_max_s
+        self.cache = cache if cache is not None else CacheImagenes(presupuesto_bytes=256 << 20)
+        self.inicio = time.monotonic()
+
+        self.max_pixeles = max_pixeles
+        t0 = time.perf_counter()
+        self.pool = _crear_pool(self.trabajadores)
+        self.calentamiento_s = time.perf_counter() - t0
+        self.reconstrucciones = 0
+        self._lock_pool = threading.Lock()
+        self.agrupador = Agrupador(self.pool, self.trabajadores, tam_lote, espera_lote_s)
+
+        self._lock = threading.Lock()
+        self.pendientes = 0
+        self.contadores = dict.fromkeys(("peticiones", "ok", "errores", "rechazadas",
+                                         "demasiado_grandes", "agotadas", "pool_caido"), 0)
+        self.bytes_entrada = 0
+        self.bytes_salida = 0
+        self.latencias = {fase: Latencias() for fase in
+                          ("total", "decodificar", "espera", "calcular", "codificar")}
+        self._recientes = deque()  # (instante, bytes de entrada) de las terminadas
+
+    # ---- Admisión ----
+
+    def Admitir(self) -> bool:
+        with self._lock:
+            if self.pendientes >= self.limite_cola:
+                self.contadores["rechazadas"] += 1
+                return False
+            self.pendientes += 1
+            return True
+
+    def Liberar(self):
+        with self._lock:
+            self.pendientes -= 1
+
+    def Contar(self, nombre: str):
+        with self._lock:
+            self.contadores[nombre] += 1
+
+    # ---- Procesamiento ----
+
+    def Procesar(self, datos: bytes, operaciones: tuple, formato: str):
+        """
+        Decodifica (con caché), calcula en el pool y devuelve
+        (bytes codificados, dict de tiempos). Lanza DemasiadoGrande si la
+        entrada o un paso supera max_pixeles, ValueError si la imagen no se
+        puede decodificar o la cadena falla, BrokenProcessPool si murió un
+        trabajador (el pool ya quedó rehecho) y TiempoAgotado.
+        """
+        t0 = time.perf_counter()
+        try:
+            # Solo la cabecera: rechaza entradas enormes antes de decodificarlas
+            with Image.open(io.BytesIO(datos)) as imgPIL:
+                ancho, alto = imgPIL.size
+            if ancho * alto > self.max_pixeles:
+                raise DemasiadoGrande(f"La imagen tiene {ancho * alto} píxeles "
+                                      f"(máximo {self.max_pixeles})")
+            img = self.cache.ObtenerBytes(datos)
+        except DemasiadoGrande:
+            raise
+        except (OSError, ValueError, Image.DecompressionBombError) as error:
+            raise ValueError(f"No se pudo decodificar la imagen: {error}")
+        t1 = time.perf_counter()
+        pixeles = PixelesMaximos(operaciones, *img.shape[:2])
+        if pixeles > self.max_pixeles:
+            raise DemasiadoGrande(f"La cadena llega a {pixeles} píxeles "
+                                  f"(máximo {self.max_pixeles})")
+        trabajo = (img, operaciones, formato)
+        for intento in range(2):
+            pool = self.pool
+            if img.shape[0] * img.shape[1] <= PIXELES_LOTE:
+                futuro = self.agrupador.Enviar(trabajo)
+            else:
+                futuro = self.agrupador.EnviarSolo(trabajo)
+            try:
+                estado, resultado, calcular_s, codificar_s, tam_lote = \
+                    futuro.result(self.espera_max_s)
+                break
+            except NoEnviado:
+                # No llegó a ejecutarse: se reintenta una vez en el pool nuevo
+                self._reconstruir(pool)
+                if intento:
+                    raise
+            except BrokenProcessPool:
+                self._reconstruir(pool)
+                raise
+        if estado != "ok":
+            raise ValueError(resultado)
+        total_s = time.perf_counter() - t0
+        tiempos = {"total": total_s, "decodificar": t1 - t0, "calcular": calcular_s,
+                   "codificar": codificar_s,
+                   "espera": max(0.0, total_s - (t1 - t0) - calcular_s - codificar_s)}
+        with self._lock:
+            for fase, segundos in tiempos.items():
+                self.latencias[fase].Registrar(segundos)
+            self.contadores["ok"] += 1
+            self.bytes_entrada += len(datos)
+            self.bytes_salida += len(resultado)
+            self._recientes.append((time.monotonic(), len(datos)))
+        tiempos["lote"] = tam_lote
+        return resultado, tiempos
+
+    def _reconstruir(self, roto: ProcessPoolExecutor):
+        """Rehace el pool si sigue siendo `roto` (una sola vez por caída)."""
+        with self._lock_pool:
+            if self.pool is not roto:
+                return
+            roto.shutdown(wait=False, cancel_futures=True)
+            self.pool = _crear_pool(self.trabajadores)
+            self.agrupador.CambiarPool(self.pool)
+            self.reconstrucciones += 1
+
+    # ---- Métricas ----
+
+    def Metricas(self) -> dict:
+        ahora = time.monotonic()
+        activo_s = ahora - self.inicio
+        with self._lock:
+            while self._recientes and self._recientes[0][0] < ahora - VENTANA_RENDIMIENTO_S:
+                self._recientes.popleft()
+            ventana_s = min(VENTANA_RENDIMIENTO_S, activo_s) or 1e-9
+            latencias = {fase: {**lat.Percentiles((50, 90, 99)), "max": lat.maximo_s}
+                         for fase, lat in self.latencias.items()}
+            metricas = {
+                "cola": {
+                    "pendientes": self.pendientes,
+                    "limite": self.limite_cola,
+                    "en_espera_lote": self.agrupador.en_espera,
+                    "tareas_pool": self.agrupador.tareas_en_curso,
+                },
+                "peticiones": dict(self.contadores),
+                "latencia_s": latencias,
+                "rendimiento": {
+                    "peticiones_s": len(self._recientes) / ventana_s,
+                    "mb_s": sum(b for _, b in self._recientes) / 1e6 / ventana_s,
+                    "peticiones_s_total": self.contadores["ok"] / activo_s if activo_s else 0.0,
+                    "ventana_s": VENTANA_RENDIMIENTO_S,
+                },
+                "bytes": {"entrada": self.bytes_entrada, "salida": self.bytes_salida},
+            }
+        metricas["lotes"] = {
+            "lotes": self.agrupador.lotes,
+            "imagenes_agrupadas": self.agrupador.agrupados,
+            "tam_medio": self.agrupador.agrupados / self.agrupador.lotes
+            if self.agrupador.lotes else 0.0,
+        }
+        metricas["cache"] = self.cache.Estadisticas()
+        metricas["trabajadores"] = self.trabajadores
+        metricas["reconstrucciones_pool"] = self.reconstrucciones
+        metricas["calentamiento_s"] = self.calentamiento_s
+        metricas["activo_s"] = activo_s
+        return metricas
+
+    def Cerrar(self):
+        self.agrupador.Detener()
+        self.pool.shutdown(cancel_futures=True)
+
+
+# =============== HTTP ===============
+
+class Manejador(BaseHTTPRequestHandler):
+    """Rutas del servicio; self.server.servicio es el Servicio compartido."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "ProcesamientoIMG"
+
+    def log_message(self, formato, *args):
+        if self.server.detallado:
+            super().log_message(formato, *args)
+
+    def _responder_json(self, codigo: int, cuerpo: dict, cabeceras: dict | None = None):
+        datos = json.dumps(cuerpo, indent=2).encode()
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        for nombre, valor in (cabeceras or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def _error(self, codigo: int, mensaje: str, cabeceras: dict | None = None):
+        self._responder_json(codigo, {"error": mensaje}, cabeceras)
+
+    def do_GET(self):
+        ruta = urlsplit(self.path).path
+        if ruta == "/metricas":
+            self._responder_json(200, self.server.servicio.Metricas())
+        elif ruta == "/salud":
+            self._responder_json(200, {"estado": "ok"})
+        else:
+            self._error(404, f"Ruta desconocida: {ruta}")
+
+    def do_POST(self):
+        partes = urlsplit(self.path)
+        if partes.path != "/procesar":
+            self._error(404, f"Ruta desconocida: {partes.path}")
+            return
+        servicio = self.server.servicio
+        servicio.Contar("peticiones")
+        try:
+            largo = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self._error(411, "Falta Content-Length")
+            return
+        if largo > servicio.max_bytes:
+            servicio.Contar("demasiado_grandes")
+            self.close_connection = True  # el cuerpo no se lee
+            self._error(413, f"El cuerpo supera {servicio.max_bytes} bytes")
+            return
+        datos = self.rfile.read(largo)
+
+        parametros = parse_qs(partes.query)
+        formato = parametros.get("formato", ["png"])[0].lower()
+        try:
+            if formato not in FORMATOS:
+                raise ValueError(f"Formato desconocido: {formato}")
+            operaciones = tuple(lote.ParsearOperacion(op) for op in parametros.get("op", []))
+            for op in operaciones:
+                if op[0] in _NO_PERMITIDAS:
+                    raise ValueError(f"Operación no disponible en el servidor: {op[0]}")
+                if op[0] == "mediana" and not 0 <= op[1] <= MAX_RADIO_MEDIANA:
+                    raise ValueError(f"Radio de mediana fuera de 0..{MAX_RADIO_MEDIANA}")
+        except ValueError as error:
+            servicio.Contar("errores")
+            self._error(400, str(error))
+            return
+
+        if not servicio.Admitir():
+            self._error(503, "Servidor ocupado", {"Retry-After": "1"})
+            return
+        try:
+            resultado, tiempos = servicio.Procesar(datos, operaciones, formato)
+        except DemasiadoGrande as error:
+            servicio.Contar("demasiado_grandes")
+            self._error(413, str(error))
+            return
+        except ValueError as error:
+            servicio.Contar("errores")
+            self._error(422, str(error))
+            return
+        except BrokenProcessPool:
+            # Ya se rehízo el pool: la petición se puede reintentar
+            servicio.Contar("pool_caido")
+            self._error(503, "Un trabajador terminó de forma inesperada", {"Retry-After": "1"})
+            return
+        except TiempoAgotado:
+            servicio.Contar("agotadas")
+            self._error(504, "Tiempo de espera agotado")
+            return
+        except Exception as error:
+            servicio.Contar("errores")
+            self._error(500, f"{type(error).__name__}: {error}")
+            return
+        finally:
+            servicio.Liberar()
+
+        self.send_response(200)
+        self.send_header("Content-Type", FORMATOS[formato][1])
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("X-Latencia-ms", f"{tiempos['total'] * 1000:.1f}")
+        self.send_header("X-Lote", str(tiempos["lote"]))
+        self.end_headers()
+        vista = memoryview(resultado)
+        for i in range(0, len(vista), TAM_TROZO):
+            trozo = vista[i:i + TAM_TROZO]
+            self.wfile.write(f"{len(trozo):X}\r\n".encode())
+            self.wfile.write(trozo)
+            self.wfile.write(b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class Servidor(ThreadingHTTPServer):
+    """
+    ThreadingHTTPServer con su Servicio. puerto=0 elige uno libre
+    (ver self.server_address).
+
+    Ejemplo
+    -------
+        servidor = Servidor(("127.0.0.1", 0), Servicio(trabajadores=2))
+        servidor.Iniciar()            # en un hilo
+        ...
+        servidor.Detener()
+    """
+
+    daemon_threads = True
+
+    def __init__(self, direccion: tuple, servicio: Servicio, detallado: bool = False):
+        super().__init__(direccion, Manejador)
+        self.servicio = servicio
+        self.detallado = detallado
+        self._hilo = None
+
+    def Iniciar(self):
+        self._hilo = threading.Thread(target=self.serve_forever, name="servidor", daemon=True)
+        self._hilo.start()
+
+    def Detener(self):
+        self.shutdown()
+        self.server_close()
+        if self._hilo is not None:
+            self._hilo.join()
+        self.servicio.Cerrar()
+
+
+# =============== Línea de comandos ===============
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Servicio HTTP local con las operaciones de imgControl.")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección de escucha")
+    parser.add_argument("--puerto", type=int, default=8080, help="Puerto (0: uno libre)")
+    parser.add_argument("-j", "--trabajadores", type=int, default=None,
+                        help="Procesos del pool (por defecto, todos los núcleos)")
+    parser.add_argument("--limite-cola", type=int, default=LIMITE_COLA,
+                        help="Peticiones admitidas a la vez (las demás reciben 503)")
+    parser.add_argument("--max-mb", type=float, default=MAX_BYTES / (1 << 20),
+                        help="Tamaño máximo del cuerpo (MB)")
+    parser.add_argument("--max-mp", type=float, default=MAX_PIXELES / 1e6,
+                        help="Megapíxeles máximos de la entrada y de cada paso de la cadena")
+    parser.add_argument("--cache-mb", type=float, default=256,
+                        help="Presupuesto de la caché de entradas en memoria (MB)")
+    parser.add_argument("--cache-dir", default=None, help="Directorio de la caché en disco")
+    parser.add_argument("--tam-lote", type=int, default=TAM_LOTE,
+                        help="Imágenes chicas por tarea agrupada")
+    parser.add_argument("-v", "--detallado", action="store_true", help="Registrar cada petición")
+    args = parser.parse_args(argv)
+
+    cache = CacheImagenes(presupuesto_bytes=int(args.cache_mb * (1 << 20)),
+                          directorio=args.cache_dir)
+    servicio = Servicio(args.trabajadores, args.limite_cola, int(args.max_mb * (1 << 20)),
+                        cache, args.tam_lote, max_pixeles=int(args.max_mp * 1e6))
+    servidor = Servidor((args.host, args.puerto), servicio, args.detallado)
+    host, puerto = servidor.server_address[:2]
+    print(f"Escuchando en http://{host}:{puerto} ({servicio.trabajadores} trabajadores, "
+          f"calentados en {servicio.calentamiento_s:.2f} s)", file=sys.stderr)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servicio.Cerrar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
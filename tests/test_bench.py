@@ -0,0 +1,27 @@
+import numpy as np
+
+import bench
+
+
+def _temporales(img):
+    # Diez temporales completos que se liberan antes de volver
+    for _ in range(10):
+        temporal = img * 2
+        del temporal
+    return img[:1].copy()
+
+
+def test_cuenta_temporales_liberados():
+    img = np.ones((256, 256, 3))
+    medicion = bench.Medir(_temporales, (img,), repeticiones=1)
+    assert medicion["asignaciones"] >= 10
+    assert medicion["memoria_pico_bytes"] >= img.nbytes
+
+
+def test_comparar_detecta_asignaciones_nuevas():
+    registro = {"funcion": "f", "tamano": 256, "tipo": "uint8", "tiempo_s": 1.0,
+                "memoria_pico_bytes": 100}
+    base = {"resultados": [dict(registro, asignaciones=0)]}
+    actual = {"resultados": [dict(registro, asignaciones=3)]}
+    regresiones = bench.Comparar(actual, base)
+    assert [r["metrica"] for r in regresiones] == ["asignaciones"]
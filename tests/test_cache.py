@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from cache import CacheImagenes
+
+
+def _guardar(ruta, valor, lado=10):
+    Image.fromarray(np.full((lado, lado, 3), valor, dtype=np.uint8)).save(ruta)
+    return str(ruta)
+
+
+@pytest.fixture
+def rutas(tmp_path):
+    return [_guardar(tmp_path / f"{i}.png", i * 10) for i in range(3)]
+
+
+def test_contadores_y_bytes_ahorrados(rutas):
+    cache = CacheImagenes()
+    primera = cache.Obtener(rutas[0])
+    assert cache.Obtener(rutas[0]) is primera
+    assert not primera.flags.writeable
+    estadisticas = cache.Estadisticas()
+    assert (estadisticas["fallos"], estadisticas["aciertos_memoria"]) == (1, 1)
+    assert estadisticas["bytes_ahorrados"] == primera.nbytes
+    assert estadisticas["tasa_aciertos"] == 0.5
+
+
+def test_lru_por_bytes(rutas):
+    # Entran dos imágenes de 300 bytes: la tercera desaloja la menos usada
+    cache = CacheImagenes(presupuesto_bytes=650)
+    cache.Obtener(rutas[0])
+    cache.Obtener(rutas[1])
+    cache.Obtener(rutas[0])  # rutas[1] pasa a ser la menos usada
+    cache.Obtener(rutas[2])
+    assert cache.Contiene(rutas[0]) and cache.Contiene(rutas[2])
+    assert not cache.Contiene(rutas[1])
+    assert cache.bytes_usados <= 650
+
+
+def test_imagen_mayor_que_el_presupuesto_no_se_guarda(rutas):
+    cache = CacheImagenes(presupuesto_bytes=100)
+    cache.Obtener(rutas[0])
+    assert cache.Estadisticas()["imagenes_memoria"] == 0
+
+
+def test_archivo_modificado_se_decodifica_de_nuevo(rutas):
+    cache = CacheImagenes()
+    assert cache.Obtener(rutas[0])[0, 0, 0] == 0
+    # Otro tamaño de archivo y otra fecha de modificación
+    _guardar(rutas[0], 200, lado=12)
+    estado = os.stat(rutas[0])
+    os.utime(rutas[0], ns=(estado.st_atime_ns, estado.st_mtime_ns + 10**9))
+    nueva = cache.Obtener(rutas[0])
+    assert nueva.shape == (12, 12, 3) and nueva[0, 0, 0] == 200
+    assert cache.Estadisticas()["fallos"] == 2
+
+
+def test_misma_fecha_otro_tamano_se_invalida(rutas):
+    cache = CacheImagenes()
+    cache.Obtener(rutas[1])
+    estado = os.stat(rutas[1])
+    _guardar(rutas[1], 99, lado=11)
+    os.utime(rutas[1], ns=(estado.st_atime_ns, estado.st_mtime_ns))
+    assert cache.Obtener(rutas[1])[0, 0, 0] == 99
+
+
+def test_disco_sobrevive_a_otra_instancia(rutas, tmp_path):
+    directorio = str(tmp_path / "cache")
+    CacheImagenes(directorio=directorio).Obtener(rutas[2])
+    otra = CacheImagenes(directorio=directorio)
+    img = otra.Obtener(rutas[2])
+    assert isinstance(img, np.memmap) and img[0, 0, 0] == 20
+    assert otra.Estadisticas()["aciertos_disco"] == 1
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import ejecutor
+import filtros
+import imgControl
+import mosaicos
+from geometria import Geometria
+
+
+@pytest.fixture(scope="module")
+def imagenes():
+    rng = np.random.default_rng(0)
+    return {
+        "uint8": rng.integers(0, 256, (61, 83, 3), dtype=np.uint8),
+        "float": rng.random((61, 83, 3)),
+    }
+
+
+CASOS = [
+    ("float", imgControl.RotarImg, (17,), {"interpolacion": "bicubica", "expandir": True}),
+    ("uint8", imgControl.RotarImg, (30,), {"interpolacion": "bilineal"}),
+    ("uint8", imgControl.RotarImg, (45,), {}),
+    ("uint8", imgControl.Ampliar, (2.5,), {"metodo": "bilineal"}),
+    ("float", imgControl.Ampliar, (1.7,), {"metodo": "bilineal"}),
+    ("uint8", imgControl.Ampliar, (3,), {}),
+    ("uint8", imgControl.ReducirResolucion, (1.6,), {"metodo": "bilineal"}),
+    ("uint8", imgControl.ReducirResolucion, (2,), {}),
+    ("uint8", imgControl.Desplazar, (7, -5), {}),
+    ("uint8", imgControl.Negativo, (), {}),
+]
+
+
+@pytest.mark.parametrize("tam_mosaico", [None, 16])
+@pytest.mark.parametrize("tipo,operacion,args,kwargs", CASOS)
+def test_aplicar_igual_a_llamada_directa(imagenes, tam_mosaico, tipo, operacion, args, kwargs):
+    img = imagenes[tipo]
+    with ejecutor.EjecutorMosaicos(trabajadores=3, tam_mosaico=tam_mosaico) as e:
+        paralelo = e.Aplicar(operacion, img, *args, **kwargs)
+    directo = operacion(img, *args, **kwargs)
+    assert paralelo.dtype == directo.dtype
+    np.testing.assert_array_equal(paralelo, directo)
+
+
+@pytest.mark.parametrize("interpolacion", ["bilineal", "bicubica"])
+def test_geometria_por_mosaicos_igual_a_evaluar(imagenes, interpolacion):
+    g = Geometria(interpolacion).RotarImg(20, expandir=True).ReducirResolucion(2.3)
+    with ejecutor.EjecutorMosaicos(trabajadores=3, tam_mosaico=16) as e:
+        np.testing.assert_array_equal(e.Aplicar(g, imagenes["float"]),
+                                      g.Evaluar(imagenes["float"]))
+
+
+def test_procesos_igual_a_llamada_directa(imagenes):
+    img = imagenes["uint8"]
+    with ejecutor.EjecutorMosaicos(trabajadores=2, usar_procesos=True) as e:
+        paralelo = e.Aplicar(imgControl.RotarImg, img, 30, interpolacion="bilineal")
+    np.testing.assert_array_equal(paralelo, imgControl.RotarImg(img, 30, interpolacion="bilineal"))
+
+
+def test_filtro_de_vecindad(imagenes):
+    img = imagenes["uint8"]
+    with ejecutor.EjecutorMosaicos(trabajadores=3, tam_mosaico=16) as e:
+        np.testing.assert_array_equal(e.Aplicar(filtros.Mediana, img, 2), filtros.Mediana(img, 2))
+
+
+def test_histograma(imagenes):
+    img = imagenes["uint8"]
+    with ejecutor.EjecutorMosaicos(trabajadores=3) as e:
+        for paralelo, directo in zip(e.Aplicar(imgControl.Histograma, img),
+                                     imgControl.Histograma(img)):
+            np.testing.assert_array_equal(paralelo, directo)
+
+
+def test_procesar_mosaicos_en_disco(imagenes, tmp_path):
+    img = imagenes["float"]
+    entrada = tmp_path / "entrada.npy"
+    np.save(entrada, img)
+    resultado = mosaicos.ProcesarMosaicos(str(entrada), str(tmp_path / "salida.npy"),
+                                          imgControl.RotarImg, 17, interpolacion="bicubica",
+                                          expandir=True, tam_mosaico=16)
+    np.testing.assert_array_equal(
+        resultado, imgControl.RotarImg(img, 17, interpolacion="bicubica", expandir=True))
+
+
+@pytest.mark.parametrize("modo", ["RGB", "L", "RGBA"])
+def test_importar_imagen_por_franjas(imagenes, tmp_path, modo):
+    ruta = tmp_path / "imagen.png"
+    Image.fromarray(imagenes["uint8"]).convert(modo).save(ruta)
+    importada = mosaicos.ImportarImagen(str(ruta), str(tmp_path / "imagen.npy"),
+                                        filas_por_franja=16)
+    with Image.open(ruta) as referencia:
+        np.testing.assert_array_equal(importada, np.asarray(referencia.convert("RGB")))
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from numpy.lib.stride_tricks import sliding_window_view
+
+import filtros
+
+
+@pytest.fixture(scope="module")
+def img():
+    return np.random.default_rng(11).random((48, 57, 3))
+
+
+def _correlacion_directa(img, nucleo):
+    """Correlación 2D por definición, con borde simétrico (el píxel del borde se repite)."""
+    ry, rx = nucleo.shape[0] // 2, nucleo.shape[1] // 2
+    relleno = np.pad(img, ((ry, ry), (rx, rx), (0, 0)), mode="symmetric")
+    ventanas = sliding_window_view(relleno, nucleo.shape, axis=(0, 1))
+    return np.einsum("hwcyx,yx->hwc", ventanas, nucleo)
+
+
+@pytest.mark.parametrize("n_filas,n_columnas", [(3, 5), (7, 7), (41, 9), (45, 45)])
+def test_separable_igual_a_directa(img, n_filas, n_columnas):
+    # 41 y 45 superan UMBRAL_FFT: esas pasadas van por FFT
+    rng = np.random.default_rng(n_filas)
+    filas, columnas = rng.random(n_filas), rng.random(n_columnas)
+    np.testing.assert_allclose(filtros.ConvolucionSeparable(img, filas, columnas),
+                               _correlacion_directa(img, np.outer(filas, columnas)), atol=1e-10)
+
+
+@pytest.mark.parametrize("forma", [(3, 3), (5, 7), (13, 11)])
+def test_convolucion_2d_igual_a_directa(img, forma):
+    # 13 x 11 supera UMBRAL_FFT_2D; los núcleos no son separables
+    nucleo = np.random.default_rng(sum(forma)).random(forma) - 0.5
+    np.testing.assert_allclose(filtros.Convolucion(img, nucleo),
+                               _correlacion_directa(img, nucleo), atol=1e-10)
+
+
+@pytest.mark.parametrize("radio", [1, 4, 20])
+def test_caja_igual_a_directa(img, radio):
+    lado = 2 * radio + 1
+    np.testing.assert_allclose(filtros.Caja(img, radio),
+                               _correlacion_directa(img, np.full((lado, lado), 1 / lado ** 2)),
+                               atol=1e-10)
+
+
+@pytest.mark.parametrize("sigma", [1.0, 12.0])
+def test_gaussiano_igual_a_directa(img, sigma):
+    nucleo = filtros.NucleoGaussiano(sigma)
+    np.testing.assert_allclose(filtros.Gaussiano(img, sigma),
+                               _correlacion_directa(img, np.outer(nucleo, nucleo)), atol=1e-10)
+
+
+def test_mediana_igual_a_directa(img):
+    relleno = np.pad(img, ((2, 2), (2, 2), (0, 0)), mode="symmetric")
+    esperado = np.median(sliding_window_view(relleno, (5, 5), axis=(0, 1)), axis=(-2, -1))
+    np.testing.assert_array_equal(filtros.Mediana(img, 2), esperado)
+
+
+@pytest.mark.parametrize("filtro,args", [
+    (filtros.Caja, (3,)), (filtros.Gaussiano, (2.0,)), (filtros.Enfocar, (1.5, 0.8)),
+    (filtros.Sobel, ()), (filtros.Mediana, (1,)),
+])
+@pytest.mark.parametrize("dtype", [np.float64, np.uint8])
+def test_out_se_respeta(img, filtro, args, dtype):
+    entrada = img if dtype == np.float64 else (img * 255).astype(np.uint8)
+    esperado = filtro(entrada, *args)
+    assert esperado.dtype == dtype
+    salida = np.empty_like(esperado)
+    assert filtro(entrada, *args, out=salida) is salida
+    np.testing.assert_array_equal(salida, esperado)
+
+
+def test_uint8_redondea_el_resultado_float(img):
+    u = (img * 255).astype(np.uint8)
+    esperado = np.clip(np.rint(_correlacion_directa(u.astype(np.float64), np.full((3, 3), 1 / 9))),
+                       0, 255)
+    assert np.abs(filtros.Caja(u, 1).astype(int) - esperado).max() <= 1
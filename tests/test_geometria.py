@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+import imgControl
+from geometria import Geometria
+
+
+@pytest.fixture(scope="module")
+def img():
+    return np.random.default_rng(1).integers(0, 256, (60, 80, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("angulo", [0, 15, 30, 45, 60, 90, 33.3])
+@pytest.mark.parametrize("expandir", [False, True])
+def test_rotacion_vecino_igual_salvo_empates(img, angulo, expandir):
+    directo = imgControl.RotarImg(img, angulo, expandir=expandir)
+    compuesto = Geometria("vecino").RotarImg(angulo, expandir).Evaluar(img)
+    assert compuesto.shape == directo.shape
+    # Solo pueden diferir los píxeles cuya coordenada fuente cae en un empate x.5
+    forma, mapa = imgControl.MapaRotacion(*img.shape[:2], angulo, expandir)
+    xs, ys = np.broadcast_arrays(*mapa(np.arange(forma[0]), np.arange(forma[1])))
+    empate = (np.abs(xs % 1 - 0.5) < 1e-9) | (np.abs(ys % 1 - 0.5) < 1e-9)
+    assert not (directo != compuesto).any(axis=2)[~empate].any()
+
+
+def test_traslaciones_y_recortes_exactos(img):
+    g = Geometria("bilineal").Desplazar(7, -3).Recortar(5, 40, 10, 70)
+    encadenado = imgControl.Recortar(imgControl.Desplazar(img, 7, -3), 5, 40, 10, 70)
+    np.testing.assert_array_equal(g.Evaluar(img), encadenado)
+
+
+@pytest.mark.parametrize("factor", [2, 1.5])
+def test_ampliar_igual_a_paso_a_paso(img, factor):
+    g = Geometria("bilineal").Ampliar(factor)
+    directo = imgControl.Ampliar(img, factor, "bilineal")
+    assert g.Compilar(*img.shape[:2])[1] == directo.shape[:2]
+    assert np.abs(g.Evaluar(img).astype(int) - directo).max() <= 1
+
+
+def test_cadena_compuesta_cercana_a_encadenada():
+    y, x = np.mgrid[:120, :160]
+    suave = np.dstack([(np.sin(x / 9) + np.cos(y / 7)) / 4 + 0.5] * 3)
+    g = Geometria("bilineal").RotarImg(30, True).ReducirResolucion(2).Recortar(5, 50, 5, 70)
+    encadenado = imgControl.Recortar(
+        imgControl.ReducirResolucion(imgControl.RotarImg(suave, 30, "bilineal", True), 2),
+        5, 50, 5, 70)
+    compuesto = g.Evaluar(suave)
+    assert compuesto.shape == encadenado.shape
+    # No es idéntico (sin redondeos ni lienzos intermedios), pero sí muy cercano
+    assert np.abs(compuesto - encadenado).mean() < 0.01
+
+
+@pytest.mark.parametrize("interpolacion", ["bilineal", "bicubica"])
+def test_muestreo_conserva_float64(interpolacion):
+    # Con float32 intermedio, valores como 1/3 + 1e-9 perderían los últimos dígitos
+    img = np.random.default_rng(2).random((20, 30, 3)) / 3 + 1e-9
+    rotada = imgControl.RotarImg(img, 0, interpolacion)
+    assert rotada.dtype == np.float64
+    np.testing.assert_array_equal(rotada, img)
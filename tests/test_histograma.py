@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+import histograma
+import imgControl
+
+
+@pytest.fixture(scope="module")
+def img():
+    return np.random.default_rng(5).integers(0, 256, (31, 37, 3), dtype=np.uint8)
+
+
+def _histograma_bucles(img):
+    # imgControl.Histograma original: int(valor * 255) por píxel
+    hist = np.zeros((3, 256))
+    for fila in img:
+        for pixel in fila:
+            for c in range(3):
+                hist[c, int(pixel[c] * 255)] += 1
+    return hist
+
+
+def test_float_igual_al_bucle_original(img):
+    f = img / 255.0
+    np.testing.assert_array_equal(np.array(imgControl.Histograma(f)), _histograma_bucles(f))
+
+
+def test_uint8_igual_a_float(img):
+    np.testing.assert_array_equal(histograma.HistogramaCanales(img),
+                                  histograma.HistogramaCanales(img / 255.0))
+
+
+@pytest.mark.parametrize("bins", [1, 16, 100, 256])
+def test_bins(img, bins):
+    hist = histograma.HistogramaCanales(img, bins)
+    assert hist.shape == (3, bins)
+    assert (hist.sum(axis=1) == img.shape[0] * img.shape[1]).all()
+    for c in range(3):
+        esperado = np.bincount(img[:, :, c].ravel().astype(int) * bins // 256, minlength=bins)
+        np.testing.assert_array_equal(hist[c], esperado)
+
+
+def test_luminancia_y_acumulado(img):
+    hist = histograma.HistogramaLuminancia(img)
+    np.testing.assert_array_equal(hist, np.bincount(histograma.Luminancia(img).ravel(),
+                                                    minlength=256))
+    cdf = histograma.Acumulado(hist)
+    assert cdf[-1] == 1.0 and (np.diff(cdf) >= 0).all()
+
+
+@pytest.mark.parametrize("luminancia", [False, True])
+def test_actualizar_region_igual_a_recalcular(img, luminancia):
+    calcular = histograma.HistogramaLuminancia if luminancia else histograma.HistogramaCanales
+    editada = img.copy()
+    region = (slice(5, 20), slice(8, 30))
+    anterior = editada[region].copy()
+    editada[region] = 255 - editada[region]
+    hist = calcular(img)
+    histograma.ActualizarRegion(hist, anterior, editada[region], luminancia)
+    np.testing.assert_array_equal(hist, calcular(editada))
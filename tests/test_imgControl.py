@@ -0,0 +1,202 @@
+import numpy as np
+import pytest
+
+import imgControl
+
+
+@pytest.fixture(scope="module")
+def img():
+    return np.random.default_rng(4).random((23, 29, 3))
+
+
+# Versiones originales con bucles, como referencia
+def _reducir_bucles(img, factor):
+    h_new, w_new = img.shape[0] // factor, img.shape[1] // factor
+    reducida = np.zeros((h_new, w_new, img.shape[2]))
+    for i in range(h_new):
+        for j in range(w_new):
+            reducida[i, j] = img[i * factor:(i + 1) * factor,
+                                 j * factor:(j + 1) * factor].mean(axis=(0, 1))
+    return reducida
+
+
+def _ampliar_bucles(img, factor):
+    h, w = img.shape[:2]
+    ampliada = np.zeros((h * factor, w * factor, img.shape[2]))
+    for i in range(h):
+        for j in range(w):
+            ampliada[i * factor:(i + 1) * factor, j * factor:(j + 1) * factor] = img[i, j]
+    return ampliada
+
+
+def _bilineal_bucles(img, h_new, w_new, ey=None, ex=None):
+    h, w = img.shape[:2]
+    ey = h / h_new if ey is None else ey
+    ex = w / w_new if ex is None else ex
+    salida = np.zeros((h_new, w_new, img.shape[2]))
+    for i in range(h_new):
+        y = min(max((i + 0.5) * ey - 0.5, 0), h - 1)
+        y0 = int(y)
+        y1, ty = min(y0 + 1, h - 1), y - y0
+        for j in range(w_new):
+            x = min(max((j + 0.5) * ex - 0.5, 0), w - 1)
+            x0 = int(x)
+            x1, tx = min(x0 + 1, w - 1), x - x0
+            arriba = img[y0, x0] * (1 - tx) + img[y0, x1] * tx
+            abajo = img[y1, x0] * (1 - tx) + img[y1, x1] * tx
+            salida[i, j] = arriba * (1 - ty) + abajo * ty
+    return salida
+
+
+@pytest.mark.parametrize("factor", [2, 3, 5])
+def test_reducir_area_igual_a_bucles(img, factor):
+    np.testing.assert_allclose(imgControl.ReducirResolucion(img, factor), _reducir_bucles(img, factor))
+
+
+@pytest.mark.parametrize("factor", [2, 3])
+def test_reducir_area_rellenar_promedia_bloques_parciales(img, factor):
+    reducida = imgControl.ReducirResolucion(img, factor, "area", "rellenar")
+    assert reducida.shape[:2] == (-(-img.shape[0] // factor), -(-img.shape[1] // factor))
+    for i in range(reducida.shape[0]):
+        for j in range(reducida.shape[1]):
+            bloque = img[i * factor:(i + 1) * factor, j * factor:(j + 1) * factor]
+            np.testing.assert_allclose(reducida[i, j], bloque.mean(axis=(0, 1)))
+
+
+def test_reducir_uint8_redondea_el_promedio(img):
+    u = (img * 255).astype(np.uint8)
+    esperado = np.rint(_reducir_bucles(u.astype(np.float64), 3))
+    np.testing.assert_array_equal(imgControl.ReducirResolucion(u, 3), esperado)
+
+
+def test_reducir_vecino_no_entero(img):
+    reducida = imgControl.ReducirResolucion(img, 1.5, "vecino")
+    filas = np.floor((np.arange(reducida.shape[0]) + 0.5) * 1.5).astype(int)
+    columnas = np.floor((np.arange(reducida.shape[1]) + 0.5) * 1.5).astype(int)
+    np.testing.assert_array_equal(reducida, img[filas][:, columnas])
+
+
+@pytest.mark.parametrize("factor", [1.6, 2.5])
+@pytest.mark.parametrize("borde", ["recortar", "rellenar"])
+def test_reducir_bilineal_igual_a_bucles(img, factor, borde):
+    reducida = imgControl.ReducirResolucion(img, factor, "bilineal", borde)
+    referencia = _bilineal_bucles(img, *reducida.shape[:2], factor, factor)
+    np.testing.assert_allclose(reducida, referencia)
+
+
+@pytest.mark.parametrize("factor", [2, 3])
+def test_ampliar_vecino_igual_a_bucles(img, factor):
+    np.testing.assert_array_equal(imgControl.Ampliar(img, factor), _ampliar_bucles(img, factor))
+
+
+@pytest.mark.parametrize("factor", [1.5, 2.0, 2.7])
+def test_ampliar_bilineal_igual_a_bucles(img, factor):
+    ampliada = imgControl.Ampliar(img, factor, "bilineal")
+    np.testing.assert_allclose(ampliada, _bilineal_bucles(img, *ampliada.shape[:2]))
+
+
+# ---- Modo uint8 con LUT ----
+
+OPERACIONES_PUNTUALES = [
+    (imgControl.Negativo, ()),
+    (imgControl.SumarBrillo, (0.2,)),
+    (imgControl.SumarBrillo, (-0.35,)),
+    (imgControl.AjusteCanal, (1, -0.3)),
+    (imgControl.AjusteContraste, (0, 1.2)),
+    (imgControl.AjusteContraste, (0, 0.8)),
+    (imgControl.AjusteContraste, (1, 1.5)),
+]
+
+
+@pytest.fixture(scope="module")
+def img_u8():
+    u = np.random.default_rng(7).integers(0, 256, (40, 50, 3), dtype=np.uint8)
+    u[0, :, :] = np.arange(256)[:50, None]  # niveles extremos incluidos
+    u[1, :, :] = np.arange(206, 256)[:, None]
+    return u
+
+
+@pytest.mark.parametrize("operacion,args", OPERACIONES_PUNTUALES)
+def test_lut_uint8_a_uno_del_float(img_u8, operacion, args):
+    rapido = operacion(img_u8, *args)
+    assert rapido.dtype == np.uint8
+    esperado = np.rint(np.clip(operacion(img_u8 / 255.0, *args), 0, 1) * 255)
+    assert np.abs(rapido.astype(int) - esperado).max() <= 1
+
+
+def test_binaria_uint8_solo_difiere_en_el_umbral(img_u8):
+    rapido = imgControl.Binaria(img_u8, 0.4)
+    flotante = imgControl.Binaria(img_u8 / 255.0, 0.4)
+    # La luminancia entera difiere a lo sumo en un nivel de la float
+    gris = imgControl.Grises(img_u8 / 255.0) * 255
+    assert (np.abs(gris[rapido != flotante] - 0.4 * 255) <= 1).all()
+
+
+def test_lut_cacheada_y_por_franjas():
+    assert imgControl.LUT("SumarBrillo", 0.2) is imgControl.LUT("SumarBrillo", 0.2)
+    # Bastantes filas para que AplicarLUT recorra varias franjas
+    img_u8 = np.random.default_rng(8).integers(0, 256, (300, 700, 3), dtype=np.uint8)
+    lut = imgControl.LUT("Negativo")
+    salida = np.empty_like(img_u8)
+    assert imgControl.AplicarLUT(img_u8, lut, out=salida) is salida
+    np.testing.assert_array_equal(salida, lut[img_u8])
+    por_canal = np.stack([lut, imgControl.LUT("SumarBrillo", 0.2), lut], axis=1)
+    resultado = imgControl.AplicarLUT(img_u8, por_canal)
+    for c in range(3):
+        np.testing.assert_array_equal(resultado[:, :, c], por_canal[img_u8[:, :, c], c])
+
+
+# ---- Vistas y buffers de salida ----
+
+def test_recortar_vista_sin_copiar(img):
+    vista = imgControl.Recortar(img, 3, 17, 5, 20, copiar=False)
+    assert vista.base is img
+    np.testing.assert_array_equal(vista, img[3:17, 5:20])
+
+
+def test_recortar_copia_por_defecto(img):
+    recortada = imgControl.Recortar(img, 3, 17, 5, 20)
+    assert not np.shares_memory(recortada, img)
+    np.testing.assert_array_equal(recortada, img[3:17, 5:20])
+
+
+@pytest.mark.parametrize("canal", [0, 1, 2])
+def test_extraer_canal_vista_y_copia(img, canal):
+    vista = imgControl.ExtraerCanal(img, canal)
+    assert np.shares_memory(vista, img)
+    copia = imgControl.ExtraerCanal(img, canal, copiar=True)
+    assert not np.shares_memory(copia, img) and copia.flags.c_contiguous
+    np.testing.assert_array_equal(vista, img[:, :, canal])
+    np.testing.assert_array_equal(copia, img[:, :, canal])
+
+
+@pytest.mark.parametrize("canal", [0, 1, 2])
+@pytest.mark.parametrize("dtype", [np.float64, np.uint8])
+def test_layer_y_canal_con_out(img, canal, dtype):
+    entrada = img if dtype == np.float64 else (img * 255).astype(np.uint8)
+    maximo = 1 if dtype == np.float64 else 255
+    capa = np.zeros_like(entrada)
+    capa[:, :, canal] = entrada[:, :, canal]
+    saturada = np.full_like(entrada, maximo)
+    saturada[:, :, canal] = entrada[:, :, canal]
+    for funcion, esperado in ((imgControl.Layer, capa), (imgControl.Canal, saturada)):
+        resultado = funcion(entrada, canal)
+        assert not np.shares_memory(resultado, entrada)
+        np.testing.assert_array_equal(resultado, esperado)
+        salida = np.full_like(entrada, 7)
+        assert funcion(entrada, canal, out=salida) is salida
+        np.testing.assert_array_equal(salida, esperado)
+
+
+@pytest.mark.parametrize("dx,dy", [(0, 0), (4, 7), (-5, 3), (6, -9), (-30, 2), (2, 40)])
+def test_desplazar_con_out(img, dx, dy):
+    h, w = img.shape[:2]
+    esperado = np.zeros_like(img)
+    for y in range(h):
+        for x in range(w):
+            if 0 <= y - dy < h and 0 <= x - dx < w:
+                esperado[y, x] = img[y - dy, x - dx]
+    np.testing.assert_array_equal(imgControl.Desplazar(img, dx, dy), esperado)
+    salida = np.full_like(img, 7)
+    assert imgControl.Desplazar(img, dx, dy, out=salida) is salida
+    np.testing.assert_array_equal(salida, esperado)
@@ -0,0 +1,60 @@
+import os
+import numpy as np
+from PIL import Image
+import lote
+
+
+def _guardar(ruta, semilla=0):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    img = np.random.default_rng(semilla).integers(0, 256, (12, 16, 3), dtype=np.uint8)
+    Image.fromarray(img).save(ruta)
+    return img
+
+
+def _procesar(entradas, salida, ops, **kwargs):
+    operaciones = [lote.ParsearOperacion(op) for op in ops]
+    return lote.ProcesarLote(entradas, salida, operaciones, trabajadores=1, **kwargs)
+
+
+def test_omite_solo_con_la_misma_cadena(tmp_path):
+    for i in range(3):
+        _guardar(str(tmp_path / "in" / f"{i}.png"), i)
+    entrada, salida = str(tmp_path / "in"), str(tmp_path / "out")
+
+    assert _procesar([entrada], salida, ["negativo"])["procesadas"] == 3
+    assert _procesar([entrada], salida, ["negativo"])["omitidas"] == 3
+
+    otra = _procesar([entrada], salida, ["grises"])
+    assert otra["procesadas"] == 3 and otra["omitidas"] == 0
+    assert _procesar([entrada], salida, ["grises"], usar_float=True)["procesadas"] == 3
+    assert _procesar([entrada], salida, ["grises"], usar_float=True)["omitidas"] == 3
+
+
+def test_entrada_modificada_se_reprocesa(tmp_path):
+    ruta = str(tmp_path / "in" / "a.png")
+    _guardar(ruta)
+    salida = str(tmp_path / "out")
+    _procesar([ruta], salida, ["negativo"])
+    os.utime(ruta, (os.path.getmtime(ruta) + 10,) * 2)
+    assert _procesar([ruta], salida, ["negativo"])["procesadas"] == 1
+
+
+def test_mismo_nombre_en_distintos_directorios(tmp_path):
+    a = _guardar(str(tmp_path / "in" / "a" / "x.png"), 1)
+    b = _guardar(str(tmp_path / "in" / "b" / "x.png"), 2)
+    salida = tmp_path / "out"
+    estadisticas = _procesar([str(tmp_path / "in" / "*" / "x.png")], str(salida), ["negativo"])
+    assert estadisticas["procesadas"] == 2
+    assert np.array_equal(np.asarray(Image.open(salida / "a" / "x.png")), 255 - a)
+    assert np.array_equal(np.asarray(Image.open(salida / "b" / "x.png")), 255 - b)
+
+
+def test_salidas_duplicadas_se_rechazan(tmp_path):
+    _guardar(str(tmp_path / "in" / "x.png"))
+    Image.fromarray(np.zeros((4, 4, 3), dtype=np.uint8)).save(tmp_path / "in" / "x.jpg")
+    try:
+        _procesar([str(tmp_path / "in")], str(tmp_path / "out"), ["negativo"], formato="png")
+    except ValueError as error:
+        assert "misma salida" in str(error)
+    else:
+        raise AssertionError("se esperaba ValueError")
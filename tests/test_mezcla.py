@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+import imgControl
+from mezcla import Mezclador, Mezclar
+
+
+@pytest.fixture(scope="module")
+def imagenes():
+    rng = np.random.default_rng(9)
+    return [rng.random((20, 26, 3)) for _ in range(4)]
+
+
+@pytest.mark.parametrize("factor", [0.25, 0.6])
+def test_dos_imagenes_igual_a_combinar(imagenes, factor):
+    a, b = imagenes[:2]
+    mezcla = Mezclar([a, b], pesos=[factor, 1 - factor])
+    np.testing.assert_allclose(mezcla, imgControl.CombinarF(a, b, factor), atol=1e-6)
+
+
+def test_dos_imagenes_uint8_a_uno_de_combinar(imagenes):
+    a, b = ((img * 255).astype(np.uint8) for img in imagenes[:2])
+    mezcla = Mezclar([a, b], pesos=[0.3, 0.7])
+    assert mezcla.dtype == np.uint8
+    assert np.abs(mezcla.astype(int) - imgControl.CombinarF(a, b, 0.3)).max() <= 1
+
+
+def test_n_imagenes_desde_un_iterador(imagenes):
+    mezcla = Mezclar(iter(imagenes), pesos=[1, 2, 3, 4])
+    esperado = sum(p * img for p, img in zip([1, 2, 3, 4], imagenes)) / 10
+    np.testing.assert_allclose(mezcla, esperado, atol=1e-6)
+
+
+def test_recortar_a_la_region_comun(imagenes):
+    a, b = imagenes[0], imagenes[1][:15, :20]
+    mezcla = Mezclar([a, b])
+    assert mezcla.shape == (15, 20, 3)
+    np.testing.assert_allclose(mezcla, (a[:15, :20] + b) / 2, atol=1e-6)
+
+
+def test_rellenar_normaliza_por_cobertura(imagenes):
+    a, b = imagenes[0][:15, :20], imagenes[1]
+    mezcla = Mezclar([a, b], alineacion="rellenar")
+    assert mezcla.shape == b.shape
+    np.testing.assert_allclose(mezcla[:15, :20], (a + b[:15, :20]) / 2, atol=1e-6)
+    # Fuera del primer cuadro solo cuenta el segundo
+    np.testing.assert_allclose(mezcla[15:], b[15:], atol=1e-6)
+    np.testing.assert_allclose(mezcla[:, 20:], b[:, 20:], atol=1e-6)
+
+
+def test_remuestrear_como_ampliar_bilineal(imagenes):
+    grande, chica = imagenes[0], imagenes[1][:10, :13]
+    mezcla = Mezclar([grande, chica], alineacion="remuestrear", pesos=[0, 1])
+    np.testing.assert_allclose(mezcla, imgControl.Ampliar(chica, 2, "bilineal"), atol=1e-6)
+
+
+def test_alfa_por_pixel(imagenes):
+    fondo, logo = imagenes[:2]
+    mascara = np.zeros(fondo.shape[:2])
+    mascara[5:10, 5:15] = 1
+    mezcla = Mezclador().Agregar(fondo).Agregar(logo, alfa=mascara).Resultado()
+    np.testing.assert_allclose(mezcla[5:10, 5:15], (fondo[5:10, 5:15] + logo[5:10, 5:15]) / 2,
+                               atol=1e-6)
+    np.testing.assert_allclose(mezcla[:5], fondo[:5], atol=1e-6)
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+import imgControl
+from pipeline import Pipeline
+
+
+@pytest.fixture(scope="module")
+def img():
+    return np.random.default_rng(6).random((40, 300, 3))
+
+
+def _paso_a_paso(img, pasos):
+    for paso in pasos:
+        img = paso(img)
+    return img
+
+
+CADENAS = [
+    (Pipeline().SumarBrillo(0.1).AjusteCanal(0, 0.2).Clip().Negativo(),
+     [lambda x: imgControl.SumarBrillo(x, 0.1), lambda x: imgControl.AjusteCanal(x, 0, 0.2),
+      lambda x: np.clip(x, 0, 1), imgControl.Negativo]),
+    (Pipeline().AjusteContraste(0, 1.2).Clip().AjusteContraste(1, 0.8).Clip(),
+     [lambda x: imgControl.AjusteContraste(x, 0, 1.2), lambda x: np.clip(x, 0, 1),
+      lambda x: imgControl.AjusteContraste(x, 1, 0.8), lambda x: np.clip(x, 0, 1)]),
+    (Pipeline().Negativo().Grises().SumarBrillo(-0.1).Clip(),
+     [imgControl.Negativo, imgControl.Grises, lambda x: imgControl.SumarBrillo(x, -0.1),
+      lambda x: np.clip(x, 0, 1)]),
+    (Pipeline().SumarBrillo(0.05).Binaria(0.5),
+     [lambda x: imgControl.SumarBrillo(x, 0.05), lambda x: imgControl.Binaria(x, 0.5)]),
+]
+
+
+@pytest.mark.parametrize("cadena,pasos", CADENAS)
+def test_fusion_igual_a_paso_a_paso(img, cadena, pasos):
+    fusionado = cadena.Evaluar(img)
+    directo = _paso_a_paso(img, pasos)
+    assert fusionado.shape == directo.shape
+    if directo.dtype == bool:
+        np.testing.assert_array_equal(fusionado, directo)
+    else:
+        np.testing.assert_allclose(fusionado, directo, atol=1e-12)
+
+
+def test_informa_temporales_evitados(img):
+    cadena = CADENAS[0][0]
+    cadena.Evaluar(img)
+    estadisticas = cadena.estadisticas
+    assert estadisticas["pasadas"] == 1
+    assert estadisticas["temporales_usados"] == 1
+    assert estadisticas["temporales_evitados"] == estadisticas["temporales_directos"] - 1 > 0
+
+
+def test_evaluar_en_sitio(img):
+    cadena = Pipeline().SumarBrillo(0.1).Clip()
+    buffer = img.copy()
+    assert cadena.Evaluar(buffer, out=buffer) is buffer
+    np.testing.assert_allclose(buffer, np.clip(img + 0.1, 0, 1))
+    assert cadena.estadisticas["temporales_usados"] == 0
+
+
+def test_uint8_dentro_de_uno_del_float(img):
+    u = (img * 255).round().astype(np.uint8)
+    cadena = Pipeline().SumarBrillo(0.1).AjusteContraste(0, 1.2).Clip().Negativo()
+    esperado = np.rint(cadena.Evaluar(u / 255.0) * 255)
+    assert np.abs(cadena.Evaluar(u).astype(int) - esperado).max() <= 1
@@ -0,0 +1,99 @@
+import io
+
+import numpy as np
+import pytest
+
+import imgControl
+import lote
+import secuencias
+
+
+@pytest.fixture(scope="module")
+def cuadros():
+    rng = np.random.default_rng(3)
+    return [rng.integers(0, 256, (24, 32, 3), dtype=np.uint8) for _ in range(5)]
+
+
+@pytest.mark.parametrize("textos", [
+    ["negativo"],
+    ["brillo=0.2", "contraste=log,1.2"],
+    ["canal=1,-0.3", "grises"],
+    ["contraste=exp,0.8", "binarizar=0.4"],
+    ["brillo=-0.1", "grises", "negativo"],
+])
+def test_cadena_igual_a_lote(cuadros, textos):
+    cadena = secuencias.CadenaCuadros.DesdeOperaciones(
+        [secuencias.ParsearEtapa(t) for t in textos])
+    referencia = lote.Cadena([lote.ParsearOperacion(t) for t in textos])
+    cadena.Preparar(cuadros[0].shape)
+    salida = np.empty(cuadros[0].shape, dtype=np.uint8)
+    for cuadro in cuadros:
+        esperado = referencia.Aplicar(cuadro)
+        cadena.Aplicar(cuadro, salida)
+        if esperado.ndim == 2:
+            esperado = np.repeat(esperado[:, :, None], 3, axis=2)
+        np.testing.assert_array_equal(salida, esperado)
+
+
+def test_promedio_movil_igual_a_combinar(cuadros):
+    etapa = secuencias.PromedioMovil(0.3)
+    etapa.Preparar(cuadros[0].shape)
+    salida = np.empty(cuadros[0].shape, dtype=np.uint8)
+    promedio = cuadros[0].astype(np.float32)
+    for i, cuadro in enumerate(cuadros):
+        etapa.Aplicar(cuadro, salida)
+        if i:
+            promedio = cuadro * np.float32(0.3) + promedio * np.float32(0.7)
+        np.testing.assert_array_equal(salida, np.clip(np.rint(promedio), 0, 255).astype(np.uint8))
+    # Con alfa = 1 deja pasar el cuadro, como CombinarF
+    np.testing.assert_array_equal(imgControl.CombinarF(cuadros[1], cuadros[0], 1.0), cuadros[1])
+
+
+def test_diferencia(cuadros):
+    etapa = secuencias.DiferenciaCuadros()
+    etapa.Preparar(cuadros[0].shape)
+    salida = np.empty(cuadros[0].shape, dtype=np.uint8)
+    etapa.Aplicar(cuadros[0], salida)
+    assert not salida.any()
+    etapa.Aplicar(cuadros[1], salida)
+    np.testing.assert_array_equal(
+        salida, np.abs(cuadros[1].astype(int) - cuadros[0]).astype(np.uint8))
+
+
+def test_rechaza_operaciones_no_puntuales():
+    for texto in ("rotar=30", "binarizar=otsu", "promedio=0"):
+        with pytest.raises(ValueError):
+            secuencias.ParsearEtapa(texto)
+
+
+def test_procesador_crudo_ida_y_vuelta(cuadros):
+    entrada = io.BytesIO(b"".join(c.tobytes() for c in cuadros) + b"\x00" * 7)
+    salida = io.BytesIO()
+    cadena = secuencias.CadenaCuadros.DesdeOperaciones([secuencias.ParsearEtapa("negativo")])
+    procesador = secuencias.ProcesadorSecuencia(cadena, profundidad=1)
+    estadisticas = procesador.Procesar(secuencias.LeerCrudo(entrada, 32, 24),
+                                       secuencias.EscribirCrudo(salida))
+    # El cuadro incompleto del final se ignora
+    assert estadisticas["procesados"] == estadisticas["escritos"] == len(cuadros)
+    resultado = np.frombuffer(salida.getvalue(), dtype=np.uint8).reshape((-1, 24, 32, 3))
+    np.testing.assert_array_equal(resultado, 255 - np.stack(cuadros))
+
+
+def test_fusion_con_cuadros_rgba(cuadros):
+    fondo = cuadros[4]
+    rgba = np.concatenate((cuadros[0], cuadros[1][:, :, :1]), axis=2)
+    etapa = secuencias.EtapaFusion(fondo, 0.4)
+    etapa.Preparar(rgba.shape)
+    salida = np.empty_like(rgba)
+    etapa.Aplicar(rgba, salida)
+    np.testing.assert_array_equal(salida[:, :, :3], imgControl.CombinarF(cuadros[0], fondo, 0.4))
+    # El fondo RGB se trata como opaco
+    opaco = np.full(rgba.shape[:2] + (1,), 255, dtype=np.uint8)
+    np.testing.assert_array_equal(salida[:, :, 3:], imgControl.CombinarF(rgba[:, :, 3:], opaco, 0.4))
+
+
+def test_canal_con_cuadros_grises_es_error_de_uso(capsys):
+    with pytest.raises(SystemExit) as salida:
+        secuencias.main(["-", "--tam", "32x24", "--canales", "1", "--op", "canal=B,0.2"])
+    assert salida.value.code == 2
+    assert "requiere cuadros con color" in capsys.readouterr().err
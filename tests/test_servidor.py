@@ -0,0 +1,92 @@
+import http.client
+import io
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import numpy as np
+import pytest
+from PIL import Image
+import lote
+import servidor
+
+
+@pytest.fixture(scope="module")
+def direccion():
+    srv = servidor.Servidor(("127.0.0.1", 0),
+                            servidor.Servicio(trabajadores=1, max_pixeles=1_000_000))
+    srv.Iniciar()
+    yield srv
+    srv.Detener()
+
+
+def _png(img):
+    buffer = io.BytesIO()
+    Image.fromarray(img).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _post(srv, consulta, datos):
+    conexion = http.client.HTTPConnection(*srv.server_address[:2], timeout=60)
+    conexion.request("POST", "/procesar?" + consulta, body=datos)
+    respuesta = conexion.getresponse()
+    return respuesta.status, dict(respuesta.getheaders()), respuesta.read()
+
+
+def _get(srv, ruta):
+    conexion = http.client.HTTPConnection(*srv.server_address[:2], timeout=60)
+    conexion.request("GET", ruta)
+    return json.loads(conexion.getresponse().read())
+
+
+def test_no_importa_la_interfaz():
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    codigo = "import sys, servidor; print('tkinter' in sys.modules or 'matplotlib' in sys.modules)"
+    salida = subprocess.run([sys.executable, "-c", codigo], cwd=raiz, capture_output=True,
+                            text=True, check=True).stdout
+    assert salida.strip() == "False"
+
+
+def test_resultado_igual_a_lote(direccion):
+    img = np.random.default_rng(0).integers(0, 256, (40, 60, 3), dtype=np.uint8)
+    ops = ["grises", "contraste=log,1.2", "rotar=30,bilineal"]
+    estado, cabeceras, cuerpo = _post(direccion, "&".join("op=" + op for op in ops), _png(img))
+    assert estado == 200 and cabeceras["Transfer-Encoding"] == "chunked"
+    esperado = lote.Cadena([lote.ParsearOperacion(op) for op in ops]).Aplicar(img)
+    assert np.array_equal(np.asarray(Image.open(io.BytesIO(cuerpo))), esperado)
+
+
+def test_cache_y_metricas(direccion):
+    datos = _png(np.full((8, 8, 3), 7, dtype=np.uint8))
+    antes = _get(direccion, "/metricas")["cache"]["aciertos_memoria"]
+    assert _post(direccion, "op=negativo", datos)[0] == 200
+    assert _post(direccion, "op=negativo", datos)[0] == 200
+    metricas = _get(direccion, "/metricas")
+    assert metricas["cache"]["aciertos_memoria"] == antes + 1
+    assert set(metricas["latencia_s"]["total"]) >= {"p50", "p90", "p99"}
+    assert metricas["cola"]["pendientes"] == 0
+
+
+def test_errores_y_limites(direccion):
+    datos = _png(np.zeros((100, 100, 3), dtype=np.uint8))
+    assert _post(direccion, "op=desconocida", datos)[0] == 400
+    assert _post(direccion, "op=fusionar=/etc/passwd", datos)[0] == 400
+    assert _post(direccion, "op=mediana=99", datos)[0] == 400
+    assert _post(direccion, "op=negativo", b"no es una imagen")[0] == 422
+    assert _post(direccion, "op=ampliar=20", datos)[0] == 413
+    assert _post(direccion, "op=rotar=45,vecino,expandir&op=ampliar=8", datos)[0] == 413
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGKILL"), reason="requiere SIGKILL")
+def test_pool_se_rehace_si_muere_un_trabajador(direccion):
+    datos = _png(np.zeros((16, 16, 3), dtype=np.uint8))
+    servicio = direccion.servicio
+    reconstrucciones = servicio.reconstrucciones
+    for pid in list(servicio.pool._processes):
+        os.kill(pid, signal.SIGKILL)
+    time.sleep(0.2)
+    estados = [_post(direccion, "op=negativo", datos)[0] for _ in range(3)]
+    assert estados[-1] == 200 and set(estados) <= {200, 503}
+    assert servicio.reconstrucciones == reconstrucciones + 1
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+import histograma
+import imgControl
+import umbral
+
+
+@pytest.fixture(scope="module")
+def bimodal():
+    rng = np.random.default_rng(10)
+    gris = np.where(rng.random((40, 50)) < 0.4, rng.normal(60, 15, (40, 50)),
+                    rng.normal(170, 25, (40, 50)))
+    return np.clip(gris, 0, 255).astype(np.uint8)
+
+
+def _otsu_fuerza_bruta(gris):
+    mejor, nivel = -1.0, 0
+    valores = gris.ravel().astype(np.float64)
+    for t in range(256):
+        oscuros, claros = valores[valores <= t], valores[valores > t]
+        if not oscuros.size or not claros.size:
+            continue
+        varianza = oscuros.size * claros.size * (oscuros.mean() - claros.mean()) ** 2
+        if varianza > mejor * (1 + 1e-12):
+            mejor, nivel = varianza, t
+    return nivel
+
+
+def test_otsu_igual_a_fuerza_bruta(bimodal):
+    nivel = _otsu_fuerza_bruta(bimodal)
+    u = umbral.Otsu(bimodal)
+    np.testing.assert_array_equal(imgControl.Binaria(bimodal, u), bimodal > nivel)
+    # La misma máscara sobre la imagen RGB en uint8
+    rgb = np.repeat(bimodal[:, :, None], 3, axis=2)
+    np.testing.assert_array_equal(imgControl.Binaria(rgb, umbral.Otsu(rgb)),
+                                  histograma.Luminancia(rgb) > nivel)
+
+
+def _adaptativo_fuerza_bruta(gris, radio, metodo, parametro, R=0.5):
+    h, w = gris.shape
+    mascara = np.zeros((h, w), dtype=bool)
+    for y in range(h):
+        for x in range(w):
+            ventana = gris[max(0, y - radio):y + radio + 1, max(0, x - radio):x + radio + 1]
+            media = ventana.mean()
+            if metodo == "media":
+                corte = media - parametro
+            else:
+                corte = media * (1 + parametro * (ventana.std() / R - 1))
+            mascara[y, x] = gris[y, x] > corte
+    return mascara
+
+
+@pytest.mark.parametrize("metodo,parametro", [("media", 0.02), ("sauvola", 0.2), ("sauvola", 0.5)])
+@pytest.mark.parametrize("radio", [0, 2, 5])
+def test_adaptativo_igual_a_fuerza_bruta(bimodal, metodo, parametro, radio):
+    esperado = _adaptativo_fuerza_bruta(bimodal / 255.0, radio, metodo, parametro)
+    # float en [0,1] y uint8 (sumas enteras) dan la misma máscara
+    for img in (bimodal / 255.0, bimodal):
+        np.testing.assert_array_equal(umbral.Adaptativo(img, radio, metodo, parametro), esperado)
+
+
+def test_adaptativo_por_franjas(bimodal, monkeypatch):
+    entero = umbral.Adaptativo(bimodal, 3)
+    monkeypatch.setattr(umbral, "_BYTES_FRANJA", 1)  # franjas de 4 ventanas de alto
+    np.testing.assert_array_equal(umbral.Adaptativo(bimodal, 3), entero)
+
+
+def test_mascara_bits_ida_y_vuelta(bimodal):
+    mascara = bimodal > 100
+    bits = umbral.Empaquetar(mascara[:, :45])
+    np.testing.assert_array_equal(bits.bits, np.packbits(mascara[:, :45], axis=-1))
+    np.testing.assert_array_equal(bits.Desempaquetar(), mascara[:, :45])
+    assert bits.nbytes == 40 * 6
+    empaquetada = umbral.Adaptativo(bimodal, 3, empaquetar=True)
+    np.testing.assert_array_equal(empaquetada.Desempaquetar(), umbral.Adaptativo(bimodal, 3))
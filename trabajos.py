@@ -0,0 +1,179 @@
+"""
+trabajos.py
+-----------
+
+Ejecución de transformaciones fuera del hilo principal de Tkinter.
+
+GestorTrabajos tiene un hilo trabajador que ejecuta los trabajos en orden.
+Los resultados y el progreso vuelven a la interfaz por una cola que el hilo
+principal revisa con root.after (Tk no es seguro entre hilos), así la
+ventana nunca se congela mientras se calcula.
+
+- Progreso: cada trabajo recibe progreso(hechas, total); las funciones por
+  partes (EjecutorMosaicos.Aplicar) lo llaman por cada mosaico terminado.
+- Cancelación: cada trabajo recibe un threading.Event; Cancelar() lo activa y
+  el trabajo termina con mosaicos.Cancelado en la siguiente parte.
+- Fusión de pedidos: si llega un trabajo con la misma `clave` que otro que
+  aún espera en la cola, el anterior se descarta y solo corre el último.
+- Encadenado: los trabajos encadenados reciben el resultado del trabajo
+  encadenado anterior (`estado`), aunque la interfaz aún no lo haya mostrado.
+- Confirmación: al_confirmar(resultado) corre en el hilo trabajador solo si el
+  resultado se acepta (no cancelado ni reemplazado por Reiniciar). Los modelos
+  que dependen del orden de los trabajos (historial, cadena de pasos) se
+  actualizan allí, antes de que empiece el trabajo siguiente.
+"""
+
+import queue
+import threading
+import time
+from mosaicos import Cancelado
+
+
+class Trabajo:
+    """Un trabajo pendiente o en curso."""
+
+    def __init__(self, funcion, nombre, clave, encadenado, al_terminar, al_error,
+                 al_confirmar=None):
+        self.funcion = funcion
+        self.nombre = nombre
+        self.clave = clave
+        self.encadenado = encadenado
+        self.al_terminar = al_terminar
+        self.al_error = al_error
+        self.al_confirmar = al_confirmar
+        self.cancelar = threading.Event()
+        self.enviado = time.perf_counter()
+
+
+class GestorTrabajos:
+    """
+    Cola de trabajos con un hilo trabajador y entrega de resultados por root.after.
+
+    Parámetros
+    ----------
+    root : tk.Misc
+        Widget de Tk usado para programar el sondeo (root.after).
+    al_progreso : callable, opcional
+        al_progreso(fraccion, nombre) en el hilo principal; fraccion es None
+        cuando no hay trabajo en curso.
+    intervalo_ms : int
+        Período de sondeo de la cola de resultados.
+    """
+
+    def __init__(self, root, al_progreso=None, intervalo_ms: int = 30):
+        self.root = root
+        self.al_progreso = al_progreso
+        self.intervalo_ms = intervalo_ms
+        self.estado = None
+        self._pendientes = []
+        self._actual = None
+        self._condicion = threading.Condition()
+        self._salida = queue.Queue()
+        self._progreso = None
+        self._hilo = threading.Thread(target=self._bucle, name="trabajos", daemon=True)
+        self._hilo.start()
+        self.root.after(self.intervalo_ms, self._sondear)
+
+    # ---- API (hilo principal) ----
+
+    def Enviar(self, funcion, nombre: str = "", clave=None, encadenado: bool = False,
+               al_terminar=None, al_error=None, al_confirmar=None) -> Trabajo:
+        """
+        Encola un trabajo.
+
+        funcion(progreso, cancelar) -> resultado, o funcion(estado, progreso, cancelar)
+        si encadenado es True. al_terminar(resultado) y al_error(excepcion) se llaman
+        en el hilo principal; al_confirmar(resultado) en el hilo trabajador, solo si
+        el resultado se acepta. Un trabajo con la misma clave que otro pendiente lo
+        reemplaza.
+        """
+        trabajo = Trabajo(funcion, nombre, clave, encadenado, al_terminar, al_error,
+                          al_confirmar)
+        with self._condicion:
+            if clave is not None:
+                self._pendientes = [t for t in self._pendientes if t.clave != clave]
+            self._pendientes.append(trabajo)
+            self._condicion.notify()
+        return trabajo
+
+    def Cancelar(self):
+        """Descarta los trabajos pendientes y pide al trabajo en curso que se detenga."""
+        with self._condicion:
+            self._pendientes.clear()
+            if self._actual is not None:
+                self._actual.cancelar.set()
+
+    def Reiniciar(self, estado):
+        """
+        Cancela todo y fija un nuevo estado base (p. ej. al abrir una imagen). Los
+        resultados que aún no se entregaron también se descartan.
+        """
+        with self._condicion:
+            self._pendientes.clear()
+            if self._actual is not None:
+                self._actual.cancelar.set()
+            self.estado = estado
+            while not self._salida.empty():
+                self._salida.get_nowait()
+
+    def Ocupado(self) -> bool:
+        with self._condicion:
+            return self._actual is not None or bool(self._pendientes)
+
+    # ---- Hilo trabajador ----
+
+    def _bucle(self):
+        while True:
+            with self._condicion:
+                while not self._pendientes:
+                    self._condicion.wait()
+                trabajo = self._pendientes.pop(0)
+                self._actual = trabajo
+                base = self.estado
+
+            def progreso(hechas, total, trabajo=trabajo):
+                self._progreso = (trabajo.nombre, hechas / total if total else 1.0)
+
+            self._progreso = (trabajo.nombre, 0.0)
+            try:
+                if trabajo.encadenado:
+                    resultado = trabajo.funcion(base, progreso, trabajo.cancelar)
+                else:
+                    resultado = trabajo.funcion(progreso, trabajo.cancelar)
+                if trabajo.cancelar.is_set():
+                    raise Cancelado()
+                with self._condicion:
+                    # Si hubo Reiniciar mientras tanto, el estado ya no es el de base
+                    vigente = self.estado is base and not trabajo.cancelar.is_set()
+                    if vigente and trabajo.al_confirmar is not None:
+                        trabajo.al_confirmar(resultado)
+                    if trabajo.encadenado and vigente:
+                        self.estado = resultado
+                    if vigente:
+                        self._salida.put((trabajo.al_terminar, resultado))
+            except Cancelado:
+                pass
+            except Exception as error:
+                self._salida.put((trabajo.al_error, error))
+            finally:
+                with self._condicion:
+                    self._actual = None
+                self._progreso = None
+
+    # ---- Sondeo (hilo principal) ----
+
+    def _sondear(self):
+        try:
+            while True:
+                callback, valor = self._salida.get_nowait()
+                if callback is not None:
+                    callback(valor)
+        except queue.Empty:
+            pass
+        if self.al_progreso is not None:
+            progreso = self._progreso
+            if progreso is None:
+                self.al_progreso(None, "")
+            else:
+                self.al_progreso(progreso[1], progreso[0])
+        self.root.after(self.intervalo_ms, self._sondear)
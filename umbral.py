@@ -0,0 +1,218 @@
+"""
+umbral.py
+---------
+
+Umbralización automática para imgControl.Binaria: Otsu (global) y adaptativa
+(media local o Sauvola), con salida opcional en bits empaquetados.
+
+- Otsu: el umbral que maximiza la varianza entre clases se obtiene del
+  histograma de luminancia (un np.bincount) en O(bins), con sumas acumuladas;
+  después Binaria aplica ese umbral como siempre.
+- Adaptativa: cada píxel se compara con un umbral calculado en la ventana
+  (2*radio+1)^2 que lo rodea. La media y la desviación de cada ventana salen
+  de tablas de sumas acumuladas (imágenes integrales): cuatro lecturas por
+  píxel, así que el costo es O(píxeles) sin importar el tamaño de la ventana.
+  Las tablas se arman por franjas de filas (con un halo de `radio` filas), de
+  modo que la memoria temporal queda acotada; las franjas se pueden repartir
+  entre hilos con `mapear`.
+
+      media   : gris > media - c
+      sauvola : gris > media * (1 + k * (desviacion / R - 1))
+
+Los niveles de gris están en [0,1] (R = 0.5, el rango dinámico de la
+desviación). Igual que Binaria, True son los píxeles claros.
+
+Una máscara booleana ocupa 1 byte por píxel (y la imagen binaria float64 de la
+interfaz, 24). MascaraBits la guarda con np.packbits: 1 bit por píxel.
+
+Ejemplo
+-------
+    umbral = Otsu(img)
+    mascara = imgControl.Binaria(img, umbral)
+    texto = Adaptativo(scan, radio=15, metodo="sauvola", k=0.2)
+    bits = Adaptativo(scan, empaquetar=True)     # MascaraBits, 1/8 de la máscara bool
+    bits = Empaquetar(mascara)
+"""
+
+import numpy as np
+import imgControl
+import histograma
+
+METODOS = ("media", "sauvola")
+
+# Bytes aproximados de las tablas integrales de cada franja
+_BYTES_FRANJA = 8 << 20
+
+
+# =============== Otsu ===============
+
+def UmbralOtsu(hist: np.ndarray) -> float:
+    """
+    Umbral de Otsu a partir de un histograma de luminancia (bins,), en O(bins).
+
+    Retorna el umbral en [0,1] con la convención de imgControl.Binaria
+    (los niveles mayores que el umbral quedan en True).
+    """
+    hist = np.asarray(hist, dtype=np.float64)
+    bins = hist.size
+    total = hist.sum()
+    if total == 0:
+        return 0.5
+    p = hist / total
+    omega = np.cumsum(p)                      # peso de la clase oscura
+    mu = np.cumsum(p * np.arange(bins))       # media acumulada (sin normalizar)
+    denominador = omega * (1 - omega)
+    varianza = np.zeros(bins)
+    np.divide((mu[-1] * omega - mu) ** 2, denominador, out=varianza, where=denominador > 1e-12)
+    t = int(np.argmax(varianza))
+    # Último nivel 0..255 que cae en el bin t (ver histograma._niveles_a_bins)
+    nivel = ((t + 1) * 256 + bins - 1) // bins - 1
+    # Mitad de escalón: Binaria en uint8 compara con floor(umbral * 255) = nivel
+    return (nivel + 0.5) / 255
+
+
+def Otsu(img: np.ndarray, bins: int = 256) -> float:
+    """Umbral de Otsu de la luminancia de img (uint8 o float [0,1])."""
+    return UmbralOtsu(histograma.HistogramaLuminancia(img, bins))
+
+
+# =============== Máscaras empaquetadas ===============
+
+class MascaraBits:
+    """
+    Máscara booleana empaquetada a 1 bit por píxel (np.packbits por filas).
+
+    Atributos
+    ---------
+    bits : np.ndarray
+        uint8 (h, ceil(w / 8)).
+    forma : tuple
+        (h, w) de la máscara original.
+    """
+
+    def __init__(self, bits: np.ndarray, forma: tuple):
+        self.bits = bits
+        self.forma = tuple(forma)
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def Desempaquetar(self) -> np.ndarray:
+        """Máscara bool (h, w)."""
+        return np.unpackbits(self.bits, axis=-1, count=self.forma[-1]).view(bool)
+
+    def __repr__(self):
+        return f"MascaraBits({self.forma}, {self.nbytes} B)"
+
+
+def Empaquetar(mascara: np.ndarray) -> MascaraBits:
+    """Empaqueta una máscara bool (h, w) (p. ej. de imgControl.Binaria) a 1 bit por píxel."""
+    mascara = np.asarray(mascara, dtype=bool)
+    return MascaraBits(np.packbits(mascara, axis=-1), mascara.shape)
+
+
+# =============== Adaptativa ===============
+
+def _gris(img):
+    # Misma luminancia que Binaria: uint8 entero, float en [0,1]
+    if img.ndim == 2:
+        return img
+    if img.dtype == np.uint8:
+        return histograma.Luminancia(img)
+    return imgControl.Grises(img)
+
+
+def _franja(gris, radio, yI, yF, metodo, parametro, R):
+    """Máscara de las filas yI:yF a partir de tablas integrales de esa franja (+ halo)."""
+    h, w = gris.shape
+    a, b = max(0, yI - radio), min(h, yF + radio)
+    entero = gris.dtype == np.uint8
+    tipo = np.int64 if entero else np.float64
+    bloque = gris[a:b].astype(tipo)
+
+    def integral(valores):
+        tabla = np.zeros((b - a + 1, w + 1), dtype=tipo)
+        np.cumsum(valores, axis=0, out=tabla[1:, 1:])
+        np.cumsum(tabla[1:, 1:], axis=1, out=tabla[1:, 1:])
+        # Con `radio` copias del borde alrededor, las esquinas de la ventana de
+        # cada píxel (recortadas a la imagen) quedan en cortes contiguos
+        return np.pad(tabla, radio, mode="edge")
+
+    # Esquinas de la ventana de la fila y (columna x) en la tabla con borde:
+    # arriba/izquierda en y - a (x), abajo/derecha en y - a + 2*radio + 1
+    arriba = slice(yI - a, yF - a)
+    abajo = slice(yI - a + 2 * radio + 1, yF - a + 2 * radio + 1)
+    izquierda = slice(0, w)
+    derecha = slice(2 * radio + 1, 2 * radio + 1 + w)
+    filas = np.arange(yI, yF)
+    columnas = np.arange(w)
+    n = ((np.minimum(filas + radio + 1, h) - np.maximum(filas - radio, 0))[:, None]
+         * (np.minimum(columnas + radio + 1, w) - np.maximum(columnas - radio, 0))[None, :])
+
+    def suma(tabla):
+        total = tabla[abajo, derecha] - tabla[arriba, derecha]
+        total -= tabla[abajo, izquierda]
+        total += tabla[arriba, izquierda]
+        return total.astype(np.float64)
+
+    escala = 255.0 if entero else 1.0
+    media = suma(integral(bloque)) / n
+    centro = gris[yI:yF].astype(np.float64)
+    if metodo == "media":
+        umbral = media - parametro * escala
+    else:
+        cuadrados = suma(integral(bloque * bloque)) / n
+        desviacion = np.sqrt(np.maximum(cuadrados - media * media, 0))
+        umbral = media * (1 + parametro * (desviacion / (R * escala) - 1))
+    return centro > umbral
+
+
+def Adaptativo(img: np.ndarray, radio: int = 15, metodo: str = "sauvola",
+               parametro: float | None = None, R: float = 0.5, empaquetar: bool = False,
+               mapear=map):
+    """
+    Binarización adaptativa por ventanas locales (ver el encabezado del módulo).
+
+    Parámetros
+    ----------
+    img : np.ndarray
+        Imagen (h,w,3) o (h,w), uint8 o float [0,1].
+    radio : int
+        Ventana de (2*radio+1) x (2*radio+1) píxeles (recortada en los bordes).
+    metodo : str
+        "media" o "sauvola".
+    parametro : float, opcional
+        c para "media" (por defecto 0.02, en unidades de [0,1]); k para
+        "sauvola" (por defecto 0.2).
+    R : float
+        Rango dinámico de la desviación en Sauvola ([0,1]).
+    empaquetar : bool
+        Si es True devuelve una MascaraBits en lugar de la máscara bool.
+    mapear : callable
+        mapear(funcion, franjas) para repartir las franjas (p. ej. EjecutorMosaicos.Mapear).
+
+    Retorna
+    -------
+    np.ndarray bool (h, w) o MascaraBits.
+    """
+    if metodo not in METODOS:
+        raise ValueError(f"Método desconocido: {metodo}")
+    if parametro is None:
+        parametro = 0.02 if metodo == "media" else 0.2
+    radio = max(0, int(radio))
+    gris = _gris(img)
+    h, w = gris.shape
+    # Franjas de al menos 4 ventanas de alto: el halo repetido cuesta <= 50 %
+    filas = max(4 * (2 * radio + 1), _BYTES_FRANJA // (8 * (w + 1)))
+    franjas = [(yI, min(yI + filas, h)) for yI in range(0, h, filas)]
+
+    def calcular(franja):
+        mascara = _franja(gris, radio, franja[0], franja[1], metodo, parametro, R)
+        return np.packbits(mascara, axis=-1) if empaquetar else mascara
+
+    partes = list(mapear(calcular, franjas))
+    if not empaquetar:
+        return np.concatenate(partes) if partes else np.zeros((h, w), dtype=bool)
+    bits = np.concatenate(partes) if partes else np.zeros((h, (w + 7) // 8), dtype=np.uint8)
+    return MascaraBits(bits, (h, w))